@@ -3,12 +3,16 @@
 # TODO: document other hooks
 
 import datetime
+import hashlib
 import json
+import re
 import sys
+from functools import lru_cache
+from html import escape
 from pathlib import Path
 
+from boltons.fileutils import atomic_save
 from boltons.iterutils import partition
-from boltons.tableutils import Table
 
 # GoodTurn: https://goodturn.ai/p/gtp_01kx93yhpmfzcr6k34kzenzmxt
 # Workaround: boltons (<= 25.x) HTMLTextExtractor.__init__ never calls
@@ -22,190 +26,385 @@ if not hasattr(_strutils.HTMLTextExtractor, "scripting"):
     _strutils.HTMLTextExtractor.scripting = False
 
 PROJECT_ROOT_PATH = Path(__file__).parent
+
+# versions sort like the data generator orders releases
+sys.path.insert(0, str(PROJECT_ROOT_PATH / "tools"))
+from gen_projects_json import version_key  # noqa: E402
+
 PROJECTS_JSON_PATH = PROJECT_ROOT_PATH / "projects.json"
+TABLE_CACHE_PATH = PROJECT_ROOT_PATH / ".cache" / "tables"
+# the rows of every project table, written to the site output in the
+# "ajax" table mode
+TABLE_ROWS_FILENAME = "project-table-rows.json"
+TABLE_MODES = ("inline", "ajax")
 
 NA_VAL = "---"
 
 def isoparse(s):
-    return datetime.datetime.fromisoformat(s.rstrip("Z"))
+    """Parse an ISO 8601 date to a naive datetime, dropping any offset."""
+    dt = datetime.datetime.fromisoformat(s.rstrip("Z"))
+    if dt.tzinfo is not None:
+        dt = dt.replace(tzinfo=None)
+    return dt
 
 
-def chert_post_load(chert_obj):
-    # https://github.com/mahmoud/chert/blob/b4a91b5a66ec5f5002d6e67a2f880709e2e11326/chert/core.py#L840
-    with PROJECTS_JSON_PATH.open() as f:
-        projects = json.load(f)["projects"]
+# Renderers for placeholders like [ZEROVER_PROJECT_TABLE] in entries, by
+# name. Each takes the projects.json entries and returns HTML.
+PLACEHOLDERS = {}
+PLACEHOLDER_RE = re.compile(r"\[([A-Z][A-Z0-9_]*)\]")
 
-    zv_projects, emeritus_projects = partition(projects, lambda p: p["is_zerover"])
-    zv_project_table = None
-    emeritus_project_table = None
+# Project tables by placeholder name, as (columns, rows function) pairs.
+# Each rows function takes the projects.json entries, like a placeholder.
+PROJECT_TABLES = {}
+
+
+def placeholder(name):
+    def _register(func):
+        PLACEHOLDERS[name] = func
+        return func
+
+    return _register
+
+
+def project_table(name, columns):
+    """Register a function returning rows for _html_table() as the project
+    table placeholder `name`."""
+
+    def _register(func):
+        PROJECT_TABLES[name] = (columns, func)
+        PLACEHOLDERS[name] = lambda projects: _html_table(columns, func(projects))
+        return func
 
+    return _register
+
+
+class PlaceholderRenderer(object):
+    """Substitutes registered placeholders in entry content. Each one is
+    rendered the first time a page uses it, and its HTML is cached on disk
+    for later renders with the same projects.json, the same version of
+    this module, on the same day.
+
+    In the "ajax" `table_mode`, project tables are rendered without rows,
+    for the page to load from the site's TABLE_ROWS_FILENAME, which holds
+    rows_json()."""
+
+    def __init__(
+        self,
+        projects_json_path=PROJECTS_JSON_PATH,
+        cache_path=TABLE_CACHE_PATH,
+        table_mode="inline",
+    ):
+        if table_mode not in TABLE_MODES:
+            raise ValueError(
+                "expected table mode to be one of %r, not %r" % (TABLE_MODES, table_mode)
+            )
+        self.projects_json_path = projects_json_path
+        self.cache_path = cache_path
+        self.table_mode = table_mode
+        self._projects_json = None
+        self._projects = None
+        self._rendered = None
+        self._cache_file = None
+
+    def _load(self):
+        self._projects_json = self.projects_json_path.read_bytes()
+        self._rendered = {}
+        if self.cache_path is None:
+            return
+        key = _table_cache_key(self._projects_json)
+        self._cache_file = self.cache_path / ("%s.json" % key)
+        try:
+            with self._cache_file.open() as f:
+                self._rendered.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+
+    def _save(self):
+        try:
+            self.cache_path.mkdir(parents=True, exist_ok=True)
+            # only the latest tables are ever reused
+            for old_file in self.cache_path.glob("*.json"):
+                if old_file != self._cache_file:
+                    old_file.unlink()
+            with atomic_save(str(self._cache_file), text_mode=True) as f:
+                json.dump(self._rendered, f)
+        except OSError as e:
+            print("failed to cache rendered placeholders: %r" % e)
+
+    def _cached(self, name, render_func):
+        if self._rendered is None:
+            self._load()
+        if name not in self._rendered:
+            if self._projects is None:
+                self._projects = json.loads(self._projects_json)["projects"]
+            self._rendered[name] = render_func(self._projects)
+            if self._cache_file is not None:
+                self._save()
+        return self._rendered[name]
+
+    def render(self, name):
+        if self.table_mode == "ajax" and name in PROJECT_TABLES:
+            columns, _ = PROJECT_TABLES[name]
+            return _html_table(columns, [], rows_key=name)
+        return self._cached(name, PLACEHOLDERS[name])
+
+    def rows_json(self):
+        """The rows of every project table as JSON, by placeholder name."""
+        return self._cached(TABLE_ROWS_FILENAME, _project_table_rows_json)
+
+    def substitute(self, content):
+        def _replace(match):
+            if match.group(1) not in PLACEHOLDERS:
+                return match.group(0)
+            return self.render(match.group(1))
+
+        return PLACEHOLDER_RE.sub(_replace, content)
+
+
+def _table_cache_key(projects_json):
+    # the tables depend on the data, this code, and (for 0ver years) today
+    key = hashlib.sha256(projects_json)
+    key.update(Path(__file__).read_bytes())
+    key.update(datetime.date.today().isoformat().encode("ascii"))
+    return key.hexdigest()
+
+
+def _table_mode(chert_obj):
+    return chert_obj.get_config("zerover", "table_mode", "inline")
+
+
+def chert_post_load(chert_obj):
+    # https://github.com/mahmoud/chert/blob/b4a91b5a66ec5f5002d6e67a2f880709e2e11326/chert/core.py#L840
+    renderer = PlaceholderRenderer(table_mode=_table_mode(chert_obj))
     for entry in chert_obj.all_entries:
         for part in entry.loaded_parts:
-            content = part["content"]
-            if (
-                "[ZEROVER_PROJECT_TABLE]" not in content
-                and "[EMERITUS_PROJECT_TABLE]" not in content
-            ):
-                continue
-            if zv_project_table is None:
-                try:
-                    zv_project_table = _zv_to_htmltable(zv_projects)
-                except Exception as e:
-                    raise e
-                emeritus_project_table = _emeritus_to_htmltable(
-                    emeritus_projects
-                )  # TODO: emeritus table format
-            content = content.replace("[ZEROVER_PROJECT_TABLE]", zv_project_table)
-            content = content.replace(
-                "[EMERITUS_PROJECT_TABLE]", emeritus_project_table
-            )
-            part["content"] = content
+            part["content"] = renderer.substitute(part["content"])
+
+
+def chert_post_export(chert_obj):
+    table_mode = _table_mode(chert_obj)
+    if table_mode != "ajax":
+        return
+    rows_json = PlaceholderRenderer(table_mode=table_mode).rows_json()
+    rows_path = Path(chert_obj.output_path) / TABLE_ROWS_FILENAME
+    with atomic_save(str(rows_path), text_mode=True) as f:
+        f.write(rows_json)
 
 
 ###########
 
+# Columns as (header, class, sorted) triples. Sorted columns carry a
+# precomputed data-order value per row, which the DataTables setup at the
+# bottom of base.html sorts by, picking the sort type by class.
+ZV_COLUMNS = [
+    ("Project", None, False),
+    ("Stars", "stars", True),
+    ("First Released", "released", True),
+    ("Releases", "releases", True),
+    ("Current Version", "version", True),
+    ("0ver years", "years", True),
+]
+EMERITUS_COLUMNS = [
+    ("Project", None, False),
+    ("Stars", "stars", True),
+    ("First Released", "released", True),
+    ("0ver Releases", "releases", True),
+    ("Last 0ver release", "version", True),
+    ("0ver years", "years", True),
+]
+
+_TABLE_OPEN = (
+    '<table class="zv-table"%s>\n'
+    '<thead style="position: sticky; top: 0; background: white;">\n'
+)
+
+
+def _html_table(columns, rows, rows_key=None):
+    """Render a zv-table. Each row is a tuple of cell HTML, with an extra
+    value before the cell of each sorted column, which goes in the cell's
+    data-order attribute so the table sorting doesn't need to parse the
+    displayed text. Sort values aren't escaped; use numbers or digits.
+
+    With a `rows_key`, the page loads more rows from the site's
+    TABLE_ROWS_FILENAME, under that key."""
+    attrs = ""
+    if rows_key:
+        attrs = ' data-rows-url="/%s" data-rows-key="%s"' % (TABLE_ROWS_FILENAME, rows_key)
+    out = [_TABLE_OPEN % attrs, "<tr>"]
+    cells = []
+    for header, cls, sort in columns:
+        if cls:
+            out.append('<th class="%s">%s</th>' % (cls, _escape(header)))
+        else:
+            out.append("<th>%s</th>" % _escape(header))
+        cells.append('<td data-order="%s">%s</td>' if sort else "<td>%s</td>")
+    out.append("</tr>\n</thead>\n<tbody>\n")
+    row_html = "<tr>%s</tr>\n" % "".join(cells)
+    out.extend([row_html % row for row in rows])
+    out.append("</tbody>\n</table>\n\n")
+    return "".join(out)
 
-class ZVTable(Table):
-    _html_table_tag = '<table class="zv-table">'
-    _html_thead = '<thead style="position: sticky; top: 0; background: white;">'
 
-    def get_cell_html(self, data):
-        # Table escapes html by default
-        return data
+_needs_escape = re.compile(r"[&<>\"']").search
+
+
+def _escape(text):
+    # most values have nothing to escape
+    if _needs_escape(text):
+        return escape(text)
+    return text
 
 
 def tooltipped(content, tip):
+    """Wrap `content` HTML in a span with `tip` as its (escaped) title."""
     if not tip:
         return "%s" % content
-    return '<span title="%s">%s</span>' % (tip, content)
+    return '<span title="%s">%s</span>' % (_escape(str(tip)), content)
+
+
+@lru_cache(maxsize=4096)
+def _version_order(version):
+    """A string that sorts like version_key() in tools/gen_projects_json.py,
+    which drops tag prefixes like "mc1.20.1-". Each part is written after a
+    letter giving its number of digits, so that 10 sorts after 9:
+    "0.10.2" -> "b0.c10.b2". Versions without any parts sort first."""
+    if not version:
+        return ""
+    parts = [str(n) for n in version_key(str(version))]
+    return ".".join([chr(97 + len(part)) + part for part in parts])
+
+
+def _project_cells(entry):
+    """The project link and star count cells, both with the entry's reason
+    as their tooltip."""
+    link = '<a href="%s">%s</a>' % (_escape(entry["url"]), _escape(entry["name"]))
+    stars = "{:,}".format(entry["star_count"]) if entry.get("star_count") else NA_VAL
+    tip = entry.get("reason")
+    if not tip:
+        return link, stars
+    tip = _escape(str(tip))
+    return (
+        '<span title="%s">%s</span>' % (tip, link),
+        '<span title="%s">%s</span>' % (tip, stars),
+    )
 
 
-def _zv_to_htmltable(entries):
-    headers = [
-        "Project",
-        "Stars",
-        "First Released",
-        "Releases",
-        "Current Version",
-        "0ver years",
-    ]
-
-    def _get_row(entry):
-        irel_dt = isoparse(entry["first_release_date"])
-        lrel_dt, zv_streak = None, None
-        if entry.get("latest_release_date"):
-            lrel_dt = isoparse(entry["latest_release_date"])
-        zv_streak = datetime.datetime.now() - irel_dt.replace(tzinfo=None)
-        zv_streak_years = round(zv_streak.days / 365.0, 1)
-
-        row = [
-            tooltipped(
-                '<a href="%s">%s</a>' % (entry["url"], entry["name"]),
-                entry.get("reason"),
-            ),
-            tooltipped(
-                "{:,}".format(entry["star_count"])
-                if entry.get("star_count")
-                else NA_VAL,
-                entry.get("reason"),
-            ),
-            tooltipped(irel_dt.year, entry.get("first_release_version")),
-            "%s" % entry.get("release_count", NA_VAL),
-        ]
-        if lrel_dt:
-            row.append(
-                "%s (%s)" % (entry.get("latest_release_version", NA_VAL), lrel_dt.year)
-            )
-        else:
-            row.append(NA_VAL)
+def _zv_row(entry, now):
+    irel_dt = isoparse(entry["first_release_date"])
+    zv_streak = now - irel_dt
+    # "%.1f" formats like str(round(x, 1)), in a fraction of the time
+    zv_streak_years = "%.1f" % (zv_streak.days / 365.0)
+    version = entry.get("latest_release_version")
+    latest_release_date = entry.get("latest_release_date")
+    if latest_release_date:
+        # only the year is shown, which leads every ISO 8601 date
+        current = "%s (%s)" % (
+            _escape(str(entry.get("latest_release_version", NA_VAL))),
+            latest_release_date[:4],
+        )
+    else:
+        current, version = NA_VAL, None
+
+    project, stars = _project_cells(entry)
+    return (
+        project,
+        entry.get("star_count") or 0,
+        stars,
+        irel_dt.toordinal(),
+        tooltipped(irel_dt.year, entry.get("first_release_version")),
+        entry.get("release_count") or 0,
+        entry.get("release_count", NA_VAL),
+        _version_order(version),
+        current,
+        zv_streak.days,
+        zv_streak_years,
+    )
 
-        row.append("%s" % zv_streak_years)
 
-        return row
+def _emeritus_row(entry, now):
+    irel_dt = isoparse(entry["first_release_date"])
+    lrel_entry = entry.get("first_nonzv_release_date")
+    if lrel_entry:
+        lrel_dt = isoparse(lrel_entry)
+    else:
+        lrel_dt = now
+    zv_streak = lrel_dt - irel_dt
+    zv_streak_years = "%.1f" % (zv_streak.days / 365.0)
+
+    project, stars = _project_cells(entry)
+    return (
+        project,
+        entry.get("star_count") or 0,
+        stars,
+        irel_dt.toordinal(),
+        tooltipped(irel_dt.year, entry.get("first_release_version")),
+        entry.get("release_count_zv") or 0,
+        entry.get("release_count_zv", NA_VAL),
+        _version_order(entry.get("last_zv_release_version")),
+        "%s (%s)"
+        % (_escape(str(entry.get("last_zv_release_version", NA_VAL))), lrel_dt.year),
+        zv_streak.days,
+        zv_streak_years,
+    )
 
+
+def _zv_rows(entries):
+    now = datetime.datetime.now()
     rows = []
     for entry in entries:
         try:
-            row = _get_row(entry)
+            rows.append(_zv_row(entry, now))
         except Exception:
             print("failed to load entry: %r" % entry)
             raise
-        rows.append(row)
+    return rows
 
-    table = ZVTable.from_data(rows, headers=headers)
 
-    ret = table.to_html()
+def _zv_to_htmltable(entries):
+    return _html_table(ZV_COLUMNS, _zv_rows(entries))
 
-    # table sorting js at bottom of base.html uses the stars class on
-    # the heading to sort properly
-    ret = ret.replace("<th>Stars</th>", '<th class="stars">Stars</th>')
-    ret = ret.replace("<th>Releases</th>", '<th class="releases">Releases</th>')
-    ret += "\n\n"
-    return ret
+
+def _emeritus_rows(entries):
+    now = datetime.datetime.now()
+    return [_emeritus_row(entry, now) for entry in entries]
 
 
 def _emeritus_to_htmltable(entries):
-    headers = [
-        "Project",
-        "Stars",
-        "First Released",
-        "0ver Releases",
-        "Last 0ver release",
-        "0ver years",
-    ]
+    return _html_table(EMERITUS_COLUMNS, _emeritus_rows(entries))
 
-    rows = []
-    for entry in entries:
-        irel_dt = isoparse(entry["first_release_date"])
-        lrel_dt, zv_streak = None, None
-        lrel_entry = entry.get("first_nonzv_release_date")
-        if lrel_entry:
-            lrel_dt = isoparse(lrel_entry)
-        else:
-            lrel_dt = datetime.datetime.now()
-
-        zv_streak = lrel_dt.replace(tzinfo=None) - irel_dt.replace(tzinfo=None)
-        zv_streak_years = round(zv_streak.days / 365.0, 1)
-
-        row = [
-            tooltipped(
-                '<a href="%s">%s</a>' % (entry["url"], entry["name"]),
-                entry.get("reason"),
-            ),
-            tooltipped(
-                "{:,}".format(entry["star_count"])
-                if entry.get("star_count")
-                else NA_VAL,
-                entry.get("reason"),
-            ),
-            tooltipped(irel_dt.year, entry.get("first_release_version")),
-            "%s" % entry.get("release_count_zv", NA_VAL),
-        ]
-        if lrel_dt:
-            row.append(
-                "%s (%s)" % (entry.get("last_zv_release_version", NA_VAL), lrel_dt.year)
-            )
-        else:
-            row.append(NA_VAL)
 
-        row.append("%s" % zv_streak_years)
+@project_table("ZEROVER_PROJECT_TABLE", ZV_COLUMNS)
+def _zerover_project_rows(projects):
+    zv_projects, _ = partition(projects, lambda p: p["is_zerover"])
+    return _zv_rows(zv_projects)
 
-        rows.append(row)
 
-    table = ZVTable.from_data(rows, headers=headers)
+@project_table("EMERITUS_PROJECT_TABLE", EMERITUS_COLUMNS)
+def _emeritus_project_rows(projects):
+    # TODO: emeritus table format
+    _, emeritus_projects = partition(projects, lambda p: p["is_zerover"])
+    return _emeritus_rows(emeritus_projects)
 
-    ret = table.to_html()
 
-    # table sorting js at bottom of base.html uses the stars class on
-    # the heading to sort properly
-    ret = ret.replace("<th>Stars</th>", '<th class="stars">Stars</th>')
-    ret = ret.replace(
-        "<th>0ver Releases</th>", '<th class="releases">0ver Releases</th>'
-    )
-    ret += "\n\n"
+def _json_rows(columns, rows):
+    """Rows for _html_table() as lists of cells for the page's DataTables,
+    with each sorted column's cell as a [sort value, HTML] pair."""
+    sorted_flags = [sort for _, _, sort in columns]
+    ret = []
+    for row in rows:
+        values = iter(row)
+        ret.append([[next(values), next(values)] if sort else next(values) for sort in sorted_flags])
     return ret
 
 
+def _project_table_rows_json(projects):
+    tables = {
+        name: _json_rows(columns, rows_func(projects))
+        for name, (columns, rows_func) in PROJECT_TABLES.items()
+    }
+    return json.dumps(tables, separators=(",", ":"))
+
+
 def main():
     with PROJECTS_JSON_PATH.open() as f:
         projects = json.load(f)["projects"]
@@ -0,0 +1,559 @@
+"""
+Micro-benchmarks for the tools, run offline against synthetic data.
+
+    python tools/bench.py tags [--count 50000]
+    python tools/bench.py e2e [--projects 200 2000 20000] [--workers 8]
+    python tools/bench.py tables [--rows 10000]
+    python tools/bench.py yaml [--projects 5000]
+    python tools/bench.py validate [--projects 100000] [--max-legacy 10000]
+"""
+
+import argparse
+import datetime
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import check_projects_yaml
+import custom
+import fake_gh_api
+import gen_projects_json
+import projects_yaml
+import yaml
+from boltons.iterutils import redundant
+from boltons.tableutils import Table
+from hyperlink import parse
+from schema import Optional, Or, Schema
+
+
+def _timed(fn, *args, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _report(name: str, baseline: float, candidates: dict[str, float]) -> None:
+    print(f"{name}: baseline {baseline * 1000:.1f} ms")
+    for label, elapsed in candidates.items():
+        print(f"  {label}: {elapsed * 1000:.1f} ms ({baseline / elapsed:.1f}x)")
+
+
+def synthetic_tag_names(count: int, seed: int = 0) -> list[str]:
+    """Tag names in the styles seen on GitHub, including CI noise."""
+    rng = random.Random(seed)
+    prefixes = ["v", "", "release-", "mc1.20.1-", "ciflow/trunk/", "nightly-", "pkg/v"]
+    names = []
+    for _ in range(count):
+        version = ".".join(str(rng.randrange(n)) for n in (3, 40, 20))
+        suffix = rng.choice(["", "", "", "-rc1", "b2"])
+        names.append(rng.choice(prefixes) + version + suffix)
+    return names
+
+
+# The tag parsing as it was before parse_tag, kept as the baseline.
+
+
+def _legacy_strip_prefix(tag_name: str) -> str:
+    _, _, tag_name = tag_name.rpartition("/")
+    if "-" in tag_name:
+        _, _, version = tag_name.partition("-")
+        if re.search(r"^\d", version):
+            return version
+    match = re.search(r"\d", tag_name)
+    if match:
+        return tag_name[match.start() :]
+    return tag_name
+
+
+def _legacy_match_vtag(tag_name: str):
+    return gen_projects_json.VTAG_RE.match(_legacy_strip_prefix(tag_name))
+
+
+def _legacy_version_key(version: str) -> tuple:
+    clean_version = _legacy_strip_prefix(version)
+    try:
+        return tuple(
+            int(x) for x in re.split(r"\D+", clean_version) if x and x.isdigit()
+        )
+    except (TypeError, ValueError):
+        return tuple()
+
+
+def _legacy_pattern_prefix(full_name: str) -> str | None:
+    _, _, tag_name = full_name.rpartition("/")
+    if any(
+        re.search(pattern, full_name) or re.search(pattern, tag_name)
+        for pattern in gen_projects_json.SKIP_PATTERNS
+    ):
+        return None
+    for pattern in gen_projects_json.STRIP_PATTERNS:
+        if re.search(pattern, tag_name):
+            _, _, version = tag_name.partition("-")
+            if re.search(r"^\d", version):
+                tag_name = version
+                break
+    match = re.search(r"\d", tag_name)
+    if not match:
+        return None
+    prefix = tag_name[: match.start()]
+    return "" if prefix in ("v", "V") else prefix
+
+
+def _legacy_analysis(names: list[str]) -> None:
+    # one classification pass, then match_vtag, version_key (sorting) and
+    # match_vtag again (0ver check) per tag, as get_gh_project_info did
+    for name in names:
+        if _legacy_pattern_prefix(name) is not None and _legacy_match_vtag(name):
+            _legacy_version_key(name)
+            _legacy_match_vtag(name).group("major")
+
+
+def _parsed_analysis(names: list[str]) -> None:
+    for name in names:
+        parsed = gen_projects_json.parse_tag(name)
+        if parsed.pattern_prefix is not None and parsed.vtag:
+            parsed.key
+            parsed.vtag.group("major")
+
+
+def _uncached_analysis(names: list[str]) -> None:
+    gen_projects_json.parse_tag.cache_clear()
+    _parsed_analysis(names)
+
+
+def bench_tags(args) -> None:
+    names = synthetic_tag_names(args.count)
+    for name in names:
+        assert _legacy_version_key(name) == gen_projects_json.version_key(name)
+        assert _legacy_pattern_prefix(name) == gen_projects_json.parse_tag(name).pattern_prefix
+
+    baseline = _timed(_legacy_analysis, names)
+    cold = _timed(_uncached_analysis, names)
+    _parsed_analysis(names)
+    warm = _timed(_parsed_analysis, names)
+    _report(
+        f"tag parsing, {len(names):,} tags",
+        baseline,
+        {"parse_tag, cold cache": cold, "parse_tag, warm cache": warm},
+    )
+
+
+def _run_gen_projects_json(
+    server, projects_yaml: Path, tmp: Path, workers: int, extra_args: list[str]
+) -> dict:
+    """Run gen_projects_json.py once against `server`, caching in `tmp`."""
+    cmd = [
+        sys.executable,
+        str(Path(__file__).parent / "gen_projects_json.py"),
+        "--projects-yaml", str(projects_yaml),
+        "--output", str(tmp / "projects.json"),
+        "--cache-dir", str(tmp / "cache"),
+        "--workers", str(workers),
+        *extra_args,
+    ]
+    env = {**os.environ, "ZV_GH_API_URL": server.url}
+    before = server.request_counts["total"]
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    _, status, rusage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    stderr = proc.stderr.read().decode()
+    proc.stderr.close()
+    if proc.returncode:
+        raise RuntimeError(f"gen_projects_json.py exited {proc.returncode}: {stderr[-2000:]}")
+    return {
+        "wall": elapsed,
+        "requests": server.request_counts["total"] - before,
+        # ru_maxrss is in kilobytes on Linux, bytes on macOS
+        "peak_rss_mb": rusage.ru_maxrss / (1024 if sys.platform != "darwin" else 1024 * 1024),
+    }
+
+
+def bench_e2e(args) -> None:
+    print(f"{'projects':>9} {'run':>6} {'wall s':>8} {'requests':>9} {'peak RSS MB':>12}")
+    for count in args.projects:
+        repos = fake_gh_api.synthetic_repos(count, seed=args.seed)
+        server = fake_gh_api.FakeGitHubAPI(
+            repos, latency=args.latency, rate_limit=100 * count
+        ).start()
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                tmp = Path(tmpdir)
+                fake_gh_api.write_projects_yaml(repos, tmp / "projects.yaml")
+                runs = [("cold", [])]
+                if args.warm:
+                    # every project stale, but nothing changed upstream
+                    runs.append(("warm", ["--ttl", "0"]))
+                for label, extra_args in runs:
+                    res = _run_gen_projects_json(
+                        server, tmp / "projects.yaml", tmp, args.workers, extra_args
+                    )
+                    print(
+                        f"{count:>9,} {label:>6} {res['wall']:>8.2f} "
+                        f"{res['requests']:>9,} {res['peak_rss_mb']:>12.1f}"
+                    )
+        finally:
+            server.stop()
+
+
+def synthetic_entries(count: int, seed: int = 0) -> list[dict]:
+    """projects.json entries of 0ver projects, some with a reason."""
+    rng = random.Random(seed)
+    entries = []
+    for i in range(count):
+        first = datetime.datetime(2000, 1, 1) + datetime.timedelta(days=rng.randrange(9000))
+        latest = first + datetime.timedelta(days=rng.randrange(1, 3000))
+        entry = {
+            "name": f"project-{i}",
+            "url": f"https://github.com/fake-org/project-{i}",
+            "is_zerover": True,
+            "first_release_date": first.isoformat() + "Z",
+            "first_release_version": f"0.{rng.randrange(5)}.0",
+            "latest_release_date": latest.isoformat() + "Z",
+            "latest_release_version": f"0.{rng.randrange(5, 40)}.{rng.randrange(10)}",
+            "release_count": rng.randrange(1, 400),
+            "star_count": rng.randrange(0, 200_000),
+        }
+        if rng.random() < 0.2:
+            entry["reason"] = "Depended on by many other projects"
+        entries.append(entry)
+    return entries
+
+
+# The table rendering as it was before custom._html_table, kept as the
+# baseline.
+
+
+class _LegacyZVTable(Table):
+    _html_table_tag = '<table class="zv-table">'
+    _html_thead = '<thead style="position: sticky; top: 0; background: white;">'
+
+    def get_cell_html(self, data):
+        return data
+
+
+def _legacy_isoparse(s: str) -> datetime.datetime:
+    return datetime.datetime.fromisoformat(s.rstrip("Z"))
+
+
+def _legacy_tooltipped(content, tip) -> str:
+    if not tip:
+        return "%s" % content
+    return '<span title="%s">%s</span>' % (tip, content)
+
+
+def _legacy_zv_to_htmltable(entries: list[dict]) -> str:
+    rows = []
+    for entry in entries:
+        irel_dt = _legacy_isoparse(entry["first_release_date"])
+        lrel_dt = None
+        if entry.get("latest_release_date"):
+            lrel_dt = _legacy_isoparse(entry["latest_release_date"])
+        zv_streak = datetime.datetime.now() - irel_dt.replace(tzinfo=None)
+        row = [
+            _legacy_tooltipped(
+                '<a href="%s">%s</a>' % (entry["url"], entry["name"]), entry.get("reason")
+            ),
+            _legacy_tooltipped(
+                "{:,}".format(entry["star_count"]) if entry.get("star_count") else custom.NA_VAL,
+                entry.get("reason"),
+            ),
+            _legacy_tooltipped(irel_dt.year, entry.get("first_release_version")),
+            "%s" % entry.get("release_count", custom.NA_VAL),
+        ]
+        if lrel_dt:
+            row.append("%s (%s)" % (entry.get("latest_release_version", custom.NA_VAL), lrel_dt.year))
+        else:
+            row.append(custom.NA_VAL)
+        row.append("%s" % round(zv_streak.days / 365.0, 1))
+        rows.append(row)
+    headers = [header for header, _, _ in custom.ZV_COLUMNS]
+    ret = _LegacyZVTable.from_data(rows, headers=headers).to_html()
+    ret = ret.replace("<th>Stars</th>", '<th class="stars">Stars</th>')
+    ret = ret.replace("<th>Releases</th>", '<th class="releases">Releases</th>')
+    return ret + "\n\n"
+
+
+_sort_attrs_re = re.compile(r' data-order="[^"]*"| class="(?:released|version|years)"')
+
+
+def _row_layout(columns) -> list[bool]:
+    """Whether each value of a custom._html_table() row is a displayed
+    cell, rather than the sort value before one."""
+    layout = []
+    for _, _, sort in columns:
+        layout.extend([False, True] if sort else [True])
+    return layout
+
+
+TABLE_REPEAT = 15
+
+
+def bench_tables(args) -> None:
+    entries = synthetic_entries(args.rows)
+    # the legacy table has no sort values, but otherwise the same HTML
+    unsorted = _sort_attrs_re.sub("", custom._zv_to_htmltable(entries))
+    assert _legacy_zv_to_htmltable(entries) == unsorted
+
+    # more runs than elsewhere, as these are short and easily skewed
+    baseline = _timed(_legacy_zv_to_htmltable, entries, repeat=TABLE_REPEAT)
+    direct = _timed(custom._zv_to_htmltable, entries, repeat=TABLE_REPEAT)
+    _report(f"0ver table, {len(entries):,} rows", baseline, {"_html_table": direct})
+
+    # the HTML writing alone, both from the same rows of cells; the
+    # legacy table takes just the displayed cells, as strings
+    now = datetime.datetime.now()
+    rows = [custom._zv_row(entry, now) for entry in entries]
+    display = [i for i, cell in enumerate(_row_layout(custom.ZV_COLUMNS)) if cell]
+    headers = [header for header, _, _ in custom.ZV_COLUMNS]
+
+    def legacy_html():
+        str_rows = [[str(row[i]) for i in display] for row in rows]
+        return _LegacyZVTable.from_data(str_rows, headers=headers).to_html()
+
+    baseline = _timed(legacy_html, repeat=TABLE_REPEAT)
+    direct = _timed(custom._html_table, custom.ZV_COLUMNS, rows, repeat=TABLE_REPEAT)
+    _report("  of which writing HTML", baseline, {"_html_table": direct})
+
+
+def bench_yaml(args) -> None:
+    repos = fake_gh_api.synthetic_repos(args.projects, max_tags=1)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "projects.yaml"
+        fake_gh_api.write_projects_yaml(repos, path)
+        cache_dir = Path(tmpdir) / "cache"
+        projects_yaml.load(path, cache_dir)
+
+        baseline = _timed(lambda: yaml.safe_load(path.read_bytes()))
+        _report(
+            f"projects.yaml, {args.projects:,} projects",
+            baseline,
+            {
+                f"parse ({projects_yaml.SafeLoader.__name__})": _timed(
+                    projects_yaml.load, path, None
+                ),
+                "cached": _timed(projects_yaml.load, path, cache_dir),
+            },
+        )
+
+
+def synthetic_yaml_projects(count: int, seed: int = 0) -> list[dict]:
+    """Parsed projects.yaml projects of all four kinds, GitHub or not,
+    current or emeritus, with some optional fields."""
+    rng = random.Random(seed)
+    projects = []
+    for i in range(count):
+        first = datetime.date(2000, 1, 1) + datetime.timedelta(days=rng.randrange(9000))
+        project = {"name": f"project-{i}"}
+        if rng.random() < 0.8:
+            project["gh_url"] = f"https://github.com/fake-org-{i % 97}/project-{i}"
+            if rng.random() < 0.3:
+                project["url"] = f"https://project-{i}.example.com"
+        else:
+            project["url"] = f"https://project-{i}.example.com"
+            project["first_release_date"] = first
+            project["star_count"] = rng.randrange(1000)
+        if rng.random() < 0.2:
+            project["emeritus"] = True
+            project["first_nonzv_release_version"] = "1.0.0"
+            project["last_zv_release_version"] = f"0.{rng.randrange(40)}.0"
+        elif "gh_url" not in project:
+            project["release_count"] = rng.randrange(1, 400)
+            project["latest_release_version"] = f"0.{rng.randrange(40)}.0"
+        if rng.random() < 0.2:
+            project["reason"] = "Depended on by many other projects"
+        projects.append(project)
+    return projects
+
+
+def _mutated_projects(projects: list[dict], seed: int = 0) -> list[dict]:
+    """Copies of `projects` with one field dropped, added or mistyped."""
+    rng = random.Random(seed)
+    mutated = []
+    for project in projects:
+        project = dict(project)
+        mutation = rng.randrange(3)
+        if mutation == 0:
+            del project[rng.choice(list(project))]
+        elif mutation == 1:
+            project[rng.choice(list(check_projects_yaml.FIELDS) + ["homepage"])] = "x"
+        else:
+            field = rng.choice(list(project))
+            project[field] = 12 if isinstance(project[field], str) else "12"
+        mutated.append(project)
+    return mutated
+
+
+# The projects.yaml validation as it was before check_projects_yaml.validate,
+# kept as the baseline.
+
+
+def _legacy_check_url(url_str: str):
+    url = parse(url_str)
+    assert url.scheme in ("http", "https")
+    return True
+
+
+_LEGACY_OPTIONAL = {
+    Optional("gh_url"): _legacy_check_url,
+    Optional("repo_url"): str,
+    Optional("wp_url"): str,
+    Optional("emeritus"): bool,
+    Optional("reason"): str,
+    Optional("skip"): bool,
+}
+_LEGACY_SCHEMA = Schema(
+    {
+        "projects": [
+            Or(
+                # GitHub projects
+                {
+                    **_LEGACY_OPTIONAL,
+                    "name": str,
+                    "gh_url": _legacy_check_url,
+                    Optional("emeritus"): False,
+                    Optional("url"): _legacy_check_url,
+                    Optional("release_count"): int,
+                    Optional("latest_release_date"): Or(datetime.date, datetime.datetime),
+                    Optional("latest_release_version"): str,
+                    Optional("first_release_date"): Or(datetime.date, datetime.datetime),
+                    Optional("first_release_version"): str,
+                },  # type: ignore
+                # Emeritus GitHub projects
+                {
+                    **_LEGACY_OPTIONAL,
+                    "name": str,
+                    "gh_url": _legacy_check_url,
+                    "emeritus": True,
+                    Optional("url"): _legacy_check_url,
+                    Optional("release_count_zv"): int,
+                    Optional("first_release_date"): Or(datetime.date, datetime.datetime),
+                    Optional("first_release_version"): str,
+                    Optional("first_nonzv_release_date"): Or(datetime.date, datetime.datetime),
+                    Optional("first_nonzv_release_version"): str,
+                    Optional("last_zv_release_version"): str,
+                },  # type: ignore
+                # Non-GitHub projects
+                {
+                    **_LEGACY_OPTIONAL,
+                    "name": str,
+                    "url": _legacy_check_url,
+                    Optional("emeritus"): False,
+                    Optional("release_count"): int,
+                    Optional("star_count"): int,
+                    "first_release_date": Or(datetime.date, datetime.datetime),
+                    Optional("latest_release_date"): Or(datetime.date, datetime.datetime),
+                    Optional("latest_release_version"): str,
+                    Optional("first_release_version"): str,
+                },  # type: ignore
+                # Emeritus Non-GitHub projects
+                {
+                    **_LEGACY_OPTIONAL,
+                    "name": str,
+                    "url": _legacy_check_url,
+                    "emeritus": True,
+                    Optional("release_count_zv"): int,
+                    Optional("star_count"): int,
+                    "first_release_date": Or(datetime.date, datetime.datetime),
+                    Optional("first_release_version"): str,
+                    Optional("first_nonzv_release_date"): Or(datetime.date, datetime.datetime),
+                    Optional("first_nonzv_release_version"): str,
+                    Optional("last_zv_release_version"): str,
+                },  # type: ignore
+            )
+        ],
+    },
+)
+
+
+def _legacy_validate(data: dict) -> bool:
+    _LEGACY_SCHEMA.validate(data)
+    projects = data["projects"]
+    if redundant([p["name"].lower() for p in projects]):
+        return False
+    return not redundant(
+        [(p.get("gh_url") or p.get("url", "")).lower().rstrip("/") for p in projects]
+    )
+
+
+def bench_validate(args) -> None:
+    projects = synthetic_yaml_projects(args.projects)
+    for project in projects[:2000] + _mutated_projects(projects[:2000]):
+        try:
+            legacy_ok = _legacy_validate({"projects": [project]})
+        except Exception:
+            legacy_ok = False
+        assert legacy_ok == (not check_projects_yaml.validate({"projects": [project]})), project
+
+    sizes = [n for n in (args.projects // 100, args.projects // 10, args.projects) if n]
+    for size in sizes:
+        data = {"projects": projects[:size]}
+        assert not check_projects_yaml.validate(data)
+        direct = _timed(check_projects_yaml.validate, data)
+        # a pull request adding one project
+        incremental = _timed(check_projects_yaml.validate, data, {size - 1})
+        candidates = {"validate": direct, "validate, 1 changed": incremental}
+        name = f"projects.yaml validation, {size:,} projects"
+        if size > args.max_legacy:
+            print(name)
+            for label, elapsed in candidates.items():
+                print(f"  {label}: {elapsed * 1000:.1f} ms")
+            continue
+        baseline = _timed(_legacy_validate, data, repeat=1)
+        _report(name, baseline, candidates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    tags_parser = subparsers.add_parser("tags", help="Tag name parsing and classification.")
+    tags_parser.add_argument("--count", type=int, default=50_000)
+    tags_parser.set_defaults(func=bench_tags)
+
+    e2e_parser = subparsers.add_parser(
+        "e2e", help="gen_projects_json.py end to end against tools/fake_gh_api.py."
+    )
+    e2e_parser.add_argument("--projects", type=int, nargs="+", default=[200, 2000, 20000])
+    e2e_parser.add_argument("--workers", type=int, default=8)
+    e2e_parser.add_argument("--latency", type=float, default=0.0, help="Seconds per fake API response.")
+    e2e_parser.add_argument("--seed", type=int, default=0)
+    e2e_parser.add_argument("--warm", action="store_true", help="Also time a rerun with a warm cache.")
+    e2e_parser.set_defaults(func=bench_e2e)
+
+    tables_parser = subparsers.add_parser("tables", help="Project table HTML rendering.")
+    tables_parser.add_argument("--rows", type=int, default=10_000)
+    tables_parser.set_defaults(func=bench_tables)
+
+    yaml_parser = subparsers.add_parser("yaml", help="projects.yaml loading.")
+    yaml_parser.add_argument("--projects", type=int, default=5_000)
+    yaml_parser.set_defaults(func=bench_yaml)
+
+    validate_parser = subparsers.add_parser("validate", help="projects.yaml validation.")
+    validate_parser.add_argument("--projects", type=int, default=100_000)
+    validate_parser.add_argument(
+        "--max-legacy",
+        type=int,
+        default=10_000,
+        help="Only time the schema-based baseline up to this many projects.",
+    )
+    validate_parser.set_defaults(func=bench_validate)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,126 +1,342 @@
+import argparse
 import datetime
+import re
+import subprocess
 import sys
+from collections import Counter
 from pathlib import Path
+from typing import NamedTuple
 
 import yaml
-from boltons.iterutils import redundant
-from hyperlink import parse
-from schema import Optional, Or, Schema
 
+import projects_yaml
+from link_check import DEFAULT_TTL, LinkChecker
 
-def check_url(url_str: str):
-    url = parse(url_str)
-    assert url.scheme in ("http", "https")
-    return True
+URL_RE = re.compile(r"^https?://[^\s/?#]+[^\s]*$")
+# Fields probed by --check-links
+LINK_FIELDS = ("url", "gh_url", "repo_url", "wp_url")
 
 
-OPTIONAL = {
-    Optional("gh_url"): check_url,
-    Optional("repo_url"): str,
-    Optional("wp_url"): str,
-    Optional("emeritus"): bool,
-    Optional("reason"): str,
-    Optional("skip"): bool,
+def _is_str(value) -> bool:
+    return isinstance(value, str)
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_bool(value) -> bool:
+    return isinstance(value, bool)
+
+
+def _is_date(value) -> bool:
+    # datetimes are dates too
+    return isinstance(value, datetime.date)
+
+
+def _is_url(value) -> bool:
+    return isinstance(value, str) and URL_RE.match(value) is not None
+
+
+# Each project field's check, and what it expects, for error messages
+FIELDS = {
+    "name": (_is_str, "a string"),
+    "gh_url": (_is_url, "an http(s) URL"),
+    "url": (_is_url, "an http(s) URL"),  # Overrides gh_url for the hyperlink
+    "repo_url": (_is_str, "a string"),
+    "wp_url": (_is_str, "a string"),
+    "emeritus": (_is_bool, "true or false"),
+    "reason": (_is_str, "a string"),
+    "skip": (_is_bool, "true or false"),
+    "release_count": (_is_int, "an integer"),
+    "release_count_zv": (_is_int, "an integer"),
+    # star_count is manual-only for non-GitHub projects;
+    # GitHub projects get it fresh from the API every run.
+    "star_count": (_is_int, "an integer"),
+    "first_release_date": (_is_date, "a date"),
+    "first_release_version": (_is_str, "a string"),
+    "latest_release_date": (_is_date, "a date"),
+    "latest_release_version": (_is_str, "a string"),
+    "first_nonzv_release_date": (_is_date, "a date"),
+    "first_nonzv_release_version": (_is_str, "a string"),
+    "last_zv_release_version": (_is_str, "a string"),
 }
-IN_SCHEMA = Schema(
-    {
-        "projects": [
-            Or(
-                # GitHub projects
-                {
-                    **OPTIONAL,
-                    "name": str,
-                    "gh_url": check_url,
-                    Optional("emeritus"): False,
-                    Optional("url"): check_url,  # Overrides gh_url for the hyperlink
-                    Optional("release_count"): int,
-                    Optional("latest_release_date"): Or(
-                        datetime.date, datetime.datetime
-                    ),
-                    Optional("latest_release_version"): str,
-                    Optional("first_release_date"): Or(
-                        datetime.date, datetime.datetime
-                    ),
-                    Optional("first_release_version"): str,
-                },  # type: ignore
-                # Emeritus GitHub projects
-                {
-                    **OPTIONAL,
-                    "name": str,
-                    "gh_url": check_url,
-                    "emeritus": True,
-                    Optional("url"): check_url,  # Overrides gh_url for the hyperlink
-                    Optional("release_count_zv"): int,
-                    Optional("first_release_date"): Or(
-                        datetime.date, datetime.datetime
-                    ),
-                    Optional("first_release_version"): str,
-                    Optional("first_nonzv_release_date"): Or(
-                        datetime.date, datetime.datetime
-                    ),
-                    Optional("first_nonzv_release_version"): str,
-                    Optional("last_zv_release_version"): str,
-                },  # type: ignore
-                # Non-GitHub projects
-                {
-                    **OPTIONAL,
-                    "name": str,
-                    "url": check_url,
-                    Optional("emeritus"): False,
-                    Optional("release_count"): int,
-                    # star_count is manual-only for non-GitHub projects;
-                    # GitHub projects get it fresh from the API every run.
-                    Optional("star_count"): int,
-                    "first_release_date": Or(datetime.date, datetime.datetime),
-                    Optional("latest_release_date"): Or(
-                        datetime.date, datetime.datetime
-                    ),
-                    Optional("latest_release_version"): str,
-                    Optional("first_release_version"): str,
-                },  # type: ignore
-                # Emeritus Non-GitHub projects
-                {
-                    **OPTIONAL,
-                    "name": str,
-                    "url": check_url,
-                    "emeritus": True,
-                    Optional("release_count_zv"): int,
-                    # star_count is manual-only for non-GitHub projects;
-                    # GitHub projects get it fresh from the API every run.
-                    Optional("star_count"): int,
-                    "first_release_date": Or(datetime.date, datetime.datetime),
-                    Optional("first_release_version"): str,
-                    Optional("first_nonzv_release_date"): Or(
-                        datetime.date, datetime.datetime
-                    ),
-                    Optional("first_nonzv_release_version"): str,
-                    Optional("last_zv_release_version"): str,
-                },  # type: ignore
-            )
-        ],
-    },
-)
 
+_COMMON = {
+    "name",
+    "gh_url",
+    "url",
+    "repo_url",
+    "wp_url",
+    "emeritus",
+    "reason",
+    "skip",
+    "first_release_date",
+    "first_release_version",
+}
+_CURRENT = {"release_count", "latest_release_date", "latest_release_version"}
+_EMERITUS = {
+    "release_count_zv",
+    "first_nonzv_release_date",
+    "first_nonzv_release_version",
+    "last_zv_release_version",
+}
+
+
+class Rules(NamedTuple):
+    kind: str
+    required: tuple[str, ...]
+    allowed: frozenset[str]
+
+
+# Rule sets by (has gh_url, is emeritus)
+RULES = {
+    (True, False): Rules("GitHub projects", ("name", "gh_url"), frozenset(_COMMON | _CURRENT)),
+    (True, True): Rules(
+        "emeritus GitHub projects", ("name", "gh_url"), frozenset(_COMMON | _EMERITUS)
+    ),
+    (False, False): Rules(
+        "non-GitHub projects",
+        ("name", "url", "first_release_date"),
+        frozenset(_COMMON | _CURRENT | {"star_count"}),
+    ),
+    (False, True): Rules(
+        "emeritus non-GitHub projects",
+        ("name", "url", "first_release_date"),
+        frozenset(_COMMON | _EMERITUS | {"star_count"}),
+    ),
+}
+
+
+class ProjectError(NamedTuple):
+    index: int | None  # of the project in the list, None for the whole file
+    field: str | None
+    message: str
+    duplicate_of: int | None = None  # index of the project first using a value
+
+
+def _index_keys(project: dict) -> tuple[str | None, str | None]:
+    """The name and URL of `project` as compared for duplicates."""
+    name = project.get("name")
+    url = project.get("gh_url") or project.get("url")
+    return (
+        name.lower() if isinstance(name, str) else None,
+        url.lower().rstrip("/") if isinstance(url, str) else None,
+    )
 
-def main():
-    projects_yaml_path = Path(__file__).parent.parent / "projects.yaml"
-    with projects_yaml_path.open() as f:
-        data = yaml.safe_load(f)
 
-    IN_SCHEMA.validate(data)
+def validate(data, changed: set[int] | None = None) -> list[ProjectError]:
+    """
+    Every problem with parsed projects.yaml `data`, in one pass over the
+    projects. Each project is checked against the rule set for its kind,
+    picked by whether it has a gh_url and is emeritus, and against the
+    names and URLs of the other projects.
+
+    With `changed`, a set of project indexes, only those projects are
+    checked, and the others only make up the index of names and URLs
+    that they mustn't duplicate.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("projects"), list):
+        return [ProjectError(None, None, "expected a mapping with a list of projects")]
+    errors = [
+        ProjectError(None, key, f"unexpected top-level key {key!r}")
+        for key in data
+        if key != "projects"
+    ]
 
     projects = data["projects"]
+    names, urls = {}, {}
+    if changed is None:
+        indexes = range(len(projects))
+    else:
+        indexes = sorted(changed)
+        for i, project in enumerate(projects):
+            if i not in changed and isinstance(project, dict):
+                name, url = _index_keys(project)
+                names.setdefault(name, i)
+                urls.setdefault(url, i)
 
-    dup_names = redundant([p["name"].lower() for p in projects])
-    if dup_names:
-        print(f"Found {len(dup_names)} project(s) with duplicate names: {dup_names}")
-        sys.exit(1)
+    for i in indexes:
+        project = projects[i]
+        if not isinstance(project, dict):
+            errors.append(ProjectError(i, None, "expected a mapping"))
+            continue
+        emeritus = project.get("emeritus", False)
+        rules = RULES["gh_url" in project, emeritus is True]
+        for field in rules.required:
+            if field not in project:
+                message = f"missing {field!r}, required for {rules.kind}"
+                errors.append(ProjectError(i, None, message))
+        for field, value in project.items():
+            if field not in rules.allowed:
+                if field in FIELDS:
+                    message = f"{field!r} isn't used for {rules.kind}"
+                else:
+                    message = f"unknown field {field!r}"
+                errors.append(ProjectError(i, field, message))
+                continue
+            check, expected = FIELDS[field]
+            if not check(value):
+                message = f"expected {field!r} to be {expected}, not {value!r}"
+                errors.append(ProjectError(i, field, message))
+
+        name, url = _index_keys(project)
+        if name is not None:
+            other = names.setdefault(name, i)
+            if other != i:
+                message = f"duplicate name {project['name']!r}"
+                errors.append(ProjectError(i, "name", message, other))
+        if url is not None:
+            other = urls.setdefault(url, i)
+            if other != i:
+                errors.append(ProjectError(i, None, f"duplicate url {url!r}", other))
+    return errors
+
+
+def changed_projects(data, old_data) -> set[int]:
+    """
+    Indexes of the projects in parsed projects.yaml `data` that aren't
+    in `old_data`, the file at an earlier revision, exactly as they were.
+    Moving a project doesn't change it, but each copy of a project beyond
+    as many as there were before does, so a pasted duplicate is checked.
+    """
+    projects = data["projects"]
+    old_projects = old_data.get("projects") if isinstance(old_data, dict) else None
+    if not isinstance(old_projects, list):
+        return set(range(len(projects)))
+    # parsed YAML is plain data, and keeps the file's key order
+    old_counts = Counter(repr(project) for project in old_projects)
+    changed = set()
+    for i, project in enumerate(projects):
+        key = repr(project)
+        if old_counts[key] > 0:
+            old_counts[key] -= 1
+        else:
+            changed.add(i)
+    return changed
+
+
+def read_revision(path: Path, ref: str) -> bytes:
+    """The contents of `path` at git revision `ref`."""
+    cmd = ["git", "show", f"{ref}:./{path.name}"]
+    return subprocess.run(cmd, cwd=path.parent, capture_output=True, check=True).stdout
+
+
+def check_links(data, checker: LinkChecker, changed: set[int] | None = None) -> list[ProjectError]:
+    """Broken links among the LINK_FIELDS of the projects in parsed
+    projects.yaml `data`, or only of the `changed` ones."""
+    projects = data["projects"]
+    links = []
+    for i in range(len(projects)) if changed is None else sorted(changed):
+        if not isinstance(projects[i], dict):
+            continue
+        for field in LINK_FIELDS:
+            url = projects[i].get(field)
+            if _is_url(url):
+                links.append((i, field, url))
+
+    results = checker.check(url for _, _, url in links)
+    cached = sum(1 for result in results.values() if result.cached)
+    print(f"Checked {len(results) - cached} link(s), skipping {cached} that worked recently")
+    limited = sum(1 for result in results.values() if result.rate_limited)
+    if limited:
+        print(f"Couldn't check {limited} link(s), their hosts kept answering 429 Too Many Requests")
+    errors = []
+    for i, field, url in links:
+        result = results[url]
+        if not result.ok:
+            errors.append(ProjectError(i, field, f"broken link {url}: {result.error}"))
+    return errors
 
-    dup_urls = redundant(
-        [(p.get("gh_url") or p.get("url", "")).lower().rstrip("/") for p in projects]
+
+def project_lines(text: str | bytes) -> list[dict]:
+    """
+    Line numbers in projects.yaml `text`, per project, of the project
+    (under None) and each of its fields. Only computed for error messages,
+    since the validated data comes from the projects_yaml cache.
+    """
+    root = yaml.compose(text, Loader=projects_yaml.SafeLoader)
+    if not isinstance(root, yaml.MappingNode):
+        return []
+    for key_node, value_node in root.value:
+        if key_node.value == "projects" and isinstance(value_node, yaml.SequenceNode):
+            break
+    else:
+        return []
+    ret = []
+    for node in value_node.value:
+        lines = {None: node.start_mark.line + 1}
+        if isinstance(node, yaml.MappingNode):
+            for key_node, _ in node.value:
+                lines[key_node.value] = key_node.start_mark.line + 1
+        ret.append(lines)
+    return ret
+
+
+def format_errors(path: Path, errors: list[ProjectError], data) -> list[str]:
+    lines = project_lines(path.read_bytes())
+    projects = data.get("projects") if isinstance(data, dict) else None
+    ret = []
+    for error in errors:
+        line, where = None, ""
+        if error.index is not None:
+            if error.index < len(lines):
+                fields = lines[error.index]
+                line = fields.get(error.field, fields[None])
+            project = projects[error.index]
+            if isinstance(project, dict) and isinstance(project.get("name"), str):
+                where = f"{project['name']}: "
+        message = f"{path.name}:{line or 1}: {where}{error.message}"
+        if error.duplicate_of is not None and error.duplicate_of < len(lines):
+            message += f", also used on line {lines[error.duplicate_of][None]}"
+        ret.append(message)
+    return ret
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate projects.yaml.")
+    parser.add_argument(
+        "--since",
+        metavar="REF",
+        help="Only validate the projects added or changed since git revision REF, e.g. the base branch of a pull request. Duplicate names and URLs are still checked against every project.",
     )
-    if dup_urls:
-        print(f"Found {len(dup_urls)} project(s) with duplicate urls: {dup_urls}")
+    parser.add_argument(
+        "--check-links",
+        action="store_true",
+        help="Also check that each project's links work, with concurrent HEAD requests. Links that worked are cached, and rechecked after --links-ttl hours.",
+    )
+    parser.add_argument(
+        "--links-ttl",
+        type=float,
+        default=DEFAULT_TTL / 3600,
+        help="Hours before a working link is checked again. Defaults to a week.",
+    )
+    args = parser.parse_args()
+
+    path = projects_yaml.PROJECTS_YAML_PATH
+    data = projects_yaml.load(path)
+
+    changed = None
+    if args.since and isinstance(data, dict) and isinstance(data.get("projects"), list):
+        try:
+            old_data = projects_yaml.parse(read_revision(path, args.since))
+        except subprocess.CalledProcessError as e:
+            print(f"Couldn't read {path.name} at {args.since}: {e.stderr.decode().strip()}")
+        except yaml.YAMLError as e:
+            print(f"Couldn't parse {path.name} at {args.since}: {e}")
+        else:
+            changed = changed_projects(data, old_data)
+            print(f"Validating {len(changed)} project(s) added or changed since {args.since}")
+        if changed is None:
+            print("Validating every project")
+
+    errors = validate(data, changed)
+    if args.check_links and isinstance(data, dict) and isinstance(data.get("projects"), list):
+        errors += check_links(data, LinkChecker(ttl=args.links_ttl * 3600), changed)
+    if errors:
+        for message in format_errors(path, errors, data):
+            print(message)
+        print(f"Found {len(errors)} problem(s) in {path.name}")
         sys.exit(1)
 
     print("projects.yaml validated successfully!")
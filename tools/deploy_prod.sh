@@ -77,6 +77,31 @@ swap_public() {  # $1 = absolute build dir; rename(2) is atomic for nginx
     mv -T "$PUBLIC.tmp" "$PUBLIC"
 }
 
+# Copies rendered site $1 to new build dir $2, hardlinking files with the
+# same content as at the same path in previous build $3 (if any) instead of
+# copying them; most files, like the theme assets, don't change between
+# builds. Builds are never modified after they're made, so sharing inodes
+# between them is safe. stdout: "<linked> <copied>" file counts.
+snapshot() {
+    local src=$1 dest=$2 prev=${3:-} path linked=0 copied=0
+    mkdir "$dest" || return 1
+    while IFS= read -r -d '' path; do
+        if [[ -d "$src/$path" && ! -L "$src/$path" ]]; then
+            mkdir "$dest/$path" || return 1
+        elif [[ -n "$prev" && -f "$src/$path" && ! -L "$src/$path" \
+                && -f "$prev/$path" && ! -L "$prev/$path" ]] \
+                && cmp -s "$src/$path" "$prev/$path"; then
+            ln "$prev/$path" "$dest/$path" || return 1
+            linked=$((linked + 1))
+        else
+            # changed and new files, and symlinks (e.g. uploads) as they are
+            cp -a "$src/$path" "$dest/$path" || return 1
+            copied=$((copied + 1))
+        fi
+    done < <(cd "$src" && find . -mindepth 1 -print0)
+    echo "$linked $copied"
+}
+
 case "${1:-}" in
 rollback)
     prev=$(cat "$PREV_FILE" 2>/dev/null) || die "no $PREV_FILE to roll back to"
@@ -120,7 +145,12 @@ fi
 
 build="$BUILDS/$(date -u +%Y%m%dT%H%M%S)-$sha"
 mkdir -p "$BUILDS"
-cp -a site "$build"
+prev_build=""
+[[ -d "$PUBLIC" ]] && prev_build=$(readlink -f "$PUBLIC")
+counts=$(snapshot "$SRC/site" "$build" "$prev_build") \
+    || { rm -rf "$build"; die "failed to snapshot site to $build"; }
+read -r linked copied <<<"$counts"
+log "snapshot: $linked file(s) unchanged from ${prev_build:-nothing} hardlinked, $copied copied"
 
 [[ -n "$current" ]] && echo "$current" > "$PREV_FILE"
 swap_public "$build"
@@ -0,0 +1,279 @@
+"""
+A local stand-in for the parts of the GitHub REST API that
+gen_projects_json.py uses: repositories, paginated /tags with Link
+headers, commits, ETag revalidation and rate limit headers. Fixtures are
+synthetic, and latency and error responses can be injected, so the real
+HTTP, pagination and retry paths can be tested and benchmarked offline.
+
+    python tools/fake_gh_api.py --projects 200 --write-yaml /tmp/projects.yaml
+    ZV_GH_API_URL=http://127.0.0.1:8765 python tools/gen_projects_json.py \
+        --projects-yaml /tmp/projects.yaml --output /tmp/projects.json
+"""
+
+import argparse
+import datetime
+import gzip
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import yaml
+
+DEFAULT_RATE_LIMIT = 5000
+RATE_LIMIT_WINDOW = 3600
+MAX_PER_PAGE = 100
+
+REPO_RE = re.compile(r"^/repos/(?P<repo>[^/]+/[^/]+)$")
+TAGS_RE = re.compile(r"^/repos/(?P<repo>[^/]+/[^/]+)/tags$")
+COMMIT_RE = re.compile(r"^/repos/(?P<repo>[^/]+/[^/]+)/commits/(?P<sha>[0-9a-f]+)$")
+
+
+def synthetic_repos(count: int, seed: int = 0, max_tags: int = 400) -> dict[str, dict]:
+    """
+    Fixtures for `count` repositories, keyed by "owner/name". Each has a
+    star count and a version-sorted tag list, newest first, mixing v-prefixed
+    and bare 0.x releases, some 1.x releases (emeritus projects), and CI noise
+    tags. Tag counts are skewed so a few repositories need many pages.
+    """
+    rng = random.Random(seed)
+    repos = {}
+    start = datetime.datetime(2010, 1, 1, tzinfo=datetime.timezone.utc)
+    for i in range(count):
+        full_name = f"fake-org-{i % 97}/project-{i}"
+        n_tags = min(max_tags, int(rng.paretovariate(1.2) * 8))
+        emeritus = rng.random() < 0.2
+        prefix = rng.choice(["v", "v", ""])
+        versions = []
+        major, minor, patch = 0, 0, 1
+        for _ in range(n_tags):
+            versions.append(f"{prefix}{major}.{minor}.{patch}")
+            if rng.random() < 0.7:
+                patch += 1
+            else:
+                minor, patch = minor + 1, 0
+            if emeritus and major == 0 and rng.random() < 0.05:
+                major, minor, patch = 1, 0, 0
+        tags, commits = [], {}
+        when = start + datetime.timedelta(days=rng.randrange(3000))
+        for name in versions:
+            when += datetime.timedelta(days=rng.randrange(1, 60))
+            sha = hashlib.sha1(f"{full_name}@{name}".encode()).hexdigest()
+            tags.append((name, sha))
+            commits[sha] = when.strftime("%Y-%m-%dT%H:%M:%SZ")
+        for n in range(rng.randrange(0, 3) * rng.randrange(0, 50)):
+            sha = hashlib.sha1(f"{full_name}@ci{n}".encode()).hexdigest()
+            tags.append((f"ciflow/trunk/{n}", sha))
+            commits[sha] = when.strftime("%Y-%m-%dT%H:%M:%SZ")
+        tags.reverse()
+        repos[full_name] = {"stars": rng.randrange(100, 200_000), "tags": tags, "commits": commits}
+    return repos
+
+
+def write_projects_yaml(repos: dict[str, dict], path: Path) -> None:
+    projects = [
+        {"name": full_name.split("/")[1], "gh_url": f"https://github.com/{full_name}"}
+        for full_name in repos
+    ]
+    with Path(path).open("w") as f:
+        yaml.safe_dump({"projects": projects}, f, sort_keys=False)
+
+
+class FakeGitHubAPI(ThreadingHTTPServer):
+    """
+    Threaded HTTP/1.1 server for `repos` fixtures. `latency` seconds are
+    added to every response, every `error_every`-th request (if set) fails
+    with `error_status`, and a core rate limit of `rate_limit` requests is
+    enforced, with 304 responses not counting against it like on GitHub.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        repos: dict[str, dict],
+        address: tuple[str, int] = ("127.0.0.1", 0),
+        latency: float = 0.0,
+        error_every: int = 0,
+        error_status: int = 502,
+        rate_limit: int = DEFAULT_RATE_LIMIT,
+    ):
+        super().__init__(address, _Handler)
+        self.repos = repos
+        self.latency = latency
+        self.error_every = error_every
+        self.error_status = error_status
+        self.rate_limit = rate_limit
+        self.rate_remaining = rate_limit
+        self.rate_reset = int(time.time()) + RATE_LIMIT_WINDOW
+        self.request_counts = Counter()
+        self._lock = threading.Lock()
+        self._served = 0
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGitHubAPI":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def _account(self, kind: str, counts_against_limit: bool) -> tuple[bool, bool]:
+        """Count a request; returns (inject_error, rate_limited)."""
+        with self._lock:
+            self._served += 1
+            self.request_counts[kind] += 1
+            self.request_counts["total"] += 1
+            if self.error_every and self._served % self.error_every == 0:
+                self.request_counts["injected_errors"] += 1
+                return True, False
+            if not counts_against_limit:
+                return False, False
+            if self.rate_remaining <= 0:
+                self.request_counts["rate_limited"] += 1
+                return False, True
+            self.rate_remaining -= 1
+            return False, False
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakeGitHubAPI
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status: int, data, headers: dict | None = None) -> None:
+        body = json.dumps(data).encode("utf-8") if data is not None else b""
+        headers = dict(headers or {})
+        if status == 200:
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            headers["ETag"] = etag
+            if self.headers.get("If-None-Match") == etag:
+                status, body = 304, b""
+        if body and "gzip" in (self.headers.get("Accept-Encoding") or ""):
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("x-ratelimit-limit", str(self.server.rate_limit))
+        self.send_header("x-ratelimit-remaining", str(max(self.server.rate_remaining, 0)))
+        self.send_header("x-ratelimit-reset", str(self.server.rate_reset))
+        self.send_header("x-ratelimit-resource", "core")
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self, path: str):
+        """Return (kind, handler args) for a path."""
+        for kind, regex in (("repo", REPO_RE), ("tags", TAGS_RE), ("commit", COMMIT_RE)):
+            match = regex.match(path)
+            if match:
+                return kind, match.groupdict()
+        return "unknown", {}
+
+    def do_GET(self):
+        parts = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(parts.query)
+        kind, params = self._route(parts.path)
+        # 304s are free on GitHub; fixtures never change, so any
+        # conditional request from a client with a cache gets one
+        conditional = "If-None-Match" in self.headers
+        inject_error, rate_limited = self.server._account(kind, not conditional)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if inject_error:
+            return self._send_json(self.server.error_status, {"message": "Server Error"})
+        if rate_limited:
+            return self._send_json(403, {"message": "API rate limit exceeded"})
+
+        repo = self.server.repos.get(params.get("repo"))
+        if repo is None:
+            return self._send_json(404, {"message": "Not Found"})
+        base = f"http://{self.headers.get('Host')}/repos/{params['repo']}"
+
+        if kind == "repo":
+            return self._send_json(200, {"full_name": params["repo"], "stargazers_count": repo["stars"]})
+        if kind == "commit":
+            date = repo["commits"].get(params["sha"])
+            if date is None:
+                return self._send_json(404, {"message": "Not Found"})
+            return self._send_json(
+                200,
+                {
+                    "sha": params["sha"],
+                    "commit": {"author": {"date": date}},
+                    "html_url": f"https://github.com/{params['repo']}/commit/{params['sha']}",
+                },
+            )
+
+        per_page = min(int(query.get("per_page", ["30"])[0]), MAX_PER_PAGE)
+        page = int(query.get("page", ["1"])[0])
+        tags = repo["tags"]
+        last_page = max(1, -(-len(tags) // per_page))
+        page_tags = tags[(page - 1) * per_page : page * per_page]
+        data = [
+            {"name": name, "commit": {"sha": sha, "url": f"{base}/commits/{sha}"}}
+            for name, sha in page_tags
+        ]
+        links = {}
+        if page < last_page:
+            links["next"] = page + 1
+            links["last"] = last_page
+        if page > 1:
+            links["prev"] = page - 1
+            links["first"] = 1
+        headers = {}
+        if links:
+            headers["Link"] = ", ".join(
+                f'<{base}/tags?per_page={per_page}&page={n}>; rel="{rel}"' for rel, n in links.items()
+            )
+        return self._send_json(200, data, headers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake GitHub API from synthetic fixtures.")
+    parser.add_argument("--projects", type=int, default=200, help="Number of synthetic repositories.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response.")
+    parser.add_argument("--error-every", type=int, default=0, help="Fail every Nth request.")
+    parser.add_argument("--rate-limit", type=int, default=DEFAULT_RATE_LIMIT)
+    parser.add_argument("--write-yaml", type=Path, help="Write a matching projects.yaml here.")
+    args = parser.parse_args()
+
+    repos = synthetic_repos(args.projects, seed=args.seed)
+    if args.write_yaml:
+        write_projects_yaml(repos, args.write_yaml)
+    server = FakeGitHubAPI(
+        repos,
+        address=("127.0.0.1", args.port),
+        latency=args.latency,
+        error_every=args.error_every,
+        rate_limit=args.rate_limit,
+    )
+    print(f"Serving {len(repos)} fake repositories at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(dict(server.request_counts))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,38 @@
 import argparse
 import base64
+import contextvars
 import datetime
+import hashlib
 import json
 import os
 import re
 import sys
+import threading
 import time
 import urllib.error
+import urllib.parse
 import urllib.request
+import zlib
+from collections import Counter, deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from http.client import HTTPMessage
+from itertools import islice
 from pathlib import Path
 from pprint import pprint
+from typing import NamedTuple
 
-import yaml
 from boltons.fileutils import atomic_save
 from boltons.urlutils import URL
 
+import projects_yaml
+from http_pool import ConnectionPool
+
 PROJECT_ROOT_PATH = Path(__file__).parent.parent
+# Overridable to run against a stand-in server, see tools/fake_gh_api.py
+GH_API_URL = os.getenv("ZV_GH_API_URL", "https://api.github.com").rstrip("/")
 VTAG_RE = re.compile(
     r"""
     ^
@@ -41,53 +58,688 @@ STRIP_PATTERNS = [
 ]
 
 
-def strip_prefix(tag_name: str) -> str:
-    """Strip any non-numeric prefix from the tag name."""
+SKIP_RE = re.compile("|".join(f"(?:{pattern})" for pattern in SKIP_PATTERNS))
+STRIP_RE = re.compile("|".join(f"(?:{pattern})" for pattern in STRIP_PATTERNS))
+_DIGIT_RE = re.compile(r"\d")
+_NON_DIGITS_RE = re.compile(r"\D+")
+
+# Distinct tag names remembered by parse_tag
+PARSED_TAG_CACHE_SIZE = 64 * 1024
+
+
+class ParsedTag(NamedTuple):
+    """Everything the release analysis derives from a tag name."""
+
+    version: str  # strip_prefix()
+    vtag: re.Match | None  # match_vtag()
+    key: tuple  # version_key()
+    pattern_prefix: str | None  # the tag's version pattern, None if skipped
+
+
+def _strip_prefix(tag_name: str) -> str:
     _, _, tag_name = tag_name.rpartition("/")
 
     if "-" in tag_name:
         _, _, version = tag_name.partition("-")
-        if re.search(r"^\d", version):
+        if _DIGIT_RE.match(version):
             return version
 
-    match = re.search(r"\d", tag_name)
+    match = _DIGIT_RE.search(tag_name)
     if match:
         return tag_name[match.start() :]
     return tag_name
 
 
+def _pattern_prefix(full_name: str) -> str | None:
+    _, _, tag_name = full_name.rpartition("/")
+
+    if SKIP_RE.search(full_name) or SKIP_RE.search(tag_name):
+        return None
+
+    if STRIP_RE.search(tag_name):
+        _, _, version = tag_name.partition("-")
+        if _DIGIT_RE.match(version):
+            tag_name = version
+
+    match = _DIGIT_RE.search(tag_name)
+    if not match:
+        return None
+    prefix = tag_name[: match.start()]
+    if prefix in ("v", "V"):
+        prefix = ""
+    return prefix
+
+
+@lru_cache(maxsize=PARSED_TAG_CACHE_SIZE)
+def parse_tag(tag_name: str) -> ParsedTag:
+    """Parse a tag name once; repeated names are served from an LRU cache."""
+    version = _strip_prefix(tag_name)
+    try:
+        key = tuple(
+            int(x) for x in _NON_DIGITS_RE.split(version) if x and x.isdigit()
+        )
+    except (TypeError, ValueError):
+        key = tuple()
+    return ParsedTag(version, VTAG_RE.match(version), key, _pattern_prefix(tag_name))
+
+
+def strip_prefix(tag_name: str) -> str:
+    """Strip any non-numeric prefix from the tag name."""
+    return parse_tag(tag_name).version
+
+
 def match_vtag(tag_name: str) -> re.Match | None:
     """Match version tags using a more general approach."""
-    tag_name = strip_prefix(tag_name)
-    return VTAG_RE.match(tag_name)
+    return parse_tag(tag_name).vtag
 
 
 def version_key(version: str) -> tuple:
     """Extract and convert version numbers to tuple for comparison."""
-    clean_version = strip_prefix(version)
-    try:
-        return tuple(
-            int(x) for x in re.split(r"\D+", clean_version) if x and x.isdigit()
-        )
-    except (TypeError, ValueError):
-        return tuple()
+    return parse_tag(version).key
 
 
 PER_PAGE = 100
 
+DEFAULT_CACHE_DIR = PROJECT_ROOT_PATH / ".cache" / "gh"
+HTTP_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+class HTTPCache:
+    """
+    On-disk cache of GitHub API responses, one JSON file per URL (page
+    included), revalidated with If-None-Match / If-Modified-Since. GitHub
+    doesn't count 304 responses against the rate limit. Least recently
+    used files are evicted once the cache grows past `max_bytes`.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = HTTP_CACHE_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(self, url: str) -> Path:
+        return self.path / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+    def get(self, url: str) -> dict | None:
+        entry_path = self._entry_path(url)
+        try:
+            with entry_path.open() as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("url") != url:
+            return None
+        return entry
+
+    def __contains__(self, url: str) -> bool:
+        return self._entry_path(url).exists()
+
+    def put(self, url: str, headers, body: bytes) -> None:
+        etag, last_modified = headers.get("etag"), headers.get("last-modified")
+        if not etag and not last_modified:
+            return
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "body": body.decode("utf-8"),
+        }
+        with atomic_save(str(self._entry_path(url)), text_mode=True) as f:
+            json.dump(entry, f)
+
+    def touch(self, url: str) -> None:
+        try:
+            os.utime(self._entry_path(url))
+        except OSError:
+            pass
+
+    def evict(self) -> int:
+        """Delete least recently used entries until the cache fits in
+        max_bytes, returning the number of entries removed."""
+        entries = []
+        for entry_path in self.path.glob("*.json"):
+            try:
+                stat = entry_path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, entry_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                entry_path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+
+# Configured by main(); None disables conditional requests.
+_http_cache: HTTPCache | None = None
+
+
+class ReplayMissing(Exception):
+    pass
+
+
+class ResponseRecorder:
+    """
+    Directory of GitHub API responses, one JSON file per request, keyed by
+    a hash of the method, URL and request body. In record mode every
+    successful response is saved as received; in replay mode requests are
+    only served from the directory, so a run needs no network or rate limit
+    budget, and a request that wasn't recorded raises ReplayMissing.
+    """
+
+    def __init__(self, path: Path, replay: bool = False):
+        self.path = Path(path)
+        self.replay = replay
+        if not replay:
+            self.path.mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(self, method: str, url: str, data: bytes | None) -> Path:
+        key = hashlib.sha256(f"{method} {url}\n".encode("utf-8") + (data or b""))
+        return self.path / f"{key.hexdigest()}.json"
+
+    def save(
+        self, method: str, url: str, headers, body: bytes, data: bytes | None = None
+    ) -> None:
+        entry = {
+            "method": method,
+            "url": url,
+            "headers": list(headers.items()),
+            "body": body.decode("utf-8"),
+        }
+        with atomic_save(str(self._entry_path(method, url, data)), text_mode=True) as f:
+            json.dump(entry, f)
+
+    def load(
+        self, method: str, url: str, data: bytes | None = None
+    ) -> tuple[bytes, HTTPMessage]:
+        try:
+            with self._entry_path(method, url, data).open() as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            raise ReplayMissing(f"no recorded response for {method} {url} in {self.path}")
+        headers = HTTPMessage()
+        for k, v in entry["headers"]:
+            headers[k] = v
+        return entry["body"].encode("utf-8"), headers
+
+
+# Configured by main(); None talks to the API without recording.
+_recorder: ResponseRecorder | None = None
+
+
+# Requests held back from the core rate limit budget
+RATE_LIMIT_RESERVE = 25
+# Most seconds between requests when pacing a budget too small for the
+# run through a window that resets within RATE_LIMIT_MAX_WAIT
+RATE_LIMIT_MAX_SPACING = 0.25
+# Longest we'll wait for a rate limit window to reset before deferring
+RATE_LIMIT_MAX_WAIT = 60
+
+
+class RateLimitExhausted(Exception):
+    pass
+
+
+class RateLimiter:
+    """
+    Tracks the GitHub core rate limit from the x-ratelimit-* headers of
+    every response and hands out request slots to all workers from one
+    shared budget. Requests go out unthrottled while the budget covers the
+    requests the run still expects to make. Otherwise, if the window resets
+    within RATE_LIMIT_MAX_WAIT, they are spread over it, never more than
+    RATE_LIMIT_MAX_SPACING apart; conditional requests, which cost nothing
+    when answered 304, are never spread. Once only the reserve is left,
+    acquire() waits out a short reset, or raises RateLimitExhausted
+    instead of stalling the run, and callers defer the remaining work.
+    """
+
+    def __init__(self, reserve: int = RATE_LIMIT_RESERVE):
+        self.reserve = reserve
+        self.remaining: int | None = None
+        self.reset_at: float | None = None
+        self.demand = 0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, headers) -> None:
+        if headers is None or headers.get("x-ratelimit-resource", "core") != "core":
+            return
+        try:
+            remaining = int(headers["x-ratelimit-remaining"])
+            reset_at = float(headers["x-ratelimit-reset"])
+        except (KeyError, TypeError, ValueError):
+            return
+        with self._lock:
+            if self.reset_at is not None and reset_at < self.reset_at:
+                return  # late response from an earlier window
+            if reset_at == self.reset_at and self.remaining is not None:
+                remaining = min(remaining, self.remaining)
+            self.remaining, self.reset_at = remaining, reset_at
+
+    def expect(self, requests: int) -> None:
+        """Add to the requests the rest of the run is expected to make, or
+        take them off again with a negative count."""
+        with self._lock:
+            self.demand = max(self.demand + requests, 0)
+
+    def refund(self) -> None:
+        """Give back the slot of a request the API didn't charge for, like
+        a conditional request answered 304 Not Modified."""
+        with self._lock:
+            if self.remaining is not None:
+                self.remaining += 1
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every worker for `seconds`, e.g. for a Retry-After."""
+        with self._lock:
+            self._next_slot = max(self._next_slot, time.time() + seconds)
+
+    def _budget(self, now: float) -> int | None:
+        if self.remaining is None or self.reset_at is None:
+            return None
+        if now >= self.reset_at:
+            self.remaining = None
+            return None
+        return self.remaining - self.reserve
+
+    def can_afford(self, requests: int) -> bool:
+        with self._lock:
+            budget = self._budget(time.time())
+        if budget is None or budget >= requests:
+            return True
+        return self.reset_at - time.time() <= RATE_LIMIT_MAX_WAIT
+
+    def acquire(self, conditional: bool = False) -> float:
+        """Wait for a request slot, returning the seconds waited. Pass
+        `conditional` for requests with If-None-Match/If-Modified-Since."""
+        with self._lock:
+            now = time.time()
+            budget = self._budget(now)
+            slot = max(now, self._next_slot)
+            if budget is not None:
+                if budget <= 0:
+                    if self.reset_at - now > RATE_LIMIT_MAX_WAIT:
+                        raise RateLimitExhausted(
+                            f"rate limit exhausted until {time.ctime(self.reset_at)}"
+                        )
+                    slot = max(slot, self.reset_at + 1)
+                    self.remaining = None
+                else:
+                    if (
+                        not conditional
+                        and budget < self.demand
+                        and self.reset_at - now <= RATE_LIMIT_MAX_WAIT
+                    ):
+                        spacing = min((self.reset_at - now) / budget, RATE_LIMIT_MAX_SPACING)
+                        slot = max(slot, self._next_slot + spacing)
+                    self.remaining -= 1
+            self._next_slot = slot
+        wait = slot - time.time()
+        if wait > 0:
+            time.sleep(wait)
+            return wait
+        return 0.0
+
+
+# Number of projects listed in the run report summary
+SLOWEST_PROJECTS = 20
+# Project whose entry is being fetched, for attributing requests to it
+_current_project: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "_current_project", default=None
+)
+
+
+def _endpoint_kind(url: str) -> str:
+    path = urllib.parse.urlsplit(url).path
+    if path.endswith("/graphql"):
+        return "graphql"
+    if "/commits/" in path:
+        return "commit"
+    if path.endswith("/tags"):
+        return "tags"
+    if "/repos/" in path:
+        return "repo"
+    return "other"
+
+
+def _new_project_stats() -> dict:
+    return {
+        "seconds": 0.0,
+        "requests": 0,
+        "bytes": 0,
+        "retries": 0,
+        "wait_seconds": 0.0,
+        "cache_hits": 0,
+    }
+
+
+class RunStats:
+    """
+    Thread-safe counters for one run: requests, response body bytes as
+    transferred and retries by endpoint kind, rate limit waits and cache
+    hits, plus the same figures and the wall time of each project. Requests
+    made while a project is being fetched are attributed to it, including
+    those made from the page fetch threads.
+    """
+
+    def __init__(self):
+        self.started = datetime.datetime.now(datetime.timezone.utc)
+        self.requests = Counter()
+        self.bytes = Counter()
+        self.retries = Counter()
+        self.cache_hits = Counter()
+        self.wait_count = 0
+        self.wait_seconds = 0.0  # summed over the workers that waited
+        self._wait_spans: list[tuple[float, float]] = []
+        self.projects: dict[str, dict] = {}
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def _project_stats(self) -> dict | None:
+        # call with the lock held
+        name = _current_project.get()
+        if name is None:
+            return None
+        return self.projects.setdefault(name, _new_project_stats())
+
+    @contextmanager
+    def project(self, name: str):
+        """Time a project's fetch and attribute its requests to it."""
+        token = _current_project.set(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._project_stats()["seconds"] += elapsed
+            _current_project.reset(token)
+
+    def record_request(self, url: str) -> None:
+        with self._lock:
+            self.requests[_endpoint_kind(url)] += 1
+            proj = self._project_stats()
+            if proj is not None:
+                proj["requests"] += 1
+
+    def record_bytes(self, url: str, nbytes: int) -> None:
+        with self._lock:
+            self.bytes[_endpoint_kind(url)] += nbytes
+            proj = self._project_stats()
+            if proj is not None:
+                proj["bytes"] += nbytes
+
+    def record_retry(self, url: str) -> None:
+        with self._lock:
+            self.retries[_endpoint_kind(url)] += 1
+            proj = self._project_stats()
+            if proj is not None:
+                proj["retries"] += 1
+
+    def record_wait(self, seconds: float) -> None:
+        """Count a wait of `seconds` that just ended."""
+        end = time.perf_counter()
+        with self._lock:
+            self.wait_count += 1
+            self.wait_seconds += seconds
+            self._wait_spans.append((end - seconds, end))
+            proj = self._project_stats()
+            if proj is not None:
+                proj["wait_seconds"] += seconds
+
+    def record_cache_hit(self, kind: str) -> None:
+        """Count a request saved by a cache: "http" for a 304
+        revalidation, "commit" for a release date from the commit cache."""
+        with self._lock:
+            self.cache_hits[kind] += 1
+            proj = self._project_stats()
+            if proj is not None:
+                proj["cache_hits"] += 1
+
+    def _wall_wait_seconds(self) -> float:
+        # call with the lock held; time any worker was waiting, once
+        total, covered_to = 0.0, float("-inf")
+        for start, end in sorted(self._wait_spans):
+            if end > covered_to:
+                total += end - max(start, covered_to)
+                covered_to = end
+        return total
+
+    def report(self, slowest: int = SLOWEST_PROJECTS) -> dict:
+        with self._lock:
+            projects = {name: dict(stats) for name, stats in self.projects.items()}
+            report = {
+                "started": self.started.isoformat(),
+                "duration": time.perf_counter() - self._start,
+                "requests": {"total": sum(self.requests.values()), **self.requests},
+                "bytes": {"total": sum(self.bytes.values()), **self.bytes},
+                "retries": {"total": sum(self.retries.values()), **self.retries},
+                "rate_limit_waits": {
+                    "count": self.wait_count,
+                    "wall_seconds": self._wall_wait_seconds(),
+                    "worker_seconds": self.wait_seconds,
+                },
+                "cache_hits": dict(self.cache_hits),
+            }
+        ranked = sorted(projects, key=lambda name: projects[name]["seconds"], reverse=True)
+        report["slowest_projects"] = [
+            {"name": name, **projects[name]} for name in ranked[:slowest]
+        ]
+        report["projects"] = projects
+        return report
+
+
+# Configured by main(); None disables pacing and deferral.
+_rate_limiter: RateLimiter | None = None
+# Configured by main(); None opens a new connection per request via urllib.
+_http_pool: ConnectionPool | None = None
+# Configured by main(); None skips collecting the run report.
+_run_stats: RunStats | None = None
+
 
 def _gh_urlopen(req: urllib.request.Request, attempts: int = 3):
     """urlopen with retries on transient GitHub API errors (rate limits, 5xx)."""
+    conditional = req.has_header("If-none-match") or req.has_header("If-modified-since")
     for attempt in range(attempts):
+        if _rate_limiter is not None:
+            waited = _rate_limiter.acquire(conditional)
+            if waited and _run_stats is not None:
+                _run_stats.record_wait(waited)
+        if _run_stats is not None:
+            _run_stats.record_request(req.full_url)
         try:
-            return urllib.request.urlopen(req)
+            if _http_pool is not None:
+                resp = _http_pool.urlopen(req)
+            else:
+                resp = urllib.request.urlopen(req)
         except urllib.error.HTTPError as e:
+            if _rate_limiter is not None:
+                _rate_limiter.update(e.headers)
             if e.code in (403, 429, 500, 502, 503, 504) and attempt < attempts - 1:
-                wait = min(max(int(e.headers.get("retry-after") or 0), 2 ** (attempt + 2)), 120)
+                if _run_stats is not None:
+                    _run_stats.record_retry(req.full_url)
+                retry_after = int(e.headers.get("retry-after") or 0)
+                if (
+                    _rate_limiter is not None
+                    and e.code in (403, 429)
+                    and e.headers.get("x-ratelimit-remaining") == "0"
+                    and not retry_after
+                ):
+                    # primary limit: acquire() waits out a short reset, or defers
+                    continue
+                wait = min(max(retry_after, 2 ** (attempt + 2)), 120)
                 print(f" !! HTTP {e.code} from {req.full_url}, retrying in {wait}s")
-                time.sleep(wait)
+                if _rate_limiter is not None:
+                    _rate_limiter.pause(wait)
+                else:
+                    time.sleep(wait)
+                    if _run_stats is not None:
+                        _run_stats.record_wait(wait)
                 continue
             raise
+        if _rate_limiter is not None:
+            _rate_limiter.update(resp.info())
+        return resp
+
+
+def _wire_bytes(resp, body: bytes) -> int:
+    """Size of a response body as transferred. Pooled responses are
+    decompressed after counting; urllib doesn't ask for compression."""
+    return getattr(resp, "wire_bytes", len(body))
+
+
+def _gh_fetch(url: str, auth_header_val: str | None = None) -> tuple[bytes, HTTPMessage]:
+    """Fetch one GitHub API URL, returning the body and response headers.
+    When the response cache is enabled, a 304 serves the cached body."""
+    if _recorder is not None and _recorder.replay:
+        return _recorder.load("GET", url)
+
+    req = urllib.request.Request(url)
+    if auth_header_val:
+        req.add_header("Authorization", auth_header_val)
+
+    cached = _http_cache.get(url) if _http_cache is not None else None
+    if cached is not None:
+        if cached.get("etag"):
+            req.add_header("If-None-Match", cached["etag"])
+        if cached.get("last_modified"):
+            req.add_header("If-Modified-Since", cached["last_modified"])
+
+    try:
+        resp = _gh_urlopen(req)
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and _rate_limiter is not None:
+            _rate_limiter.refund()
+        if e.code == 304 and cached is not None:
+            _http_cache.touch(url)
+            if _run_stats is not None:
+                _run_stats.record_cache_hit("http")
+            body = cached["body"].encode("utf-8")
+            if _recorder is not None:
+                _recorder.save("GET", url, e.headers, body)
+            return body, e.headers
+        raise
+
+    body = resp.read()
+    if _run_stats is not None:
+        _run_stats.record_bytes(url, _wire_bytes(resp, body))
+    if _http_cache is not None:
+        _http_cache.put(url, resp.info(), body)
+    if _recorder is not None:
+        _recorder.save("GET", url, resp.info(), body)
+    return body, resp.info()
+
+
+# Pages of one listing fetched concurrently once the last page is known
+PAGE_WORKERS = 4
+LINK_RE = re.compile(r'<(?P<url>[^>]+)>;\s*rel="(?P<rel>[^"]+)"')
+
+
+def _parse_link_header(value: str | None) -> dict[str, str]:
+    """Map rel -> url from a Link header."""
+    if not value:
+        return {}
+    return {m.group("rel"): m.group("url") for m in LINK_RE.finditer(value)}
+
+
+def _link_page(headers, rel: str) -> int | None:
+    link_url = _parse_link_header(headers.get("link")).get(rel)
+    if not link_url:
+        return None
+    page = urllib.parse.parse_qs(urllib.parse.urlsplit(link_url).query).get("page")
+    try:
+        return int(page[0])
+    except (TypeError, ValueError):
+        return None
+
+
+# Configured by main(); long-lived page fetch threads keep their pooled
+# connections between listings. None uses a short-lived pool per listing.
+_page_executor: ThreadPoolExecutor | None = None
+
+
+def _ordered_map(fn, items, workers: int):
+    """Like ThreadPoolExecutor.map, yielding results in order, but with at
+    most `workers` calls in flight so results can't pile up in memory."""
+    items = iter(items)
+    executor = _page_executor or ThreadPoolExecutor(max_workers=workers)
+    try:
+        # each call runs in a copy of the caller's context, so the page
+        # fetch threads attribute their requests to the caller's project
+        pending = deque(
+            executor.submit(contextvars.copy_context().run, fn, item)
+            for item in islice(items, workers)
+        )
+        while pending:
+            result = pending.popleft().result()
+            for item in islice(items, 1):
+                pending.append(executor.submit(contextvars.copy_context().run, fn, item))
+            yield result
+    finally:
+        if executor is not _page_executor:
+            executor.shutdown()
+
+
+def _gh_auth_header(user: str | None, token: str | None) -> str | None:
+    if not (user and token):
+        return None
+    auth_str = f"{user}:{token}"
+    auth_bytes = auth_str.encode("ascii")
+    return f'Basic {base64.b64encode(auth_bytes).decode("ascii")}'
+
+
+def _gh_page_url(url: str, page: int = 1) -> str:
+    sep = "&" if "?" in url else "?"
+    paged_url = f"{url}{sep}per_page={PER_PAGE}"
+    if page > 1:
+        paged_url += f"&page={page}"
+    return paged_url
+
+
+def _iter_gh_pages(
+    url: str,
+    user: str | None = None,
+    token: str | None = None,
+    concurrent: bool = True,
+) -> Iterator[dict | list[dict]]:
+    """
+    Yield each page of a GitHub listing in order. When the Link header
+    gives the last page, the remaining pages are fetched concurrently
+    (unless `concurrent` is False, for callers that may stop early);
+    otherwise "next" links are followed, or without a Link header, pages
+    are fetched until a short one.
+    """
+    auth_header_val = _gh_auth_header(user, token)
+
+    def fetch_page(page: int):
+        body, headers = _gh_fetch(_gh_page_url(url, page), auth_header_val)
+        return json.loads(body), headers
+
+    res, headers = fetch_page(1)
+    yield res
+
+    if isinstance(res, list) and len(res) == PER_PAGE:
+        last_page = _link_page(headers, "last") if concurrent else None
+        if last_page is not None:
+            for res, headers in _ordered_map(fetch_page, range(2, last_page + 1), PAGE_WORKERS):
+                yield res
+        else:
+            page = 2
+            has_links = "link" in headers
+            while res and (_link_page(headers, "next") if has_links else len(res) == PER_PAGE):
+                res, headers = fetch_page(page)
+                yield res
+                page += 1
+
+    rate_rem = int(headers.get("x-ratelimit-remaining", "-1"))
+    print(f" (( {rate_rem} requests remaining")
 
 
 def _get_gh_json(
@@ -97,39 +749,182 @@ def _get_gh_json(
     Get paginated results from GitHub, possibly authorized based on command
     line arguments or environment variables.
     """
-    sep = "&" if "?" in url else "?"
-    req = urllib.request.Request(f"{url}{sep}per_page={PER_PAGE}")
-    if user and token:
-        auth_str = f"{user}:{token}"
-        auth_bytes = auth_str.encode("ascii")
-        auth_header_val = f'Basic {base64.b64encode(auth_bytes).decode("ascii")}'
-        req.add_header("Authorization", auth_header_val)
+    pages = _iter_gh_pages(url, user, token)
+    ret = next(pages)
+    if isinstance(ret, list):
+        for res in pages:
+            ret.extend(res)
+    return ret
 
-    resp = _gh_urlopen(req)
-    body = resp.read()
-    res = json.loads(body)
-    rate_rem = int(resp.info().get("x-ratelimit-remaining", "-1"))
-
-    if not isinstance(res, list) or len(res) < PER_PAGE:
-        print(f" (( {rate_rem} requests remaining")
-        return res
-
-    page = 2
-    ret = res
-    while len(res) == PER_PAGE:
-        paged_url = f"{url}{sep}per_page={PER_PAGE}&page={page}"
-        req = urllib.request.Request(paged_url)
-        if user and token:
-            req.add_header("Authorization", auth_header_val)
-        resp = _gh_urlopen(req)
-        body = resp.read()
-        res = json.loads(body)
-        ret.extend(res)
-        page += 1
 
-    rate_rem = int(resp.info().get("x-ratelimit-remaining", "-1"))
-    print(f" (( {rate_rem} requests remaining")
-    return ret
+# Days between full tag listings with --incremental-tags, to pick up tags
+# that sort into the already known part of the list, like backports
+TAG_FULL_LISTING_DAYS = 7
+
+
+class TagCache:
+    """
+    The last fetched tag list of each repository, as (name, commit URL)
+    pairs, for incremental tag fetching, with when the whole list was last
+    fetched.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(self, url: str) -> Path:
+        return self.path / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+    def get(self, url: str) -> tuple[list[dict], float] | None:
+        """The cached tags of `url`, and the time of its last full listing."""
+        try:
+            with self._entry_path(url).open() as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("url") != url:
+            return None
+        tags = [{"name": name, "commit": {"url": commit_url}} for name, commit_url in entry["tags"]]
+        # entries from before full listings were tracked are due one
+        return tags, entry.get("listed_at", 0.0)
+
+    def put(self, url: str, tags: list[dict], listed_at: float) -> None:
+        entry = {
+            "url": url,
+            "tags": [[t["name"], t["commit"]["url"]] for t in tags],
+            "listed_at": listed_at,
+        }
+        with atomic_save(str(self._entry_path(url)), text_mode=True) as f:
+            json.dump(entry, f)
+
+
+# Configured by main() for --incremental-tags; None fetches every page.
+_tag_cache: TagCache | None = None
+
+
+def _iter_gh_items(
+    url: str, user: str | None = None, token: str | None = None
+) -> Iterator[dict]:
+    """Yield the items of a paginated GitHub listing one page at a time."""
+    for page in _iter_gh_pages(url, user, token):
+        if not isinstance(page, list):
+            return
+        yield from page
+
+
+def _get_gh_tags(
+    url: str, user: str | None = None, token: str | None = None
+) -> Iterable[dict]:
+    """
+    Get a repository's tags, streamed page by page. With the incremental
+    tag cache, pages are fetched in order only until one holds nothing but
+    already known tags; the rest of the list is then taken from the cache.
+
+    /tags is sorted by name, not by date, so a new tag that sorts into the
+    unfetched part of the list, like a 1.2.9 backport after 2.0, is missed,
+    as is a tag deleted from it. Every TAG_FULL_LISTING_DAYS the whole list
+    is fetched again to catch up; unchanged pages are cheap 304s from the
+    response cache.
+    """
+    if _tag_cache is None:
+        return _iter_gh_items(url, user, token)
+
+    now = time.time()
+    cached = _tag_cache.get(url)
+    if cached is None or now - cached[1] > TAG_FULL_LISTING_DAYS * 24 * 3600:
+        tags = _get_gh_json(url, user, token)
+        tags = tags if isinstance(tags, list) else []
+        listed_at = now
+    else:
+        cached, listed_at = cached
+        known = {(t["name"], t["commit"]["url"]) for t in cached}
+        tags = []
+        for page in _iter_gh_pages(url, user, token, concurrent=False):
+            if not isinstance(page, list):
+                break
+            tags.extend(page)
+            if all((t["name"], t["commit"]["url"]) in known for t in page):
+                break
+        seen = {t["name"] for t in tags}
+        tags.extend(t for t in cached if t["name"] not in seen)
+    _tag_cache.put(url, tags, listed_at)
+    return tags
+
+
+RELEASE_PREFIXES = ("latest_release_", "first_release_", "first_nonzv_release_")
+
+
+class CommitCache:
+    """
+    Content-addressed store of commit SHA -> {date, link}. A commit never
+    changes once created, so only commits of new tags need a request.
+    Persisted as a single JSON file and seeded from the release fields
+    already in projects.json.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path
+        self._commits: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        if path is not None:
+            try:
+                with path.open() as f:
+                    self._commits.update(json.load(f))
+            except (OSError, ValueError):
+                pass
+
+    @staticmethod
+    def commit_sha(api_commit_url: str) -> str:
+        return api_commit_url.rstrip("/").rpartition("/")[2]
+
+    def __len__(self) -> int:
+        return len(self._commits)
+
+    def get(self, api_commit_url: str) -> dict | None:
+        return self._commits.get(self.commit_sha(api_commit_url))
+
+    def add(self, api_commit_url: str, date: str, link: str) -> None:
+        sha = self.commit_sha(api_commit_url)
+        with self._lock:
+            if sha not in self._commits:
+                self._commits[sha] = {"date": date, "link": link}
+                self._dirty = True
+
+    def seed(self, entries: list[dict], projects: list[dict]) -> None:
+        """Add the commits recorded in existing projects.json entries.
+        Release fields set manually in projects.yaml describe the project,
+        not the tag's commit, so those are skipped."""
+        manual = {p["name"]: p for p in projects}
+        for entry in entries:
+            project = manual.get(entry.get("name"), {})
+            for prefix in RELEASE_PREFIXES:
+                if f"{prefix}date" in project or f"{prefix}link" in project:
+                    continue
+                api_commit_url = entry.get(f"{prefix}api_commit_url")
+                date, link = entry.get(f"{prefix}date"), entry.get(f"{prefix}link")
+                if api_commit_url and date and link:
+                    self.add(api_commit_url, date, link)
+
+    def save(self) -> None:
+        if self.path is None or not self._dirty:
+            return
+        with self._lock:
+            # keep commits saved meanwhile by other runs, e.g. other shards
+            try:
+                with self.path.open() as f:
+                    for sha, commit in json.load(f).items():
+                        self._commits.setdefault(sha, commit)
+            except (OSError, ValueError):
+                pass
+            with atomic_save(str(self.path), text_mode=True) as f:
+                json.dump(self._commits, f, sort_keys=True)
+            self._dirty = False
+
+
+# Configured by main(); None means every commit is fetched.
+_commit_cache: CommitCache | None = None
 
 
 def _get_gh_rel_data(
@@ -141,10 +936,21 @@ def _get_gh_rel_data(
     if match_vtag(ret["tag"]):
         ret["version"] = strip_prefix(ret["tag"])
     ret["api_commit_url"] = rel_info["commit"]["url"]
+
+    cached = _commit_cache.get(ret["api_commit_url"]) if _commit_cache else None
+    if cached is not None:
+        if _run_stats is not None:
+            _run_stats.record_cache_hit("commit")
+        ret["date"] = cached["date"]
+        ret["link"] = cached["link"]
+        return ret
+
     rel_data = _get_gh_json(ret["api_commit_url"], user, token)
     if isinstance(rel_data, dict):
         ret["date"] = rel_data["commit"]["author"]["date"]
         ret["link"] = rel_data["html_url"]
+        if _commit_cache is not None:
+            _commit_cache.add(ret["api_commit_url"], ret["date"], ret["link"])
     return ret
 
 
@@ -152,27 +958,9 @@ def _find_dominant_version_pattern(tags: list[dict]) -> list[dict]:
     """Find the most common version tag pattern in a project's tags."""
     patterns = {}
     for tag in tags:
-        _, _, tag_name = tag["name"].rpartition("/")
-
-        if any(
-            re.search(pattern, tag["name"]) or re.search(pattern, tag_name)
-            for pattern in SKIP_PATTERNS
-        ):
-            continue
-
-        for pattern in STRIP_PATTERNS:
-            if re.search(pattern, tag_name):
-                prefix, _, version = tag_name.partition("-")
-                if re.search(r"^\d", version):
-                    tag_name = version
-                    break
-
-        match = re.search(r"\d", tag_name)
-        if not match:
+        prefix = parse_tag(tag["name"]).pattern_prefix
+        if prefix is None:
             continue
-        prefix = tag_name[: match.start()]
-        if prefix in ("v", "V"):
-            prefix = ""
         if prefix in patterns:
             patterns[prefix].append(tag)
         else:
@@ -183,86 +971,294 @@ def _find_dominant_version_pattern(tags: list[dict]) -> list[dict]:
     return max(patterns.values(), key=len)
 
 
+class TagRecord(NamedTuple):
+    """The parts of a version tag the release analysis needs."""
+
+    key: tuple
+    pos: int  # position in the tag listing, to break version_key ties
+    name: str
+    commit_url: str
+    is_zv: bool
+
+    def as_tag(self) -> dict:
+        return {"name": self.name, "commit": {"url": self.commit_url}}
+
+
+class TagGroup:
+    """
+    Running release statistics for the tags of one version pattern,
+    matching what sorting the group's version tags by version_key
+    (descending, stable) would give, without keeping the tags.
+    """
+
+    __slots__ = (
+        "count", "release_count", "release_count_zv", "latest", "first",
+        "first_release_match", "last_zv", "first_nonzv",
+    )
+
+    def __init__(self):
+        self.count = 0
+        self.release_count = 0
+        self.release_count_zv = 0
+        self.latest = self.first = self.first_release_match = None
+        self.last_zv = self.first_nonzv = None
+
+    def add(self, rec: TagRecord, matches_first_release: bool = False) -> None:
+        self.release_count += 1
+        # highest version, earliest listed on ties (sorted()[0])
+        if self.latest is None or rec.key > self.latest.key:
+            self.latest = rec
+        # lowest version, last listed on ties (sorted()[-1])
+        if self.first is None or rec.key <= self.first.key:
+            self.first = rec
+        if matches_first_release and (
+            self.first_release_match is None
+            or rec.key <= self.first_release_match.key
+        ):
+            self.first_release_match = rec
+        if rec.is_zv:
+            self.release_count_zv += 1
+            if self.last_zv is None or rec.key > self.last_zv.key:
+                self.last_zv = rec
+        # A 0.x major sorts below every other major, so the release sorted
+        # just above the last 0ver one is the lowest non-0ver release.
+        elif self.first_nonzv is None or rec.key <= self.first_nonzv.key:
+            self.first_nonzv = rec
+
+
+def summarize_tags(
+    tags: Iterable[dict], first_release_version: str | None = None
+) -> TagGroup | None:
+    """
+    Single pass over a (possibly streamed) tag listing: group tags by
+    version pattern like _find_dominant_version_pattern, and keep running
+    release statistics per group instead of the tags themselves. Returns
+    the dominant group, or None if no tag has a version pattern.
+    """
+    frv = None if first_release_version is None else str(first_release_version)
+    groups: dict[str, TagGroup] = {}
+    for pos, tag in enumerate(tags):
+        name = tag["name"]
+        parsed = parse_tag(name)
+        if parsed.pattern_prefix is None:
+            continue
+        group = groups.get(parsed.pattern_prefix)
+        if group is None:
+            group = groups[parsed.pattern_prefix] = TagGroup()
+        group.count += 1
+
+        if not parsed.vtag:
+            continue
+        rec = TagRecord(
+            parsed.key, pos, name, tag["commit"]["url"], parsed.vtag.group("major") == "0"
+        )
+        matches_frv = frv is not None and (name == frv or parsed.version == frv)
+        group.add(rec, matches_frv)
+
+    if not groups:
+        return None
+    return max(groups.values(), key=lambda g: g.count)
+
+
+GH_GRAPHQL_URL = f"{GH_API_URL}/graphql"
+# Repositories per GraphQL query; each alias pulls up to PER_PAGE tags.
+GRAPHQL_BATCH_SIZE = 20
+
+_GRAPHQL_COMMIT_FRAGMENT = """
+fragment CommitFields on Commit { oid authoredDate url }
+"""
+# Annotated tags point at a Tag object, which in turn points at the commit.
+_GRAPHQL_REPO_FIELDS = """
+  nameWithOwner
+  stargazerCount
+  refs(refPrefix: "refs/tags/", first: %(per_page)d, after: $c%(i)d,
+       orderBy: {field: ALPHABETICAL, direction: DESC}) {
+    pageInfo { hasNextPage endCursor }
+    nodes {
+      name
+      target {
+        ...CommitFields
+        ... on Tag { target { ...CommitFields ... on Tag { target { ...CommitFields } } } }
+      }
+    }
+  }
+"""
+
+
+def _gh_repo_path(gh_url: str) -> tuple[str, str]:
+    org, repo = URL(gh_url.rstrip("/")).path_parts[1:]
+    return org, repo
+
+
+def _gh_repo_api_url(gh_url: str) -> str:
+    api_url = URL(f"{GH_API_URL}/repos")
+    api_url.path_parts += _gh_repo_path(gh_url)
+    return api_url.to_text()
+
+
+def _gh_post_json(url: str, payload: dict, token: str) -> dict:
+    data = json.dumps(payload).encode("utf-8")
+    if _recorder is not None and _recorder.replay:
+        body, _ = _recorder.load("POST", url, data)
+        return json.loads(body)
+
+    req = urllib.request.Request(
+        url,
+        data=data,
+        headers={"Authorization": f"bearer {token}", "Content-Type": "application/json"},
+    )
+    resp = _gh_urlopen(req)
+    body = resp.read()
+    if _run_stats is not None:
+        _run_stats.record_bytes(url, _wire_bytes(resp, body))
+    if _recorder is not None:
+        _recorder.save("POST", url, resp.info(), body, data)
+    return json.loads(body)
+
+
+def _graphql_tag_commit(target: dict | None) -> dict | None:
+    while target:
+        if "oid" in target:
+            return target
+        target = target.get("target")
+    return None
+
+
+def _get_gh_graphql_repos(
+    gh_urls: list[str], user: str | None = None, token: str | None = None
+) -> dict[str, dict]:
+    """
+    Fetch star counts and tags for many repositories with batched, aliased
+    GraphQL queries. Returns {gh_url: {"star_count": int, "tags": [...]}}
+    with tags shaped like REST /tags results, so they go through the same
+    version tag analysis. Commit dates and links come back in the same
+    query and are added to the commit cache. Repositories GraphQL can't
+    resolve, or whose batch fails once retries or the rate limit budget
+    run out, are left out, and fall back to the REST backend.
+    """
+    pending: dict[str, str | None] = dict.fromkeys(gh_urls)  # url -> cursor
+    repos: dict[str, dict] = {}
+    while pending:
+        batch = list(pending.items())[:GRAPHQL_BATCH_SIZE]
+        var_defs, aliases, variables = [], [], {}
+        for i, (gh_url, cursor) in enumerate(batch):
+            owner, name = _gh_repo_path(gh_url)
+            var_defs.append(f"$o{i}: String!, $n{i}: String!, $c{i}: String")
+            variables.update({f"o{i}": owner, f"n{i}": name, f"c{i}": cursor})
+            fields = _GRAPHQL_REPO_FIELDS % {"per_page": PER_PAGE, "i": i}
+            aliases.append(f"r{i}: repository(owner: $o{i}, name: $n{i}) {{{fields}}}")
+        selections = "\n".join(aliases)
+        query = f"query({', '.join(var_defs)}) {{\n{selections}\n}}\n"
+        query += _GRAPHQL_COMMIT_FRAGMENT
+        try:
+            res = _gh_post_json(GH_GRAPHQL_URL, {"query": query, "variables": variables}, token)
+        except (RateLimitExhausted, urllib.error.HTTPError) as e:
+            print(f" !! GraphQL batch of {len(batch)} repos failed, falling back to REST: {e}")
+            for gh_url, _ in batch:
+                del pending[gh_url]
+                repos.pop(gh_url, None)  # drop any earlier pages of its tags
+            continue
+        for error in res.get("errors") or []:
+            print(f" !! GraphQL: {error.get('message')}")
+
+        data = res.get("data") or {}
+        for i, (gh_url, _) in enumerate(batch):
+            del pending[gh_url]
+            repo_data = data.get(f"r{i}")
+            if not repo_data:
+                repos.pop(gh_url, None)
+                continue
+            repo = repos.setdefault(
+                gh_url, {"star_count": repo_data["stargazerCount"], "tags": []}
+            )
+            api_repo_url = f"{GH_API_URL}/repos/{repo_data['nameWithOwner']}"
+            for node in repo_data["refs"]["nodes"]:
+                commit = _graphql_tag_commit(node.get("target"))
+                if commit is None:
+                    continue
+                api_commit_url = f"{api_repo_url}/commits/{commit['oid']}"
+                repo["tags"].append({"name": node["name"], "commit": {"url": api_commit_url}})
+                if _commit_cache is not None:
+                    _commit_cache.add(api_commit_url, commit["authoredDate"], commit["url"])
+            page_info = repo_data["refs"]["pageInfo"]
+            if page_info["hasNextPage"]:
+                pending[gh_url] = page_info["endCursor"]
+        print(f" (( GraphQL: {len(repos)} repos fetched, {len(pending)} pending")
+    return repos
+
+
 def get_gh_project_info(
-    info: dict, user: str | None = None, token: str | None = None
+    info: dict,
+    user: str | None = None,
+    token: str | None = None,
+    repo_data: dict | None = None,
 ) -> dict:
+    """Collect star and release information for a GitHub project. When
+    `repo_data` (from the GraphQL backend) is passed, the REST repo and
+    tag requests are skipped."""
     gh_info = {}
     url = info.get("gh_url")
     if url is None:
         return gh_info
 
-    org, repo = URL(url.rstrip("/")).path_parts[1:]
-    gh_url = URL("https://api.github.com/repos")
-    gh_url.path_parts += (org, repo)
-
-    project_data = _get_gh_json(gh_url.to_text(), user, token)
-    if isinstance(project_data, dict):
-        gh_info["star_count"] = project_data["stargazers_count"]
+    if repo_data is not None:
+        gh_info["star_count"] = repo_data["star_count"]
+        tags_data = repo_data["tags"]
+    else:
+        repo_url = _gh_repo_api_url(url)
+        project_data = _get_gh_json(repo_url, user, token)
+        if isinstance(project_data, dict):
+            gh_info["star_count"] = project_data["stargazers_count"]
 
-    gh_url.path_parts += ("tags",)
-    tags_data = _get_gh_json(gh_url.to_text(), user, token)
-    if isinstance(tags_data, dict):
-        tags_data = []
+        tags_data = _get_gh_tags(f"{repo_url}/tags", user, token)
 
-    main_tags = _find_dominant_version_pattern(tags_data)
-    vtags_data = [td for td in main_tags if match_vtag(td["name"])]
-    if not vtags_data:
+    summary = summarize_tags(tags_data, info.get("first_release_version"))
+    if summary is None or not summary.release_count:
         return gh_info
 
-    # GoodTurn: https://goodturn.ai/p/gtp_01kx93xqrcfqjtknbnbnnh8834
-    # /tags is name-version-sorted, not newest-first; sort before taking [0].
-    vtags_data.sort(key=lambda x: version_key(x["name"]), reverse=True)
+    gh_info["release_count"] = summary.release_count
 
-    gh_info["release_count"] = len(vtags_data)
-
-    latest_release = vtags_data[0]
-    latest_release_data = _get_gh_rel_data(latest_release, user, token)
+    # GoodTurn: https://goodturn.ai/p/gtp_01kx93xqrcfqjtknbnbnnh8834
+    # /tags is name-version-sorted, not newest-first; summarize_tags
+    # compares version_key rather than taking the first tag listed.
+    latest_release = summary.latest
+    latest_release_data = _get_gh_rel_data(latest_release.as_tag(), user, token)
     for k, v in latest_release_data.items():
         gh_info[f"latest_release_{k}"] = v
 
     first_release_version = info.get("first_release_version")
     first_release = None
     if first_release_version is None:
-        first_release = vtags_data[-1]
-    else:
-        frv = str(first_release_version)
-        matches = [
-            v for v in vtags_data
-            if v["name"] == frv or strip_prefix(v["name"]) == frv
-        ]
-        if matches:
-            first_release = matches[-1]
-        elif "first_release_date" not in info:
-            print(f" !! first_release_version {frv!r} matches no tag of {info['name']}")
+        first_release = summary.first
+    elif summary.first_release_match:
+        first_release = summary.first_release_match
+    elif "first_release_date" not in info:
+        print(
+            f" !! first_release_version {str(first_release_version)!r} matches no tag of {info['name']}"
+        )
     if first_release:
-        first_release_data = _get_gh_rel_data(first_release, user, token)
+        first_release_data = _get_gh_rel_data(first_release.as_tag(), user, token)
         for k, v in first_release_data.items():
             gh_info[f"first_release_{k}"] = v
 
-    zv_releases = []
-    for rel in vtags_data:
-        match = match_vtag(rel["name"])
-        if match and match.group("major") == "0":
-            zv_releases.append(rel)
-    gh_info["release_count_zv"] = len(zv_releases)
+    gh_info["release_count_zv"] = summary.release_count_zv
     print(
         f' .. {gh_info["release_count"]} releases, {gh_info["release_count_zv"]} 0ver'
     )
 
-    is_zerover = latest_release in zv_releases
+    is_zerover = latest_release.is_zv
 
     gh_info["is_zerover"] = is_zerover
 
     if is_zerover:
         return gh_info
 
-    if zv_releases:
-        last_zv_release = zv_releases[0]
-        gh_info["last_zv_release_version"] = last_zv_release["name"]
-        idx = vtags_data.index(last_zv_release)
-        if idx > 0:
-            first_nonzv_release = vtags_data[idx - 1]
-            first_nonzv_release_data = _get_gh_rel_data(first_nonzv_release, user, token)
+    if summary.last_zv:
+        gh_info["last_zv_release_version"] = summary.last_zv.name
+        if summary.first_nonzv:
+            first_nonzv_release_data = _get_gh_rel_data(
+                summary.first_nonzv.as_tag(), user, token
+            )
             for k, v in first_nonzv_release_data.items():
                 gh_info[f"first_nonzv_release_{k}"] = v
 
@@ -275,40 +1271,274 @@ def json_default(obj):
     raise TypeError(f"{obj} is not serializable")
 
 
+# Typical REST requests for a project nothing is cached for: repo, tags,
+# and up to three release commits
+REQUESTS_PER_PROJECT = 6
+
+
+def _expected_requests(project: dict, repo_data: dict | None = None) -> int:
+    """
+    Estimate the requests fetching `project` will be charged for, from
+    what the caches already hold: responses in the HTTP cache are
+    revalidated with free 304s, and release commits in the commit cache
+    aren't fetched. With cached tags (from the incremental tag cache or
+    the GraphQL prefetch), the release commits are looked up; without,
+    a project whose repo was fetched before is taken to have its release
+    commits cached, as the commit cache is seeded from projects.json.
+    """
+    if not project.get("gh_url") or project.get("skip"):
+        return 0
+
+    requests, tags = 0, None
+    if repo_data is not None:
+        tags = repo_data["tags"]
+    else:
+        repo_url = _gh_repo_api_url(project["gh_url"])
+        tags_url = f"{repo_url}/tags"
+        if _http_cache is None or _gh_page_url(repo_url) not in _http_cache:
+            return REQUESTS_PER_PROJECT
+        requests += _gh_page_url(tags_url) not in _http_cache
+        cached = _tag_cache.get(tags_url) if _tag_cache is not None else None
+        if cached is not None:
+            tags = cached[0]
+
+    if _commit_cache is None:
+        return requests + REQUESTS_PER_PROJECT - 2
+    if tags is None:
+        return requests
+    first_release_version = project.get("first_release_version")
+    summary = summarize_tags(tags, first_release_version)
+    if summary is None or not summary.release_count:
+        return requests
+    first = summary.first if first_release_version is None else summary.first_release_match
+    releases = (summary.latest, first, summary.first_nonzv)
+    commit_urls = {r.commit_url for r in releases if r is not None}
+    return requests + sum(_commit_cache.get(url) is None for url in commit_urls)
+
+
+def fetch_entry(
+    project: dict,
+    user: str | None = None,
+    token: str | None = None,
+    repo_data: dict | None = None,
+    requests: int | None = None,
+) -> dict | None:
+    """Build the projects.json entry for one projects.yaml project, or
+    None if the project is marked to be skipped. Raises
+    RateLimitExhausted if the rate limit budget can't cover the
+    `requests` the project is expected to cost, estimated if not given."""
+    print("Processing", project["name"])
+    info = dict(project)
+    if info.get("skip"):
+        return None
+
+    info["url"] = info.get("url", info.get("gh_url"))
+
+    if info.get("gh_url"):
+        if requests is None and _rate_limiter is not None:
+            requests = _expected_requests(info, repo_data)
+        if _rate_limiter is not None and not _rate_limiter.can_afford(requests):
+            raise RateLimitExhausted("not enough rate limit budget left")
+        gh_info = get_gh_project_info(info, user, token, repo_data)
+        # Only add new data, preserve any manual information
+        info.update({k: v for k, v in gh_info.items() if k not in info})
+
+    is_zerover = info.get("is_zerover")
+    if is_zerover is None:
+        is_zerover = info.get("emeritus")
+        if is_zerover is not None:
+            is_zerover = not is_zerover
+        else:
+            is_zerover = (
+                info.get("last_zv_release_version") is not None
+                or info.get("latest_release_version") is not None
+            )
+
+    info["is_zerover"] = is_zerover
+
+    return info
+
+
 def fetch_entries(
-    projects: list[dict], user: str | None = None, token: str | None = None
+    projects: list[dict],
+    user: str | None = None,
+    token: str | None = None,
+    workers: int = 1,
+    backend: str = "rest",
+) -> list[dict]:
+    """Fetch entries for all projects, with up to `workers` projects in
+    flight at once. Each entry only depends on its own project, so the
+    result is the same regardless of the number of workers.
+
+    With the "graphql" backend, stars and tags for all GitHub projects are
+    prefetched in batches first. Projects a failed batch left out are
+    fetched with REST, or deferred like any other.
+
+    Projects that would exceed the rate limit budget are deferred: they are
+    left out of the result, and projects are started in the given order,
+    so put the most important ones first.
+    """
+    prefetched = {}
+    if backend == "graphql":
+        gh_urls = [p["gh_url"] for p in projects if p.get("gh_url") and not p.get("skip")]
+        prefetched = _get_gh_graphql_repos(gh_urls, user, token)
+
+    estimates = [None] * len(projects)
+    if _rate_limiter is not None:
+        estimates = [_expected_requests(p, prefetched.get(p.get("gh_url"))) for p in projects]
+        _rate_limiter.expect(sum(estimates))
+
+    def _fetch(project, requests):
+        repo_data = prefetched.get(project.get("gh_url"))
+        try:
+            if _run_stats is None:
+                return fetch_entry(project, user, token, repo_data, requests)
+            with _run_stats.project(project["name"]):
+                return fetch_entry(project, user, token, repo_data, requests)
+        except RateLimitExhausted as e:
+            print(f" !! deferring {project['name']}: {e}")
+            return None
+        finally:
+            if _rate_limiter is not None:
+                _rate_limiter.expect(-requests)
+
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_fetch, projects, estimates))
+    else:
+        results = [_fetch(p, n) for p, n in zip(projects, estimates)]
+
+    entries = [info for info in results if info is not None]
+    return sorted(entries, key=lambda e: e["name"])
+
+
+DEFAULT_TTL_HOURS = 1.0
+RECENT_RELEASE_DAYS = 90
+_NEVER = datetime.datetime.min.replace(tzinfo=datetime.timezone.utc)
+
+
+def _parse_utc(value: str | None) -> datetime.datetime | None:
+    if not value:
+        return None
+    try:
+        dt = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return dt
+
+
+def _manual_fields_changed(project: dict, entry: dict) -> bool:
+    """Whether projects.yaml sets any value the current entry doesn't have."""
+    return any(
+        json.dumps(v, default=json_default) != json.dumps(entry.get(k), default=json_default)
+        for k, v in project.items()
+    )
+
+
+def select_stale_projects(
+    projects: list[dict],
+    cur_entries: list[dict],
+    now: datetime.datetime,
+    ttl: datetime.timedelta,
+    recent_ttl: datetime.timedelta | None = None,
+    max_refresh: int = 0,
+    default_fetched_at: datetime.datetime | None = None,
 ) -> list[dict]:
-    entries = []
+    """
+    Pick the projects whose entries need refetching: new projects, projects
+    edited in projects.yaml, and entries fetched longer than `ttl` ago.
+    Projects with a release in the last RECENT_RELEASE_DAYS use `recent_ttl`
+    instead, so active projects can be refreshed more often.
 
-    for p in projects:
-        print("Processing", p["name"])
-        info = dict(p)
-        if info.get("skip"):
+    With `max_refresh`, at most that many are returned: new and edited
+    projects first, then the least recently fetched.
+    """
+    cur_by_name = {e["name"]: e for e in cur_entries}
+    recent_cutoff = now - datetime.timedelta(days=RECENT_RELEASE_DAYS)
+    stale = []
+    for project in projects:
+        if project.get("skip"):
+            continue
+        entry = cur_by_name.get(project["name"])
+        if entry is None or _manual_fields_changed(project, entry):
+            stale.append((0, _NEVER, project))
             continue
+        fetched_at = _parse_utc(entry.get("fetched_at")) or default_fetched_at or _NEVER
+        project_ttl = ttl
+        latest_release_date = _parse_utc(entry.get("latest_release_date"))
+        if recent_ttl is not None and latest_release_date and latest_release_date > recent_cutoff:
+            project_ttl = recent_ttl
+        if now - fetched_at > project_ttl:
+            stale.append((1, fetched_at, project))
+
+    stale.sort(key=lambda s: s[:2])
+    if max_refresh > 0:
+        stale = stale[:max_refresh]
+    return [project for _, _, project in stale]
+
+
+def _parse_shard(value: str) -> tuple[int, int]:
+    index, _, count = value.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected I/N, e.g. 1/4, not {value!r}")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard index must be from 1 to {count}, not {index}")
+    return index, count
 
-        info["url"] = info.get("url", info.get("gh_url"))
 
-        if info.get("gh_url"):
-            gh_info = get_gh_project_info(info, user, token)
-            # Only add new data, preserve any manual information
-            info.update({k: v for k, v in gh_info.items() if k not in info})
+def in_shard(name: str, shard: tuple[int, int] | None) -> bool:
+    """Whether project `name` belongs to shard (I, N). Projects are split
+    by a stable hash of the name, so every job computes the same slices and
+    a project stays in its shard as others are added or removed."""
+    if shard is None:
+        return True
+    index, count = shard
+    return zlib.crc32(name.encode("utf-8")) % count == index - 1
 
-        is_zerover = info.get("is_zerover")
-        if is_zerover is None:
-            is_zerover = info.get("emeritus")
-            if is_zerover is not None:
-                is_zerover = not is_zerover
-            else:
-                is_zerover = (
-                    info.get("last_zv_release_version") is not None
-                    or info.get("latest_release_version") is not None
-                )
-        
-        info["is_zerover"] = is_zerover
 
-        entries.append(info)
+def shard_path(output: Path, shard: tuple[int, int]) -> Path:
+    """Where a --shard run writes its partial result, e.g.
+    projects.shard-1-of-4.json."""
+    index, count = shard
+    return output.with_name(f"{output.stem}.shard-{index}-of-{count}{output.suffix}")
 
-    return sorted(entries, key=lambda e: e["name"])
+
+def merge_shards(paths: list[Path]) -> tuple[list[dict], float]:
+    """
+    Combine the partial results of --shard runs into the sorted entries of
+    the full projects.json, and the generation time of the slowest shard.
+    Raises ValueError unless the files are exactly shards 1 to N of one N.
+    """
+    entries: dict[str, dict] = {}
+    indexes: set[int] = set()
+    counts: set[int] = set()
+    duration = 0.0
+    for path in paths:
+        with path.open() as f:
+            data = json.load(f)
+        if not data.get("shard"):
+            raise ValueError(f"{path} is not a shard file")
+        index, count = data["shard"]
+        if index in indexes:
+            raise ValueError(f"shard {index}/{count} given more than once")
+        indexes.add(index)
+        counts.add(count)
+        for entry in data["projects"]:
+            if entry["name"] in entries:
+                raise ValueError(f"{entry['name']} is in more than one shard")
+            entries[entry["name"]] = entry
+        duration = max(duration, data.get("gen_duration", 0.0))
+    if len(counts) != 1:
+        raise ValueError(f"shards from different splits: {sorted(counts)} shards")
+    (count,) = counts
+    missing = sorted(set(range(1, count + 1)) - indexes)
+    if missing:
+        raise ValueError(f"missing shard(s) {', '.join(f'{i}/{count}' for i in missing)}")
+    return sorted(entries.values(), key=lambda e: e["name"]), duration
 
 
 def parse_args():
@@ -316,6 +1546,21 @@ def parse_args():
         description="Generate or update project.json using projects.yaml."
     )
 
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=("fetch", "merge"),
+        default="fetch",
+        help="fetch (the default) updates the output from projects.yaml and GitHub;"
+        " merge combines the partial results of --shard runs into the output.",
+    )
+    parser.add_argument(
+        "shards",
+        nargs="*",
+        type=Path,
+        help="For merge: the partial results of every shard.",
+    )
+
     parser.add_argument(
         "-u",
         "--user",
@@ -341,8 +1586,106 @@ def parse_args():
         ],
         help='Flag to disable caching. Falls back to the "ZV_DISABLE_CACHING" environment variable.',
     )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=Path(os.getenv("ZV_CACHE_DIR") or DEFAULT_CACHE_DIR),
+        help='Directory for the persistent GitHub API response and commit caches. Falls back to the "ZV_CACHE_DIR" environment variable.',
+    )
+    parser.add_argument(
+        "--projects-yaml",
+        type=Path,
+        default=PROJECT_ROOT_PATH / "projects.yaml",
+        help="Project list to read. Defaults to projects.yaml in the repository root.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=None,
+        help="Generated data file to update. Defaults to projects.json in the repository root, except with --replay, which requires it.",
+    )
+    parser.add_argument(
+        "--report",
+        type=Path,
+        default=None,
+        help="Where to write the JSON run report with request counts and per-project"
+        " timings. Defaults to projects.report.json next to the output file.",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=int(os.getenv("ZV_WORKERS", "1")),
+        help='Number of projects to fetch concurrently. Falls back to the "ZV_WORKERS" environment variable, default 1 (serial).',
+    )
+
+    parser.add_argument(
+        "--incremental-tags",
+        action="store_true",
+        default=os.getenv("ZV_INCREMENTAL_TAGS", "false").lower() in ["true", "1", "yes"],
+        help='Only fetch tag pages until reaching tags seen on a previous run, reusing the cached rest of the list. The whole list is still fetched weekly. Falls back to the "ZV_INCREMENTAL_TAGS" environment variable.',
+    )
+    parser.add_argument(
+        "--ttl",
+        type=float,
+        default=float(os.getenv("ZV_TTL_HOURS", DEFAULT_TTL_HOURS)),
+        help='Hours before a project\'s data is considered stale and refetched. Falls back to the "ZV_TTL_HOURS" environment variable.',
+    )
+    parser.add_argument(
+        "--recent-ttl",
+        type=float,
+        default=None,
+        help=f"Hours before data of projects with a release in the last {RECENT_RELEASE_DAYS} days is considered stale. Defaults to --ttl.",
+    )
+    parser.add_argument(
+        "--max-refresh",
+        type=int,
+        default=int(os.getenv("ZV_MAX_REFRESH", "0")),
+        help='Refetch at most this many stale projects per run, least recently fetched first; 0 for no limit. Falls back to the "ZV_MAX_REFRESH" environment variable.',
+    )
+    parser.add_argument(
+        "--backend",
+        choices=("rest", "graphql"),
+        default=os.getenv("ZV_BACKEND", "rest"),
+        help='How to fetch stars and tags: one REST request per page per project, or batched GraphQL queries (requires a token). Falls back to the "ZV_BACKEND" environment variable.',
+    )
+    parser.add_argument(
+        "--shard",
+        type=_parse_shard,
+        default=None,
+        metavar="I/N",
+        help="Only process the I-th of N slices of projects.yaml, writing a partial result next to the output (e.g. projects.shard-1-of-4.json) for the merge command.",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Also write a minified copy of the output for loading at runtime, e.g. projects.min.json.",
+    )
+    recording = parser.add_mutually_exclusive_group()
+    recording.add_argument(
+        "--record",
+        type=Path,
+        default=None,
+        metavar="DIR",
+        help="Refetch every project, saving each GitHub API response to DIR for --replay.",
+    )
+    recording.add_argument(
+        "--replay",
+        type=Path,
+        default=None,
+        metavar="DIR",
+        help="Rebuild every project from responses saved by --record, without network access. Useful to check changes to the release analysis against the whole catalog.",
+    )
 
-    args = parser.parse_args()
+    # options may come between the command and the shard files
+    args = parser.parse_intermixed_args()
+    if args.command == "merge" and not args.shards:
+        parser.error("merge requires the shard files to combine")
+    if args.command == "merge" and args.shard:
+        parser.error("--shard only applies to fetch")
+    if args.command == "fetch" and args.shards:
+        parser.error("shard files are only accepted by merge")
     try:
         token_path = Path(args.token)
         if token_path.is_file():
@@ -351,63 +1694,282 @@ def parse_args():
         # args.token is a literal token, not a path; long tokens (e.g. current
         # Actions GITHUB_TOKEN) make os.stat raise ENAMETOOLONG on Linux.
         pass
+    if args.replay is not None and not args.replay.is_dir():
+        parser.error(f"no recorded responses at {args.replay}")
+    if args.output is None:
+        if args.replay is not None:
+            # a replay is for checking changes, not updating tracked data
+            parser.error("--replay requires --output, so projects.json isn't overwritten")
+        args.output = PROJECT_ROOT_PATH / "projects.json"
+    if args.backend == "graphql" and not args.token and args.replay is None:
+        parser.error("the graphql backend requires a GitHub token")
     return args
 
 
+def write_run_report(path: Path, report: dict) -> None:
+    """Save a RunStats report and print its summary."""
+    requests = report["requests"]
+    print(
+        f"{requests['total']} request(s) in {report['duration']:.1f}s:",
+        ", ".join(f"{n} {kind}" for kind, n in sorted(requests.items()) if kind != "total"),
+    )
+    print(
+        f"{report['bytes']['total']} bytes received, {report['retries']['total']} retries,",
+        f"{report['rate_limit_waits']['wall_seconds']:.1f}s waiting on rate limits",
+        f"({report['rate_limit_waits']['worker_seconds']:.1f} worker-seconds),",
+        f"cache hits: {report['cache_hits'] or 'none'}",
+    )
+    if report["slowest_projects"]:
+        print("Slowest projects:")
+        for proj in report["slowest_projects"][:10]:
+            print(f"  {proj['seconds']:7.2f}s  {proj['requests']:5d} req  {proj['name']}")
+    with atomic_save(str(path), text_mode=True) as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Run report written to {path}")
+
+
+def check_first_release_dates(entries: list[dict]) -> None:
+    """Exit with an error if any entry lacks the first release date the
+    site needs to render."""
+    missing = sorted(e["name"] for e in entries if not e.get("first_release_date"))
+    if missing:
+        print(f"!! {len(missing)} project(s) missing first_release_date; site render would fail: {missing}")
+        sys.exit(1)
+
+
+def write_projects_json(
+    path: Path,
+    entries: list[dict],
+    gen_duration: float,
+    compact_path: Path | None = None,
+    **extra,
+) -> None:
+    res = {
+        "projects": entries,
+        "gen_date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "gen_duration": gen_duration,
+        **extra,
+    }
+
+    with atomic_save(str(path), text_mode=True) as f:
+        json.dump(res, f, indent=2, sort_keys=True, default=json_default)
+    if compact_path is not None:
+        with atomic_save(str(compact_path), text_mode=True) as f:
+            json.dump(res, f, separators=(",", ":"), sort_keys=True, default=json_default)
+
+
+def meta_path(output: Path) -> Path:
+    """Where run metadata for `output` is kept, e.g. projects.meta.json."""
+    return output.with_suffix(".meta.json")
+
+
+def load_meta(path: Path) -> dict:
+    try:
+        with path.open() as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_projects(
+    path: Path,
+    entries: list[dict],
+    gen_duration: float,
+    compact_path: Path | None = None,
+    write_meta: bool = True,
+) -> bool:
+    """
+    Write `entries` to projects.json at `path`, unless they are the same as
+    the entries already there. Run metadata, which changes on every run,
+    goes to the meta file instead: the run's date and duration, and when
+    each entry was fetched. Without `write_meta`, as for a replay, the meta
+    file is left alone. Returns whether projects.json was written.
+    """
+    fetched_at = {e["name"]: e["fetched_at"] for e in entries if e.get("fetched_at")}
+    entries = [{k: v for k, v in e.items() if k != "fetched_at"} for e in entries]
+    # compare as the entries will read back
+    entries = json.loads(json.dumps(entries, default=json_default))
+    try:
+        with path.open() as f:
+            cur_data = json.load(f)
+        cur_entries = [
+            {k: v for k, v in e.items() if k != "fetched_at"} for e in cur_data["projects"]
+        ]
+    except (OSError, KeyError, ValueError):
+        cur_data, cur_entries = None, None
+
+    changed = entries != cur_entries
+    if changed:
+        write_projects_json(path, entries, gen_duration, compact_path)
+    elif compact_path is not None and not compact_path.exists():
+        with atomic_save(str(compact_path), text_mode=True) as f:
+            json.dump(cur_data, f, separators=(",", ":"), sort_keys=True)
+
+    if not write_meta:
+        return changed
+    meta = {
+        "gen_date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "gen_duration": gen_duration,
+        "changed": changed,
+        "fetched_at": fetched_at,
+    }
+    with atomic_save(str(meta_path(path)), text_mode=True) as f:
+        json.dump(meta, f, indent=2, sort_keys=True)
+    return changed
+
+
+def merge(args) -> None:
+    try:
+        entries, gen_duration = merge_shards(args.shards)
+    except (OSError, ValueError) as e:
+        print(f" !! can't merge shards: {e}")
+        sys.exit(1)
+    check_first_release_dates(entries)
+    print(f"Merged {len(entries)} project(s) from {len(args.shards)} shard(s)")
+    changed = save_projects(args.output, entries, gen_duration, _compact_path(args))
+    if not changed:
+        print(f"No changes to {args.output}")
+    sys.exit(0)
+
+
+def _compact_path(args) -> Path | None:
+    return args.output.with_suffix(".min.json") if args.compact else None
+
+
 def main():
     start_time = time.time()
 
     args = parse_args()
-
-    projects_yaml_path = Path(__file__).parent.parent / "projects.yaml"
-    with projects_yaml_path.open() as f:
-        projects = yaml.safe_load(f)["projects"]
+    if args.command == "merge":
+        return merge(args)
+
+    global _http_cache, _commit_cache, _tag_cache, _rate_limiter, _http_pool, _page_executor
+    global _run_stats, _recorder
+    _page_executor = ThreadPoolExecutor(max_workers=PAGE_WORKERS * max(args.workers, 1))
+    _run_stats = RunStats()
+    if args.replay is not None:
+        _recorder = ResponseRecorder(args.replay, replay=True)
+    else:
+        _rate_limiter = RateLimiter()
+        _http_pool = ConnectionPool()
+        if args.record is not None:
+            _recorder = ResponseRecorder(args.record)
+    # recordings must hold every response a full run makes, so record and
+    # replay runs refetch everything and skip the commit and tag caches
+    full_refresh = args.disable_caching or _recorder is not None
+    if not args.disable_caching and args.replay is None:
+        _http_cache = HTTPCache(args.cache_dir / "responses")
+    if not full_refresh:
+        _commit_cache = CommitCache(args.cache_dir / "commits.json")
+        if args.incremental_tags:
+            _tag_cache = TagCache(args.cache_dir / "tags")
+    elif args.backend == "graphql":
+        # GraphQL returns commit dates with the tags; keep them for this run
+        _commit_cache = CommitCache()
+
+    yaml_cache_dir = None if args.disable_caching else projects_yaml.DEFAULT_CACHE_DIR
+    projects = projects_yaml.load(args.projects_yaml, yaml_cache_dir)["projects"]
 
     if not projects:
         return
 
-    projects_json_path = Path(__file__).parent.parent / "projects.json"
+    projects_json_path = args.output
     try:
         with projects_json_path.open() as f:
             cur_data = json.load(f)
             cur_projects = cur_data["projects"]
-            cur_gen_date = datetime.datetime.fromisoformat(cur_data["gen_date"])
+            cur_gen_date = _parse_utc(cur_data["gen_date"])
     except (IOError, KeyError, ValueError):
         cur_projects = []
         cur_gen_date = None
-
-    if cur_gen_date:
-        fetch_outdated = (
-            datetime.datetime.now() - cur_gen_date.replace(tzinfo=None)
-        ) > datetime.timedelta(seconds=3600)
+    fetched_at = load_meta(meta_path(projects_json_path)).get("fetched_at", {})
+    cur_projects = [
+        {**c, "fetched_at": fetched_at[c["name"]]} if c["name"] in fetched_at else c
+        for c in cur_projects
+    ]
+
+    output_path = projects_json_path
+    if args.shard is not None:
+        # carry over from the full projects.json, write only this slice
+        output_path = shard_path(projects_json_path, args.shard)
+        projects = [p for p in projects if in_shard(p["name"], args.shard)]
+        cur_projects = [c for c in cur_projects if in_shard(c["name"], args.shard)]
+        print(f"Shard {args.shard[0]}/{args.shard[1]}: {len(projects)} project(s)")
+
+    if _commit_cache is not None:
+        _commit_cache.seed(cur_projects, projects)
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    if full_refresh:
+        stale_projects = [p for p in projects if not p.get("skip")]
     else:
-        fetch_outdated = True
-
-    cur_names = sorted([c["name"] for c in cur_projects])
-    new_names = sorted([n["name"] for n in projects])
+        stale_projects = select_stale_projects(
+            projects,
+            cur_projects,
+            now,
+            ttl=datetime.timedelta(hours=args.ttl),
+            recent_ttl=(
+                datetime.timedelta(hours=args.recent_ttl)
+                if args.recent_ttl is not None
+                else None
+            ),
+            max_refresh=args.max_refresh,
+            # entries without a recorded fetch date are as old as the file
+            default_fetched_at=cur_gen_date,
+        )
 
-    if fetch_outdated or cur_names != new_names or args.disable_caching:
-        entries = fetch_entries(projects, args.user, args.token)
-    else:
+    cur_names = {c["name"] for c in cur_projects}
+    new_names = {p["name"] for p in projects if not p.get("skip")}
+    # a shard always writes its slice, so the merge has every shard
+    if not stale_projects and cur_names == new_names and args.shard is None:
         print("Current data already up to date, exiting.")
         return
 
-    missing = sorted(e["name"] for e in entries if not e.get("first_release_date"))
-    if missing:
-        print(f"!! {len(missing)} project(s) missing first_release_date; site render would fail: {missing}")
-        sys.exit(1)
+    print(f"Refreshing {len(stale_projects)} of {len(new_names)} project(s)")
+    fetched = fetch_entries(
+        stale_projects, args.user, args.token, args.workers, args.backend
+    )
+    for entry in fetched:
+        entry["fetched_at"] = now.isoformat()
+
+    # deferred projects keep their current entries until a later run
+    fetched_names = {e["name"] for e in fetched}
+    deferred = {p["name"] for p in stale_projects if not p.get("skip")} - fetched_names
+    if deferred:
+        print(f" !! {len(deferred)} project(s) deferred to a later run: {sorted(deferred)}")
+    entries = [
+        c for c in cur_projects
+        if c["name"] in new_names and c["name"] not in fetched_names
+    ]
+    entries = sorted(entries + fetched, key=lambda e: e["name"])
+
+    _page_executor.shutdown()
+    if _http_pool is not None:
+        _http_pool.close()
+    if _http_cache is not None:
+        _http_cache.evict()
+    if _commit_cache is not None:
+        _commit_cache.save()
+
+    report = _run_stats.report()
+    report["refreshed"] = len(fetched)
+    report["deferred"] = sorted(deferred)
+    write_run_report(args.report or output_path.with_suffix(".report.json"), report)
+
+    if args.shard is None:
+        # shards are checked once merged
+        check_first_release_dates(entries)
 
     pprint(entries)
 
-    res = {
-        "projects": entries,
-        "gen_date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
-        "gen_duration": time.time() - start_time,
-    }
-
-    with atomic_save(str(projects_json_path), text_mode=True) as f:
-        json.dump(res, f, indent=2, sort_keys=True, default=json_default)
-
+    gen_duration = time.time() - start_time
+    if args.shard is not None:
+        # entries keep fetched_at until the merge moves it to the meta file
+        write_projects_json(output_path, entries, gen_duration, shard=list(args.shard))
+    elif not save_projects(
+        output_path, entries, gen_duration, _compact_path(args), write_meta=args.replay is None
+    ):
+        print(f"No changes to {output_path}")
     sys.exit(0)
 
 
@@ -0,0 +1,185 @@
+"""
+Keep-alive HTTP(S) connections for the tools that talk to GitHub and
+project sites. Stdlib only, like the rest of the tools.
+
+Each thread keeps one persistent http.client connection per host, so
+workers never share a socket and repeated requests skip the TCP and TLS
+handshakes. Responses are requested gzip-encoded and decompressed as
+they are read, counting the body bytes as they came over the wire.
+"""
+
+import http.client
+import io
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+import zlib
+from http.client import HTTPMessage
+
+DEFAULT_TIMEOUT = 30
+READ_CHUNK_SIZE = 64 * 1024
+MAX_REDIRECTS = 5
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+# Errors meaning a kept-alive connection was closed by the server while idle
+_STALE_CONN_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+
+class PooledResponse:
+    """A fully read response, with the parts of the urlopen() response
+    interface the tools use. `wire_bytes` is the size of the body as
+    transferred, before decompression."""
+
+    def __init__(
+        self,
+        url: str,
+        status: int,
+        reason: str,
+        headers: HTTPMessage,
+        body: bytes,
+        wire_bytes: int | None = None,
+    ):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self._body = body
+        self.wire_bytes = len(body) if wire_bytes is None else wire_bytes
+
+    def read(self) -> bytes:
+        return self._body
+
+    def info(self) -> HTTPMessage:
+        return self.headers
+
+    def getheader(self, name: str, default: str | None = None) -> str | None:
+        return self.headers.get(name, default)
+
+
+def _read_body(resp: http.client.HTTPResponse) -> tuple[bytes, int]:
+    """The decompressed body of `resp`, and its size on the wire."""
+    encoding = (resp.getheader("content-encoding") or "").lower()
+    decoder = None
+    if encoding in ("gzip", "x-gzip"):
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif encoding == "deflate":
+        decoder = zlib.decompressobj()
+    chunks = []
+    wire_bytes = 0
+    while True:
+        chunk = resp.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        wire_bytes += len(chunk)
+        chunks.append(decoder.decompress(chunk) if decoder else chunk)
+    if decoder:
+        chunks.append(decoder.flush())
+    return b"".join(chunks), wire_bytes
+
+
+class ConnectionPool:
+    """
+    Per-thread, per-host persistent connections. `urlopen()` takes a
+    urllib Request and behaves like urllib.request.urlopen: redirects
+    are followed, and error statuses (including 304) raise HTTPError.
+    """
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self.connections_opened = 0
+        self._local = threading.local()
+        self._all_conns: list[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def _conns(self) -> dict:
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+        return conns
+
+    def _get_conn(self, scheme: str, netloc: str) -> tuple[http.client.HTTPConnection, bool]:
+        """Return (connection, is_reused) for the current thread."""
+        conns = self._conns()
+        conn = conns.get((scheme, netloc))
+        if conn is not None:
+            return conn, True
+        conn_cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        conn = conn_cls(netloc, timeout=self.timeout)
+        conns[(scheme, netloc)] = conn
+        with self._lock:
+            self._all_conns.append(conn)
+            self.connections_opened += 1
+        return conn, False
+
+    def _drop_conn(self, scheme: str, netloc: str) -> None:
+        conn = self._conns().pop((scheme, netloc), None)
+        if conn is not None:
+            conn.close()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict | None = None,
+        body: bytes | None = None,
+    ) -> PooledResponse:
+        """Send one request, without following redirects or raising on
+        error statuses."""
+        parts = urllib.parse.urlsplit(url)
+        path = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+        headers = {"Accept-Encoding": "gzip", **(headers or {})}
+
+        for attempt in range(2):
+            conn, is_reused = self._get_conn(parts.scheme, parts.netloc)
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+                # HEAD responses have no body, but reading finishes them
+                # so the connection can be reused
+                data, wire_bytes = _read_body(resp)
+            except _STALE_CONN_ERRORS:
+                self._drop_conn(parts.scheme, parts.netloc)
+                if is_reused and attempt == 0:
+                    continue  # the server closed an idle connection; reconnect once
+                raise
+            except Exception:
+                self._drop_conn(parts.scheme, parts.netloc)
+                raise
+            if resp.will_close:
+                self._drop_conn(parts.scheme, parts.netloc)
+            return PooledResponse(url, resp.status, resp.reason, resp.headers, data, wire_bytes)
+
+    def urlopen(self, req: urllib.request.Request) -> PooledResponse:
+        method, url, body = req.get_method(), req.full_url, req.data
+        headers = dict(req.header_items())
+        for _ in range(MAX_REDIRECTS + 1):
+            resp = self.request(method, url, headers, body)
+            location = resp.getheader("location")
+            if resp.status not in REDIRECT_CODES or not location:
+                break
+            next_url = urllib.parse.urljoin(url, location)
+            drop = set()
+            if urllib.parse.urlsplit(next_url).netloc != urllib.parse.urlsplit(url).netloc:
+                drop.add("authorization")
+            if resp.status == 303 or (resp.status in (301, 302) and method == "POST"):
+                method, body = "GET", None
+                drop.update(("content-type", "content-length"))
+            headers = {k: v for k, v in headers.items() if k.lower() not in drop}
+            url = next_url
+        if resp.status >= 300:
+            raise urllib.error.HTTPError(
+                url, resp.status, resp.reason, resp.headers, io.BytesIO(resp.read())
+            )
+        return resp
+
+    def close(self) -> None:
+        with self._lock:
+            conns, self._all_conns = self._all_conns, []
+        for conn in conns:
+            conn.close()
@@ -0,0 +1,219 @@
+"""
+Checks that project links still resolve, for check_projects_yaml.py's
+--check-links mode.
+
+URLs are probed concurrently with HEAD requests over http_pool's
+keep-alive connections, with at most a few requests in flight to any one
+host, spaced out so no site sees a burst. Links are probed in turn by
+host, so the workers aren't all queued on one busy host, and a host
+answering 429 Too Many Requests is left alone for its Retry-After before
+the link is retried. Working links are cached for a TTL, so repeat runs
+only probe new and stale links, and any that were broken last time.
+"""
+
+import email.utils
+import http.client
+import itertools
+import json
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+from boltons.fileutils import atomic_save
+
+from http_pool import ConnectionPool
+
+PROJECT_ROOT_PATH = Path(__file__).parent.parent
+DEFAULT_CACHE_PATH = PROJECT_ROOT_PATH / ".cache" / "links.json"
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_WORKERS = 16
+# Politeness limits, per host
+HOST_CONCURRENCY = 2
+HOST_DELAY = 0.25
+TIMEOUT = 15
+USER_AGENT = "zerover-link-check (+https://github.com/mahmoud/zerover)"
+# Statuses from servers that don't handle HEAD, so the link is retried with GET
+HEAD_UNSUPPORTED_STATUSES = (403, 405, 501)
+# Too Many Requests is retried after the response's Retry-After, or
+# RATE_LIMIT_WAIT seconds without one, and at most MAX_RETRY_AFTER.
+# A link still rate limited after that is reported as unchecked, not broken.
+RATE_LIMITED_STATUS = 429
+RATE_LIMIT_RETRIES = 2
+RATE_LIMIT_WAIT = 5
+MAX_RETRY_AFTER = 60
+
+
+class LinkResult(NamedTuple):
+    url: str
+    ok: bool
+    status: int | None  # of the final response, after redirects
+    error: str | None  # what's wrong with a broken link
+    cached: bool = False
+    rate_limited: bool = False  # not checked, but not reported broken either
+
+
+class HostThrottle:
+    """At most `concurrency` requests in flight per host, and `delay`
+    seconds between the starts of requests to the same host."""
+
+    def __init__(self, concurrency: int = HOST_CONCURRENCY, delay: float = HOST_DELAY):
+        self.concurrency = concurrency
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._slots: dict[str, threading.Semaphore] = {}
+        self._next_start: dict[str, float] = {}
+
+    def _slot(self, host: str) -> threading.Semaphore:
+        with self._lock:
+            slot = self._slots.get(host)
+            if slot is None:
+                slot = self._slots[host] = threading.BoundedSemaphore(self.concurrency)
+            return slot
+
+    def _wait_turn(self, host: str) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, now))
+            self._next_start[host] = start + self.delay
+        if start > now:
+            time.sleep(start - now)
+
+    def hold(self, host: str, seconds: float) -> None:
+        """Start no more requests to `host` for `seconds`."""
+        with self._lock:
+            start = time.monotonic() + seconds
+            self._next_start[host] = max(start, self._next_start.get(host, start))
+
+    def run(self, host: str, func, *args):
+        with self._slot(host):
+            self._wait_turn(host)
+            return func(*args)
+
+
+def _retry_after(headers) -> float:
+    """Seconds to wait from a Retry-After header, in seconds or as a date."""
+    value = (headers.get("retry-after") or "").strip() if headers else ""
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            seconds = RATE_LIMIT_WAIT
+    return min(max(seconds, 0), MAX_RETRY_AFTER)
+
+
+def interleave_by_host(urls: Iterable[str]) -> list[str]:
+    """`urls` reordered to take one from each host in turn, so that
+    concurrent workers spread over hosts instead of waiting on one."""
+    by_host: dict[str, list[str]] = {}
+    for url in urls:
+        by_host.setdefault(urllib.parse.urlsplit(url).netloc.lower(), []).append(url)
+    turns = itertools.zip_longest(*by_host.values())
+    return [url for turn in turns for url in turn if url is not None]
+
+
+class LinkChecker:
+    """
+    Probes links over a shared connection pool with `workers` threads. With
+    a `cache_path`, links found working are saved there with the time they
+    were checked, and not probed again for `ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        cache_path: Path | None = DEFAULT_CACHE_PATH,
+        ttl: float = DEFAULT_TTL,
+        workers: int = DEFAULT_WORKERS,
+        throttle: HostThrottle | None = None,
+        timeout: float = TIMEOUT,
+    ):
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.workers = workers
+        self.throttle = throttle or HostThrottle()
+        self.pool = ConnectionPool(timeout=timeout)
+        self._checked_at: dict[str, float] = {}
+        if cache_path is not None:
+            try:
+                with cache_path.open() as f:
+                    self._checked_at.update(json.load(f))
+            except (OSError, ValueError):
+                pass
+
+    def _fresh(self, url: str, now: float) -> bool:
+        checked_at = self._checked_at.get(url)
+        return checked_at is not None and now - checked_at < self.ttl
+
+    def _request(self, method: str, url: str) -> int:
+        req = urllib.request.Request(url, method=method, headers={"User-Agent": USER_AGENT})
+        return self.pool.urlopen(req).status
+
+    def _probe(self, host: str, url: str) -> int:
+        try:
+            return self.throttle.run(host, self._request, "HEAD", url)
+        except urllib.error.HTTPError as e:
+            if e.code not in HEAD_UNSUPPORTED_STATUSES:
+                raise
+        return self.throttle.run(host, self._request, "GET", url)
+
+    def probe(self, url: str) -> LinkResult:
+        host = urllib.parse.urlsplit(url).netloc.lower()
+        try:
+            for attempt in range(RATE_LIMIT_RETRIES + 1):
+                try:
+                    status = self._probe(host, url)
+                    break
+                except urllib.error.HTTPError as e:
+                    if e.code != RATE_LIMITED_STATUS:
+                        raise
+                    if attempt == RATE_LIMIT_RETRIES:
+                        return LinkResult(url, True, e.code, None, rate_limited=True)
+                    # every worker leaves the host alone until then
+                    self.throttle.hold(host, _retry_after(e.headers))
+        except urllib.error.HTTPError as e:
+            return LinkResult(url, False, e.code, f"{e.code} {e.reason}")
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            return LinkResult(url, False, None, str(e) or type(e).__name__)
+        return LinkResult(url, True, status, None)
+
+    def check(self, urls: Iterable[str]) -> dict[str, LinkResult]:
+        """Results for each of `urls`, probing those not cached as working."""
+        now = time.time()
+        results = {}
+        to_probe = []
+        for url in dict.fromkeys(urls):
+            if self._fresh(url, now):
+                results[url] = LinkResult(url, True, None, None, cached=True)
+            else:
+                to_probe.append(url)
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for result in executor.map(self.probe, interleave_by_host(to_probe)):
+                    results[result.url] = result
+                    if result.ok and not result.rate_limited:
+                        self._checked_at[result.url] = now
+                    elif not result.ok:
+                        self._checked_at.pop(result.url, None)
+        finally:
+            self.pool.close()
+            self.save()
+        return results
+
+    def save(self) -> None:
+        if self.cache_path is None:
+            return
+        now = time.time()
+        checked_at = {url: t for url, t in self._checked_at.items() if now - t < self.ttl}
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with atomic_save(str(self.cache_path), text_mode=True) as f:
+                json.dump(checked_at, f, indent=0, sort_keys=True)
+        except OSError as e:
+            print(f"failed to save link cache: {e!r}")
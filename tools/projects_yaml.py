@@ -0,0 +1,89 @@
+"""
+Loading projects.yaml for the tools, so check_projects_yaml.py and
+gen_projects_json.py share one parse.
+
+Parsing uses PyYAML's libyaml-backed CSafeLoader when PyYAML was built
+with it. The parsed data is also pickled to a cache, reused while the
+file's modification time and size are unchanged, or failing that, while
+its SHA-256 is (e.g. after a fresh checkout).
+"""
+
+import hashlib
+import os
+import pickle
+from pathlib import Path
+
+import yaml
+from boltons.fileutils import atomic_save
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+PROJECT_ROOT_PATH = Path(__file__).parent.parent
+PROJECTS_YAML_PATH = PROJECT_ROOT_PATH / "projects.yaml"
+DEFAULT_CACHE_DIR = Path(os.getenv("ZV_YAML_CACHE_DIR") or PROJECT_ROOT_PATH / ".cache" / "yaml")
+# Bump when cached data would differ from a fresh parse
+CACHE_VERSION = 1
+
+
+def parse(text: str | bytes):
+    return yaml.load(text, Loader=SafeLoader)
+
+
+def _cache_file(cache_dir: Path, path: Path) -> Path:
+    name = hashlib.sha256(str(path.resolve()).encode("utf-8")).hexdigest()[:16]
+    return cache_dir / f"{name}.pickle"
+
+
+def _read_cache(cache_file: Path) -> dict | None:
+    try:
+        with cache_file.open("rb") as f:
+            cached = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+        return None
+    if not isinstance(cached, dict) or cached.get("version") != _cache_version():
+        return None
+    return cached
+
+
+def _cache_version() -> tuple:
+    return (CACHE_VERSION, yaml.__version__, SafeLoader.__name__)
+
+
+def load(path: Path = PROJECTS_YAML_PATH, cache_dir: Path | None = DEFAULT_CACHE_DIR):
+    """
+    The parsed YAML file at `path`, from the cache in `cache_dir` if it is
+    current. With no `cache_dir`, the file is always parsed.
+    """
+    path = Path(path)
+    if cache_dir is None:
+        return parse(path.read_bytes())
+
+    cache_file = _cache_file(cache_dir, path)
+    cached = _read_cache(cache_file)
+    stat = path.stat()
+    if cached and (cached["mtime_ns"], cached["size"]) == (stat.st_mtime_ns, stat.st_size):
+        return cached["data"]
+
+    text = path.read_bytes()
+    sha256 = hashlib.sha256(text).hexdigest()
+    if cached and cached["sha256"] == sha256:
+        data = cached["data"]
+    else:
+        data = parse(text)
+    cached = {
+        "version": _cache_version(),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": sha256,
+        "data": data,
+    }
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        with atomic_save(str(cache_file)) as f:
+            pickle.dump(cached, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        print(f"failed to cache parsed {path.name}: {e!r}")
+    return data
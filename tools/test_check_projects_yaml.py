@@ -0,0 +1,196 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import check_projects_yaml
+import projects_yaml
+
+import datetime
+import subprocess
+import tempfile
+import unittest
+
+PROJECTS_YAML = """\
+projects:
+  - name: foo
+    gh_url: https://github.com/foo/foo
+    release_count: twelve
+  - name: bar
+    url: https://bar.example.com
+    homepage: https://bar.example.com
+  - name: Foo
+    gh_url: https://github.com/foo/other
+"""
+
+
+def _messages(data):
+    return [error.message for error in check_projects_yaml.validate(data)]
+
+
+class TestValidate(unittest.TestCase):
+    def test_valid_projects(self):
+        date = datetime.date(2015, 6, 1)
+        data = {
+            "projects": [
+                {"name": "a", "gh_url": "https://github.com/a/a", "reason": "Popular"},
+                {"name": "b", "gh_url": "https://github.com/b/b", "emeritus": True,
+                 "first_nonzv_release_date": date, "last_zv_release_version": "0.9"},
+                {"name": "c", "url": "https://c.example.com", "first_release_date": date,
+                 "star_count": 10, "release_count": 3},
+                {"name": "d", "url": "http://d.example.com", "emeritus": True,
+                 "first_release_date": datetime.datetime(2015, 6, 1, 12), "release_count_zv": 4},
+            ]
+        }
+        self.assertEqual(check_projects_yaml.validate(data), [])
+
+    def test_rules_by_kind(self):
+        self.assertEqual(
+            _messages({"projects": [{"name": "a", "url": "https://a.example.com"}]}),
+            ["missing 'first_release_date', required for non-GitHub projects"],
+        )
+        self.assertEqual(
+            _messages({"projects": [
+                {"name": "a", "gh_url": "https://github.com/a/a", "release_count_zv": 3},
+                {"name": "b", "gh_url": "https://github.com/b/b", "emeritus": True,
+                 "release_count": 3},
+                {"name": "c", "gh_url": "https://github.com/c/c", "star_count": 3},
+            ]}),
+            [
+                "'release_count_zv' isn't used for GitHub projects",
+                "'release_count' isn't used for emeritus GitHub projects",
+                "'star_count' isn't used for GitHub projects",
+            ],
+        )
+
+    def test_field_types(self):
+        messages = _messages({"projects": [{
+            "name": 1,
+            "gh_url": "ftp://github.com/a/a",
+            "emeritus": "yes",
+            "release_count": True,
+            "first_release_date": "2015-06-01",
+        }]})
+        self.assertEqual(
+            messages,
+            [
+                "expected 'name' to be a string, not 1",
+                "expected 'gh_url' to be an http(s) URL, not 'ftp://github.com/a/a'",
+                "expected 'emeritus' to be true or false, not 'yes'",
+                "expected 'release_count' to be an integer, not True",
+                "expected 'first_release_date' to be a date, not '2015-06-01'",
+            ],
+        )
+
+    def test_duplicates(self):
+        errors = check_projects_yaml.validate({"projects": [
+            {"name": "a", "gh_url": "https://github.com/a/a"},
+            {"name": "A", "gh_url": "https://github.com/other/a"},
+            {"name": "b", "gh_url": "https://GitHub.com/a/a/"},
+        ]})
+        self.assertEqual(
+            [(e.index, e.message, e.duplicate_of) for e in errors],
+            [
+                (1, "duplicate name 'A'", 0),
+                (2, "duplicate url 'https://github.com/a/a'", 0),
+            ],
+        )
+
+    def test_malformed_file(self):
+        self.assertEqual(
+            _messages({"project": []}), ["expected a mapping with a list of projects"]
+        )
+        self.assertEqual(
+            _messages({"projects": ["a"], "extra": 1}),
+            ["unexpected top-level key 'extra'", "expected a mapping"],
+        )
+
+
+class TestIncremental(unittest.TestCase):
+    def test_only_changed_projects_checked(self):
+        data = {"projects": [
+            {"name": "old", "gh_url": "https://github.com/old/old", "homepage": "x"},
+            {"name": "new", "gh_url": "https://github.com/new/new", "release_count": "3"},
+            {"name": "Later", "gh_url": "https://github.com/later/later"},
+            {"name": "later", "gh_url": "https://github.com/new/new/"},
+        ]}
+        errors = check_projects_yaml.validate(data, changed={1, 3})
+        self.assertEqual(
+            [(e.index, e.message, e.duplicate_of) for e in errors],
+            [
+                (1, "expected 'release_count' to be an integer, not '3'", None),
+                (3, "duplicate name 'later'", 2),
+                (3, "duplicate url 'https://github.com/new/new'", 1),
+            ],
+        )
+        self.assertEqual(len(check_projects_yaml.validate(data, changed=set())), 0)
+
+    def test_changed_projects(self):
+        a = {"name": "a", "gh_url": "https://github.com/a/a"}
+        b = {"name": "b", "gh_url": "https://github.com/b/b"}
+        old_data = {"projects": [a, b]}
+        data = {"projects": [b, {**a, "reason": "Popular"}, {"name": "c", "url": "x"}]}
+        self.assertEqual(check_projects_yaml.changed_projects(data, old_data), {1, 2})
+        self.assertEqual(check_projects_yaml.changed_projects(data, None), {0, 1, 2})
+
+    def test_copied_project_is_changed(self):
+        foo = {"name": "Foo", "gh_url": "https://github.com/foo/foo"}
+        bar = {"name": "Bar", "gh_url": "https://github.com/bar/bar"}
+        data = {"projects": [foo, bar, dict(foo)]}
+        changed = check_projects_yaml.changed_projects(data, {"projects": [foo, bar]})
+        self.assertEqual(changed, {2})
+        self.assertEqual(
+            [(e.index, e.message) for e in check_projects_yaml.validate(data, changed)],
+            [
+                (2, "duplicate name 'Foo'"),
+                (2, "duplicate url 'https://github.com/foo/foo'"),
+            ],
+        )
+
+    def test_read_revision(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "projects.yaml"
+            path.write_text(PROJECTS_YAML)
+
+            def git(*args):
+                subprocess.run(
+                    ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                    cwd=tmpdir, check=True, capture_output=True,
+                )
+
+            git("init")
+            git("add", "projects.yaml")
+            git("commit", "-m", "Add projects")
+            path.write_text("projects: []\n")
+            self.assertEqual(
+                check_projects_yaml.read_revision(path, "HEAD"), PROJECTS_YAML.encode()
+            )
+            with self.assertRaises(subprocess.CalledProcessError):
+                check_projects_yaml.read_revision(path, "no-such-ref")
+
+
+class TestFormatErrors(unittest.TestCase):
+    def test_all_errors_with_line_numbers(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "projects.yaml"
+            path.write_text(PROJECTS_YAML)
+            data = projects_yaml.load(path, None)
+            errors = check_projects_yaml.validate(data)
+            messages = check_projects_yaml.format_errors(path, errors, data)
+        self.assertEqual(
+            messages,
+            [
+                "projects.yaml:4: foo: expected 'release_count' to be an integer, not 'twelve'",
+                "projects.yaml:5: bar: missing 'first_release_date', required for non-GitHub projects",
+                "projects.yaml:7: bar: unknown field 'homepage'",
+                "projects.yaml:8: Foo: duplicate name 'Foo', also used on line 2",
+            ],
+        )
+
+    def test_projects_yaml_is_valid(self):
+        data = projects_yaml.load(projects_yaml.PROJECTS_YAML_PATH, None)
+        self.assertEqual(check_projects_yaml.validate(data), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
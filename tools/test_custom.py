@@ -0,0 +1,229 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import custom
+
+import datetime
+import functools
+import json
+import tempfile
+import unittest
+from unittest import mock
+
+
+def _project(name, is_zerover=True, **kw):
+    entry = {
+        "name": name,
+        "url": "https://example.com/%s" % name,
+        "is_zerover": is_zerover,
+        "star_count": 1234,
+        "first_release_date": "2015-06-01T00:00:00Z",
+        "first_release_version": "0.1.0",
+        "release_count": 10,
+        "release_count_zv": 8,
+        "latest_release_date": "2020-01-01T00:00:00Z",
+        "latest_release_version": "0.9.0",
+        "last_zv_release_version": "0.9.0",
+    }
+    entry.update(kw)
+    return entry
+
+
+class TestProjectTables(unittest.TestCase):
+    def test_zerover_table(self):
+        html = custom._zv_to_htmltable([_project("zv")])
+        self.assertTrue(html.startswith('<table class="zv-table">\n<thead'))
+        self.assertIn(
+            '<tr><th>Project</th><th class="stars">Stars</th><th class="released">First Released</th>'
+            '<th class="releases">Releases</th><th class="version">Current Version</th>'
+            '<th class="years">0ver years</th></tr>',
+            html,
+        )
+        self.assertIn(
+            '<tr><td><a href="https://example.com/zv">zv</a></td><td data-order="1234">1,234</td>'
+            '<td data-order="735750"><span title="0.1.0">2015</span></td>'
+            '<td data-order="10">10</td><td data-order="b0.b9.b0">0.9.0 (2020)</td>',
+            html,
+        )
+        self.assertEqual(html.count("<tr>"), 2)
+
+    def test_emeritus_table(self):
+        html = custom._emeritus_to_htmltable(
+            [_project("em", False, first_nonzv_release_date="2018-06-01T00:00:00+00:00")]
+        )
+        self.assertIn('<th class="releases">0ver Releases</th>', html)
+        self.assertIn(
+            '<td data-order="8">8</td><td data-order="b0.b9.b0">0.9.0 (2018)</td>'
+            '<td data-order="1096">3.0</td></tr>',
+            html,
+        )
+
+    def test_text_is_escaped(self):
+        html = custom._zv_to_htmltable(
+            [_project("a<b>", reason='Says "hi" & <leaves>', url="https://x.org/?a=1&b=2")]
+        )
+        self.assertIn('title="Says &quot;hi&quot; &amp; &lt;leaves&gt;"', html)
+        self.assertIn('<a href="https://x.org/?a=1&amp;b=2">a&lt;b&gt;</a>', html)
+        self.assertNotIn("<leaves>", html)
+
+    def test_sort_values(self):
+        html = custom._html_table(
+            [("Name", None, False), ("Stars", "stars", True)],
+            [("a", 1200, "1,200"), ("b", 5, "5")],
+        )
+        self.assertIn('<tr><td>a</td><td data-order="1200">1,200</td></tr>', html)
+        self.assertIn('<tr><td>b</td><td data-order="5">5</td></tr>', html)
+
+    def test_version_order(self):
+        versions = ["0.10.1", "0.9", "0.0.5", "0.10", "0.9.12", "0.9.2", "foo/1.0", ""]
+        self.assertEqual(
+            sorted(versions, key=custom._version_order),
+            ["", "0.0.5", "0.9", "0.9.2", "0.9.12", "0.10", "0.10.1", "foo/1.0"],
+        )
+        self.assertEqual(custom._version_order("0.123.4"), "b0.d123.b4")
+
+    def test_version_order_drops_tag_prefixes(self):
+        # Sodium's tags lead with the Minecraft version they're built for
+        self.assertEqual(custom._version_order("mc1.20.1-0.5.0"), custom._version_order("0.5.0"))
+        versions = ["0.6.0", "mc1.20.1-0.5.0", "0.4.9"]
+        self.assertEqual(
+            sorted(versions, key=custom._version_order), ["0.4.9", "mc1.20.1-0.5.0", "0.6.0"]
+        )
+
+    def test_missing_counts_sort_as_zero(self):
+        entry = _project("zv", star_count=None)
+        del entry["release_count"]
+        html = custom._zv_to_htmltable([entry])
+        self.assertEqual(html.count('<td data-order="0">---</td>'), 2)
+
+
+class TestPlaceholderRenderer(unittest.TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmp = Path(tmpdir.name)
+        self.projects_json_path = self.tmp / "projects.json"
+        self.cache_path = self.tmp / "tables"
+        self._write([_project("zv"), _project("em", is_zerover=False)])
+
+    def _write(self, projects):
+        with self.projects_json_path.open("w") as f:
+            json.dump({"projects": projects}, f)
+
+    def _renderer(self, cache=True, table_mode="inline"):
+        return custom.PlaceholderRenderer(
+            self.projects_json_path, self.cache_path if cache else None, table_mode
+        )
+
+    def test_substitutes_registered_placeholders_only(self):
+        content = custom.PlaceholderRenderer(self.projects_json_path, None).substitute(
+            "[ZEROVER_PROJECT_TABLE]\n[TODO] [EMERITUS_PROJECT_TABLE] [link](#)"
+        )
+        self.assertIn(">zv</a>", content)
+        self.assertIn(">em</a>", content)
+        self.assertNotIn("PROJECT_TABLE]", content)
+        self.assertIn("[TODO]", content)
+        self.assertTrue(content.endswith("[link](#)"))
+
+    def test_renders_only_used_placeholders_once(self):
+        renderer = self._renderer(cache=False)
+        with mock.patch.dict(
+            custom.PLACEHOLDERS,
+            {"EMERITUS_PROJECT_TABLE": mock.Mock(return_value="<emeritus/>")},
+        ):
+            render_emeritus = custom.PLACEHOLDERS["EMERITUS_PROJECT_TABLE"]
+            self.assertEqual(renderer.substitute("no tables here"), "no tables here")
+            renderer.substitute("[ZEROVER_PROJECT_TABLE]")
+            render_emeritus.assert_not_called()
+            for _ in range(3):
+                self.assertEqual(
+                    renderer.substitute("a [EMERITUS_PROJECT_TABLE] b"), "a <emeritus/> b"
+                )
+        render_emeritus.assert_called_once()
+
+    def test_cached_tables_reused_until_data_changes(self):
+        content = "[ZEROVER_PROJECT_TABLE][EMERITUS_PROJECT_TABLE]"
+        rendered = self._renderer().substitute(content)
+
+        with mock.patch.dict(custom.PLACEHOLDERS, {"ZEROVER_PROJECT_TABLE": mock.Mock()}):
+            self.assertEqual(self._renderer().substitute(content), rendered)
+            custom.PLACEHOLDERS["ZEROVER_PROJECT_TABLE"].assert_not_called()
+
+        self._write([_project("zv2"), _project("em", is_zerover=False)])
+        self.assertIn(">zv2</a>", self._renderer().substitute(content))
+        self.assertEqual(len(list(self.cache_path.glob("*.json"))), 1)
+
+    def test_cache_expires_daily(self):
+        self._renderer().substitute("[ZEROVER_PROJECT_TABLE]")
+        tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+        with mock.patch.object(custom.datetime, "date") as date_cls:
+            date_cls.today.return_value = tomorrow
+            key = custom._table_cache_key(self.projects_json_path.read_bytes())
+        self.assertFalse((self.cache_path / ("%s.json" % key)).exists())
+
+    def test_uncached_matches_cached(self):
+        content = "[ZEROVER_PROJECT_TABLE][EMERITUS_PROJECT_TABLE]"
+        self._renderer().substitute(content)
+        self.assertEqual(
+            self._renderer(cache=False).substitute(content),
+            self._renderer().substitute(content),
+        )
+
+    def test_ajax_tables_render_without_rows(self):
+        renderer = self._renderer(table_mode="ajax")
+        content = renderer.substitute("[ZEROVER_PROJECT_TABLE]")
+        self.assertIn(
+            '<table class="zv-table" data-rows-url="/project-table-rows.json"'
+            ' data-rows-key="ZEROVER_PROJECT_TABLE">',
+            content,
+        )
+        self.assertIn("<tbody>\n</tbody>", content)
+        self.assertNotIn(">zv</a>", content)
+
+        tables = json.loads(renderer.rows_json())
+        self.assertEqual(set(tables), {"ZEROVER_PROJECT_TABLE", "EMERITUS_PROJECT_TABLE"})
+        [row] = tables["ZEROVER_PROJECT_TABLE"]
+        self.assertEqual(
+            row[:3],
+            [
+                '<a href="https://example.com/zv">zv</a>',
+                [1234, "1,234"],
+                [735750, '<span title="0.1.0">2015</span>'],
+            ],
+        )
+        self.assertIn(">em</a>", tables["EMERITUS_PROJECT_TABLE"][0][0])
+
+    def test_rows_json_cached(self):
+        rows_json = self._renderer(table_mode="ajax").rows_json()
+        with mock.patch.object(custom, "_project_table_rows_json") as rows_json_func:
+            self.assertEqual(self._renderer(table_mode="ajax").rows_json(), rows_json)
+        rows_json_func.assert_not_called()
+
+    def test_unknown_table_mode(self):
+        with self.assertRaises(ValueError):
+            self._renderer(table_mode="lazy")
+
+    def test_post_export_writes_rows_in_ajax_mode(self):
+        site_path = self.tmp / "site"
+        site_path.mkdir()
+        chert_obj = mock.Mock(output_path=str(site_path))
+        renderer_cls = functools.partial(
+            custom.PlaceholderRenderer, self.projects_json_path, self.cache_path
+        )
+        with mock.patch.object(custom, "PlaceholderRenderer", renderer_cls):
+            chert_obj.get_config.return_value = "inline"
+            custom.chert_post_export(chert_obj)
+            self.assertFalse((site_path / "project-table-rows.json").exists())
+
+            chert_obj.get_config.return_value = "ajax"
+            custom.chert_post_export(chert_obj)
+        chert_obj.get_config.assert_called_with("zerover", "table_mode", "inline")
+        self.assertEqual(
+            (site_path / "project-table-rows.json").read_text(),
+            self._renderer(table_mode="ajax").rows_json(),
+        )
+
+if __name__ == "__main__":
+    unittest.main()
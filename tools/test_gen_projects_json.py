@@ -1,9 +1,22 @@
+import argparse
+import datetime
+import json
+import os
+import random
+import subprocess
 import sys
+import time
+import urllib.error
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPMessage
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 
+import fake_gh_api
 import gen_projects_json
+import http_pool
 
 import unittest
 import tempfile
@@ -42,10 +55,19 @@ def _fake_gh_json(tag_names: list[str], dates: dict[str, str]):
     return fake
 
 
+def _patch_gh_api(fake):
+    """Serve both single GitHub responses and paged listings from `fake`."""
+
+    def fake_pages(url, user=None, token=None, concurrent=True):
+        yield fake(url, user, token)
+
+    return mock.patch.multiple(
+        gen_projects_json, _get_gh_json=fake, _iter_gh_pages=fake_pages
+    )
+
+
 def _patched_project_info(info: dict, tag_names: list[str], dates: dict[str, str]) -> dict:
-    with mock.patch.object(
-        gen_projects_json, "_get_gh_json", _fake_gh_json(tag_names, dates)
-    ):
+    with _patch_gh_api(_fake_gh_json(tag_names, dates)):
         return gen_projects_json.get_gh_project_info(info)
 
 
@@ -78,6 +100,69 @@ class TestFindDominantVersionPattern(unittest.TestCase):
         )
 
 
+def _sorted_reference(tags: list[dict], frv: str | None) -> dict:
+    """The release picks made by sorting the dominant group's version tags."""
+    main_tags = gen_projects_json._find_dominant_version_pattern(tags)
+    vtags = [t for t in main_tags if gen_projects_json.match_vtag(t["name"])]
+    if not vtags:
+        return {}
+    vtags.sort(key=lambda t: gen_projects_json.version_key(t["name"]), reverse=True)
+    zv = [t for t in vtags if gen_projects_json.match_vtag(t["name"]).group("major") == "0"]
+    matches = [
+        t for t in vtags
+        if t["name"] == frv or gen_projects_json.strip_prefix(t["name"]) == frv
+    ]
+    ret = {
+        "release_count": len(vtags),
+        "release_count_zv": len(zv),
+        "latest": vtags[0],
+        "first": vtags[-1],
+        "first_release_match": matches[-1] if matches else None,
+        "last_zv": zv[0] if zv else None,
+        "first_nonzv": None,
+    }
+    if zv and vtags.index(zv[0]) > 0:
+        ret["first_nonzv"] = vtags[vtags.index(zv[0]) - 1]
+    return ret
+
+
+class TestSummarizeTags(unittest.TestCase):
+    def _random_tags(self, rng):
+        prefixes = ["v", "", "V", "release-", "mc1.20-", "ciflow/"]
+        names = []
+        for _ in range(rng.randrange(1, 60)):
+            version = ".".join(str(rng.randrange(n)) for n in (3, 6, 4))
+            names.append(rng.choice(prefixes) + version)
+        return [_tag(name) for name in names]
+
+    def test_matches_sorting_dominant_group(self):
+        rng = random.Random(0)
+        for _ in range(300):
+            tags = self._random_tags(rng)
+            frv = rng.choice([None, "0.1.0", "1.2.3", "v0.2.1"])
+            expected = _sorted_reference(tags, frv)
+            summary = gen_projects_json.summarize_tags(iter(tags), frv)
+            if not expected:
+                self.assertTrue(summary is None or not summary.release_count)
+                continue
+            if expected["last_zv"] is None:
+                del expected["first_nonzv"]  # only used past a 0ver release
+            for field, exp in expected.items():
+                got = getattr(summary, field)
+                if isinstance(got, gen_projects_json.TagRecord):
+                    got = got.as_tag()
+                self.assertEqual(got, exp, (field, [t["name"] for t in tags], frv))
+
+    def test_consumes_a_generator_once(self):
+        def tags():
+            yield from (_tag(name) for name in ["v1.0.0", "v0.2.0", "v0.1.0"])
+
+        summary = gen_projects_json.summarize_tags(tags())
+        self.assertEqual(summary.latest.name, "v1.0.0")
+        self.assertEqual(summary.last_zv.name, "v0.2.0")
+        self.assertEqual(summary.first_nonzv.name, "v1.0.0")
+
+
 class TestGetGhProjectInfo(unittest.TestCase):
     def test_latest_release_is_version_sorted_not_api_order(self):
         # API order deliberately name-sorted (as GitHub /tags returns), newest last.
@@ -137,6 +222,984 @@ class TestGetGhProjectInfo(unittest.TestCase):
         self.assertEqual(gh_info["first_nonzv_release_date"], dates["v1.0.0"])
 
 
+class TestFetchEntries(unittest.TestCase):
+    PROJECTS = [
+        {"name": "Zeta", "gh_url": GH_URL, "reason": "Last by name."},
+        {"name": "Alpha", "gh_url": GH_URL, "first_release_version": "0.3.0"},
+        {"name": "Skipped", "gh_url": GH_URL, "skip": True},
+        {
+            "name": "Manual",
+            "url": "https://example.com",
+            "first_release_date": "2001-01-01",
+            "emeritus": True,
+        },
+        {"name": "Mid", "gh_url": GH_URL, "star_count": 7},
+    ]
+    TAG_NAMES = ["v1.0.0", "v0.3.0", "v0.2.0"]
+    DATES = {
+        "v1.0.0": "2023-01-01T00:00:00Z",
+        "v0.3.0": "2019-03-03T00:00:00Z",
+        "v0.2.0": "2018-02-02T00:00:00Z",
+    }
+
+    def _fetch(self, workers):
+        with _patch_gh_api(_fake_gh_json(self.TAG_NAMES, self.DATES)):
+            entries = gen_projects_json.fetch_entries(self.PROJECTS, workers=workers)
+        return json.dumps(entries, sort_keys=True, default=gen_projects_json.json_default)
+
+    def test_concurrent_output_matches_serial(self):
+        serial = self._fetch(workers=1)
+        self.assertEqual(self._fetch(workers=4), serial)
+        self.assertEqual(
+            [e["name"] for e in json.loads(serial)], ["Alpha", "Manual", "Mid", "Zeta"]
+        )
+
+    def test_manual_fields_preserved(self):
+        entries = {e["name"]: e for e in json.loads(self._fetch(workers=4))}
+        self.assertEqual(entries["Mid"]["star_count"], 7)
+        self.assertEqual(entries["Alpha"]["first_release_date"], self.DATES["v0.3.0"])
+        self.assertFalse(entries["Manual"]["is_zerover"])
+
+
+def _http_message(headers: dict) -> HTTPMessage:
+    msg = HTTPMessage()
+    for k, v in headers.items():
+        msg[k] = v
+    return msg
+
+
+class _FakeResponse:
+    def __init__(self, body: bytes, headers: dict):
+        self._body = body
+        self._headers = _http_message(headers)
+
+    def read(self) -> bytes:
+        return self._body
+
+    def info(self) -> HTTPMessage:
+        return self._headers
+
+
+class TestHTTPCache(unittest.TestCase):
+    URL = "https://api.github.com/repos/example/proj?per_page=100"
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.cache = gen_projects_json.HTTPCache(Path(tmpdir.name))
+        patcher = mock.patch.object(gen_projects_json, "_http_cache", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_304_serves_cached_body_with_conditional_headers(self):
+        sent = []
+
+        def fake_urlopen(req):
+            sent.append(dict(req.header_items()))
+            if len(sent) == 1:
+                return _FakeResponse(b'{"stargazers_count": 1}', {"ETag": '"abc"'})
+            raise urllib.error.HTTPError(
+                req.full_url, 304, "Not Modified", _http_message({}), None
+            )
+
+        with mock.patch.object(gen_projects_json, "_gh_urlopen", fake_urlopen):
+            first, _ = gen_projects_json._gh_fetch(self.URL)
+            second, _ = gen_projects_json._gh_fetch(self.URL)
+
+        self.assertEqual(first, second)
+        self.assertNotIn("If-none-match", sent[0])
+        self.assertEqual(sent[1]["If-none-match"], '"abc"')
+
+    def test_responses_without_validators_are_not_cached(self):
+        self.cache.put(self.URL, _http_message({}), b"{}")
+        self.assertIsNone(self.cache.get(self.URL))
+
+    def test_evict_removes_least_recently_used(self):
+        urls = [f"{self.URL}&page={i}" for i in range(3)]
+        for i, url in enumerate(urls):
+            self.cache.put(url, _http_message({"ETag": str(i)}), b"x" * 100)
+            os.utime(self.cache._entry_path(url), (i, i))
+        self.cache.max_bytes = 2 * self.cache._entry_path(urls[0]).stat().st_size
+
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertIsNone(self.cache.get(urls[0]))
+        self.assertIsNotNone(self.cache.get(urls[2]))
+
+
+class TestCommitCache(unittest.TestCase):
+    TAG_NAMES = ["v1.0.0", "v0.9.0"]
+    DATES = {
+        "v1.0.0": "2023-01-01T00:00:00Z",
+        "v0.9.0": "2022-09-09T00:00:00Z",
+    }
+
+    def _commit_url(self, tag_name):
+        return _tag(tag_name)["commit"]["url"]
+
+    def _project_info(self, cache):
+        requested = []
+        fake = _fake_gh_json(self.TAG_NAMES, self.DATES)
+
+        def recording_fake(url, user=None, token=None):
+            requested.append(url)
+            return fake(url, user, token)
+
+        with _patch_gh_api(recording_fake):
+            with mock.patch.object(gen_projects_json, "_commit_cache", cache):
+                gh_info = gen_projects_json.get_gh_project_info(
+                    {"name": "Emeritus", "gh_url": GH_URL}
+                )
+        return gh_info, [url for url in requested if "/commits/" in url]
+
+    def test_seeded_commits_skip_requests(self):
+        uncached_info, commit_requests = self._project_info(None)
+        self.assertEqual(len(commit_requests), 3)
+
+        cache = gen_projects_json.CommitCache()
+        cache.seed([{"name": "Emeritus", **uncached_info}], [{"name": "Emeritus"}])
+        cached_info, commit_requests = self._project_info(cache)
+
+        self.assertEqual(commit_requests, [])
+        self.assertEqual(cached_info, uncached_info)
+
+    def test_fetched_commits_are_added(self):
+        cache = gen_projects_json.CommitCache()
+        self._project_info(cache)
+        self.assertEqual(
+            cache.get(self._commit_url("v0.9.0"))["date"], self.DATES["v0.9.0"]
+        )
+
+    def test_seed_skips_manual_release_fields(self):
+        entry = {
+            "name": "Manual",
+            "first_release_api_commit_url": self._commit_url("v0.9.0"),
+            "first_release_date": "2001-01-01",
+            "first_release_link": "https://example.com/release",
+        }
+        cache = gen_projects_json.CommitCache()
+        cache.seed([entry], [{"name": "Manual", "first_release_date": "2001-01-01"}])
+        self.assertIsNone(cache.get(self._commit_url("v0.9.0")))
+
+    def test_save_and_reload(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "commits.json"
+            cache = gen_projects_json.CommitCache(path)
+            cache.add(self._commit_url("v1.0.0"), "2023-01-01T00:00:00Z", "link")
+            cache.save()
+            reloaded = gen_projects_json.CommitCache(path)
+        self.assertEqual(len(reloaded), 1)
+        self.assertEqual(reloaded.get(self._commit_url("v1.0.0"))["link"], "link")
+
+
+def _fake_graphql(tag_names: list[str], dates: dict[str, str], per_page: int):
+    """Fake for _gh_post_json answering batched repository queries, paging
+    through refs `per_page` at a time."""
+    queries = []
+
+    def fake(url, payload, token):
+        queries.append(payload)
+        variables = payload["variables"]
+        data = {}
+        i = 0
+        while f"o{i}" in variables:
+            start = int(variables[f"c{i}"] or 0)
+            page = tag_names[start : start + per_page]
+            nodes = []
+            for name in page:
+                commit = {
+                    "oid": name,
+                    "authoredDate": dates[name],
+                    "url": f"https://github.com/example/proj/tree/{name}",
+                }
+                # annotated tags wrap the commit in a Tag object
+                target = {"target": commit} if name.startswith("v") else commit
+                nodes.append({"name": name, "target": target})
+            end = start + len(page)
+            data[f"r{i}"] = {
+                "nameWithOwner": "example/proj",
+                "stargazerCount": 4321,
+                "refs": {
+                    "pageInfo": {"hasNextPage": end < len(tag_names), "endCursor": str(end)},
+                    "nodes": nodes,
+                },
+            }
+            i += 1
+        return {"data": data}
+
+    fake.queries = queries
+    return fake
+
+
+class TestGraphQLBackend(unittest.TestCase):
+    TAG_NAMES = ["v1.0.0", "v0.9.0", "0.3.0", "0.2.0", "v0.1.0"]
+    DATES = {
+        "v1.0.0": "2023-01-01T00:00:00Z",
+        "v0.9.0": "2022-09-09T00:00:00Z",
+        "0.3.0": "2019-03-03T00:00:00Z",
+        "0.2.0": "2018-02-02T00:00:00Z",
+        "v0.1.0": "2017-01-01T00:00:00Z",
+    }
+    PROJECTS = [
+        {"name": f"Proj{i}", "gh_url": f"https://github.com/example/proj{i}"}
+        for i in range(5)
+    ]
+
+    def test_matches_rest_backend_in_few_queries(self):
+        with _patch_gh_api(_fake_gh_json(self.TAG_NAMES, self.DATES)):
+            rest_entries = gen_projects_json.fetch_entries(self.PROJECTS)
+
+        fake = _fake_graphql(self.TAG_NAMES, self.DATES, per_page=2)
+
+        def no_rest(url, user=None, token=None):
+            raise AssertionError(f"unexpected REST request: {url!r}")
+
+        with mock.patch.multiple(
+            gen_projects_json,
+            _gh_post_json=fake,
+            _get_gh_json=no_rest,
+            _iter_gh_pages=no_rest,
+            _commit_cache=gen_projects_json.CommitCache(),
+            GRAPHQL_BATCH_SIZE=4,
+        ):
+            graphql_entries = gen_projects_json.fetch_entries(
+                self.PROJECTS, token="t", backend="graphql"
+            )
+
+        self.assertEqual(graphql_entries, rest_entries)
+        # 3 pages of refs for 5 repos, 4 repos per query
+        self.assertEqual(len(fake.queries), 4)
+
+    def test_failed_batches_fall_back_to_rest(self):
+        rest_fake = _fake_gh_json(self.TAG_NAMES, self.DATES)
+        with _patch_gh_api(rest_fake):
+            rest_entries = gen_projects_json.fetch_entries(self.PROJECTS)
+
+        for error in (
+            urllib.error.HTTPError(gen_projects_json.GH_GRAPHQL_URL, 502, "Bad Gateway", None, None),
+            gen_projects_json.RateLimitExhausted("rate limit exhausted"),
+        ):
+            graphql_fake = _fake_graphql(self.TAG_NAMES, self.DATES, per_page=2)
+            rest_urls = []
+
+            def failing_graphql(url, payload, token):
+                if len(graphql_fake.queries) == 1:
+                    graphql_fake.queries.append(payload)
+                    raise error
+                return graphql_fake(url, payload, token)
+
+            def rest(url, user=None, token=None):
+                rest_urls.append(url)
+                return rest_fake(url, user, token)
+
+            with _patch_gh_api(rest), mock.patch.multiple(
+                gen_projects_json,
+                _gh_post_json=failing_graphql,
+                _commit_cache=gen_projects_json.CommitCache(),
+                GRAPHQL_BATCH_SIZE=2,
+            ):
+                entries = gen_projects_json.fetch_entries(
+                    self.PROJECTS, token="t", backend="graphql"
+                )
+            self.assertEqual(entries, rest_entries)
+            # the second query's batch, Proj2 and Proj3, went through REST
+            self.assertEqual(
+                sorted({url.split("/")[5] for url in rest_urls}), ["proj2", "proj3"]
+            )
+
+
+class TestSelectStaleProjects(unittest.TestCase):
+    NOW = datetime.datetime(2026, 6, 1, 12, tzinfo=datetime.timezone.utc)
+    TTL = datetime.timedelta(hours=24)
+
+    def _entry(self, name, hours_ago, **kw):
+        fetched_at = self.NOW - datetime.timedelta(hours=hours_ago)
+        return {"name": name, "gh_url": GH_URL, "fetched_at": fetched_at.isoformat(), **kw}
+
+    def _stale_names(self, projects, entries, **kw):
+        stale = gen_projects_json.select_stale_projects(
+            projects, entries, self.NOW, self.TTL, **kw
+        )
+        return [p["name"] for p in stale]
+
+    def test_new_old_and_edited_projects_are_stale(self):
+        projects = [
+            {"name": "Fresh", "gh_url": GH_URL},
+            {"name": "Old", "gh_url": GH_URL},
+            {"name": "New", "gh_url": GH_URL},
+            {"name": "Edited", "gh_url": GH_URL, "reason": "Now with a reason."},
+            {"name": "Skipped", "gh_url": GH_URL, "skip": True},
+        ]
+        entries = [
+            self._entry("Fresh", 1),
+            self._entry("Old", 30),
+            self._entry("Edited", 1),
+        ]
+        self.assertEqual(
+            self._stale_names(projects, entries), ["New", "Edited", "Old"]
+        )
+
+    def test_recent_release_uses_recent_ttl(self):
+        projects = [{"name": "Active", "gh_url": GH_URL}, {"name": "Dormant", "gh_url": GH_URL}]
+        entries = [
+            self._entry("Active", 6, latest_release_date="2026-05-30T00:00:00Z"),
+            self._entry("Dormant", 6, latest_release_date="2019-01-01T00:00:00Z"),
+        ]
+        self.assertEqual(
+            self._stale_names(projects, entries, recent_ttl=datetime.timedelta(hours=4)),
+            ["Active"],
+        )
+
+    def test_max_refresh_takes_least_recently_fetched(self):
+        projects = [{"name": n, "gh_url": GH_URL} for n in ("A", "B", "C")]
+        entries = [self._entry("A", 48), self._entry("B", 72), self._entry("C", 60)]
+        self.assertEqual(self._stale_names(projects, entries, max_refresh=2), ["B", "C"])
+
+    def test_entries_without_fetched_at_use_default(self):
+        projects = [{"name": "Legacy", "gh_url": GH_URL}]
+        entries = [{"name": "Legacy", "gh_url": GH_URL}]
+        recent = self.NOW - datetime.timedelta(hours=1)
+        self.assertEqual(
+            self._stale_names(projects, entries, default_fetched_at=recent), []
+        )
+        self.assertEqual(self._stale_names(projects, entries), ["Legacy"])
+
+
+class TestRateLimiter(unittest.TestCase):
+    def _limiter(self, remaining, reset_in, reserve=10):
+        limiter = gen_projects_json.RateLimiter(reserve=reserve)
+        limiter.update(
+            _http_message(
+                {
+                    "x-ratelimit-remaining": str(remaining),
+                    "x-ratelimit-reset": str(time.time() + reset_in),
+                }
+            )
+        )
+        return limiter
+
+    def test_large_budget_is_not_paced(self):
+        limiter = self._limiter(4000, reset_in=3600)
+        with mock.patch.object(gen_projects_json.time, "sleep") as sleep:
+            for _ in range(5):
+                limiter.acquire()
+        sleep.assert_not_called()
+        self.assertEqual(limiter.remaining, 3995)
+
+    def test_small_budget_is_not_paced_while_demand_fits(self):
+        limiter = self._limiter(410, reset_in=3000)
+        limiter.expect(300)
+        with mock.patch.object(gen_projects_json.time, "sleep") as sleep:
+            for _ in range(5):
+                limiter.acquire()
+        sleep.assert_not_called()
+
+    def test_demand_over_budget_is_paced_briefly(self):
+        limiter = self._limiter(110, reset_in=50)
+        limiter.expect(500)
+        with mock.patch.object(gen_projects_json.time, "sleep") as sleep:
+            limiter.acquire()
+            limiter.acquire()
+        # 100 requests over 50 seconds would be half a second apart
+        self.assertAlmostEqual(
+            sleep.call_args_list[-1].args[0], gen_projects_json.RATE_LIMIT_MAX_SPACING, delta=0.05
+        )
+
+    def test_demand_over_budget_is_not_paced_until_a_far_reset(self):
+        limiter = self._limiter(110, reset_in=1000)
+        limiter.expect(500)
+        with mock.patch.object(gen_projects_json.time, "sleep") as sleep:
+            for _ in range(100):
+                limiter.acquire()
+            with self.assertRaises(gen_projects_json.RateLimitExhausted):
+                limiter.acquire()
+        sleep.assert_not_called()
+
+    def test_conditional_requests_are_not_paced(self):
+        limiter = self._limiter(110, reset_in=50)
+        limiter.expect(500)
+        with mock.patch.object(gen_projects_json.time, "sleep") as sleep:
+            for _ in range(5):
+                limiter.acquire(conditional=True)
+                limiter.refund()
+        sleep.assert_not_called()
+
+    def test_refunded_requests_keep_the_budget(self):
+        limiter = self._limiter(100, reset_in=1000)
+        for _ in range(5):
+            limiter.acquire()
+            limiter.refund()
+        # a 304's headers show the remaining count unchanged
+        limiter.update(
+            _http_message(
+                {"x-ratelimit-remaining": "100", "x-ratelimit-reset": str(limiter.reset_at)}
+            )
+        )
+        self.assertEqual(limiter.remaining, 100)
+
+    def test_exhausted_budget_raises_instead_of_waiting(self):
+        limiter = self._limiter(10, reset_in=1800)
+        self.assertFalse(limiter.can_afford(1))
+        with self.assertRaises(gen_projects_json.RateLimitExhausted):
+            limiter.acquire()
+
+    def test_graphql_headers_are_ignored(self):
+        limiter = gen_projects_json.RateLimiter()
+        limiter.update(
+            _http_message(
+                {
+                    "x-ratelimit-resource": "graphql",
+                    "x-ratelimit-remaining": "0",
+                    "x-ratelimit-reset": str(time.time() + 3600),
+                }
+            )
+        )
+        self.assertTrue(limiter.can_afford(100))
+
+    def test_expected_requests_follow_the_caches(self):
+        project = {"name": "Proj", "gh_url": GH_URL}
+        repo_url = "https://api.github.com/repos/example/proj"
+        tags_url = f"{repo_url}/tags"
+        tags = [
+            {"name": name, "commit": {"url": f"{repo_url}/commits/{name}"}}
+            for name in ("v1.0.0", "v0.2.0", "v0.1.0")
+        ]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            http_cache = gen_projects_json.HTTPCache(Path(tmpdir) / "http")
+            tag_cache = gen_projects_json.TagCache(Path(tmpdir) / "tags")
+            commit_cache = gen_projects_json.CommitCache()
+            with mock.patch.multiple(
+                gen_projects_json,
+                _http_cache=http_cache,
+                _tag_cache=tag_cache,
+                _commit_cache=commit_cache,
+            ):
+                self.assertEqual(
+                    gen_projects_json._expected_requests(project),
+                    gen_projects_json.REQUESTS_PER_PROJECT,
+                )
+                etag = _http_message({"etag": '"x"'})
+                for url in (repo_url, tags_url):
+                    http_cache.put(gen_projects_json._gh_page_url(url), etag, b"[]")
+                tag_cache.put(tags_url, tags, time.time())
+                # the first release, and the latest, which is also the first non-0ver one
+                self.assertEqual(gen_projects_json._expected_requests(project), 2)
+                for tag in tags[1:]:
+                    commit_cache.add(tag["commit"]["url"], "2020-01-01T00:00:00Z", "link")
+                self.assertEqual(gen_projects_json._expected_requests(project), 1)
+                self.assertEqual(gen_projects_json._expected_requests({**project, "skip": True}), 0)
+
+    def test_fetch_entries_defers_projects_over_budget(self):
+        limiter = self._limiter(10 + gen_projects_json.REQUESTS_PER_PROJECT, reset_in=1800)
+        projects = [
+            {"name": "First", "gh_url": GH_URL},
+            {"name": "Second", "gh_url": GH_URL},
+        ]
+        dates = {"v0.1.0": "2020-05-05T00:00:00Z"}
+        fake = _fake_gh_json(["v0.1.0"], dates)
+
+        def spending_fake(url, user=None, token=None):
+            limiter.acquire()
+            return fake(url, user, token)
+
+        with _patch_gh_api(spending_fake), mock.patch.multiple(
+            gen_projects_json, _rate_limiter=limiter
+        ), mock.patch.object(gen_projects_json.time, "sleep"):
+            entries = gen_projects_json.fetch_entries(projects)
+        self.assertEqual([e["name"] for e in entries], ["First"])
+
+
+class TestPagination(unittest.TestCase):
+    URL = "https://api.github.com/repos/example/proj/tags"
+
+    def _fake_fetch(self, tag_names, per_page, links=True):
+        """Fake for _gh_fetch serving `tag_names` in pages, with Link headers."""
+        pages = [
+            [_tag(name) for name in tag_names[i : i + per_page]]
+            for i in range(0, len(tag_names), per_page)
+        ] or [[]]
+        fetched = []
+
+        def fake(url, auth_header_val=None):
+            query = urllib.parse.parse_qs(urllib.parse.urlsplit(url).query)
+            page = int(query.get("page", ["1"])[0])
+            fetched.append(page)
+            headers = {}
+            if links and len(pages) > 1:
+                rels = {"last": len(pages)}
+                if page < len(pages):
+                    rels["next"] = page + 1
+                headers["Link"] = ", ".join(
+                    f'<{self.URL}?per_page={per_page}&page={n}>; rel="{rel}"'
+                    for rel, n in rels.items()
+                )
+            return json.dumps(pages[page - 1]).encode(), _http_message(headers)
+
+        fake.fetched = fetched
+        return fake
+
+    def _get_tags(self, fake, per_page=2):
+        with mock.patch.multiple(gen_projects_json, _gh_fetch=fake, PER_PAGE=per_page):
+            return [t["name"] for t in gen_projects_json._get_gh_tags(self.URL)]
+
+    def test_link_header_pages_fetched_in_order(self):
+        names = [f"v0.{i}.0" for i in range(9, 0, -1)]
+        fake = self._fake_fetch(names, per_page=2)
+        self.assertEqual(self._get_tags(fake), names)
+        self.assertEqual(sorted(fake.fetched), [1, 2, 3, 4, 5])
+
+    def test_without_link_header_stops_at_short_page(self):
+        names = [f"v0.{i}.0" for i in range(5, 0, -1)]
+        fake = self._fake_fetch(names, per_page=2, links=False)
+        self.assertEqual(self._get_tags(fake), names)
+        self.assertEqual(fake.fetched, [1, 2, 3])
+
+    def test_parse_link_header(self):
+        links = gen_projects_json._parse_link_header(
+            '<https://x/tags?page=2>; rel="next", <https://x/tags?page=7>; rel="last"'
+        )
+        self.assertEqual(links, {"next": "https://x/tags?page=2", "last": "https://x/tags?page=7"})
+
+    def test_incremental_stops_at_known_tags(self):
+        old_names = [f"v0.{i}.0" for i in range(8, 0, -1)]
+        new_names = ["v0.10.0", "v0.9.0"] + old_names
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tag_cache = gen_projects_json.TagCache(Path(tmpdir))
+            with mock.patch.object(gen_projects_json, "_tag_cache", tag_cache):
+                self.assertEqual(self._get_tags(self._fake_fetch(old_names, 2)), old_names)
+                fake = self._fake_fetch(new_names, per_page=2)
+                self.assertEqual(self._get_tags(fake), new_names)
+                self.assertEqual(fake.fetched, [1, 2])
+                self.assertEqual(
+                    [t["name"] for t in tag_cache.get(self.URL)[0]], new_names
+                )
+
+    def test_incremental_lists_everything_weekly(self):
+        names = ["v2.1.0", "v2.0.0", "v1.2.8", "v1.2.7", "v1.2.6"]
+        # the backport sorts past the first page of known tags
+        backported = names[:2] + ["v1.2.9"] + names[2:]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tag_cache = gen_projects_json.TagCache(Path(tmpdir))
+            with mock.patch.object(gen_projects_json, "_tag_cache", tag_cache):
+                self._get_tags(self._fake_fetch(names, 2))
+                self.assertEqual(self._get_tags(self._fake_fetch(backported, 2)), names)
+
+                week_later = time.time() + gen_projects_json.TAG_FULL_LISTING_DAYS * 24 * 3600 + 60
+                with mock.patch.object(gen_projects_json.time, "time", return_value=week_later):
+                    fake = self._fake_fetch(backported, 2)
+                    self.assertEqual(self._get_tags(fake), backported)
+                self.assertEqual(sorted(fake.fetched), [1, 2, 3])
+                self.assertEqual(tag_cache.get(self.URL)[1], week_later)
+
+
+class TestAgainstFakeAPI(unittest.TestCase):
+    """Real HTTP, pagination, caching and retries, against tools/fake_gh_api.py."""
+
+    SCRIPT = Path(__file__).parent / "gen_projects_json.py"
+
+    def _start(self, repos, **kw):
+        server = fake_gh_api.FakeGitHubAPI(repos, **kw).start()
+        self.addCleanup(server.stop)
+        return server
+
+    def _env(self, server, tmp):
+        # with CI set, a failing run exits instead of waiting in pdb
+        return {
+            **os.environ,
+            "CI": "1",
+            "ZV_GH_API_URL": server.url,
+            "ZV_YAML_CACHE_DIR": str(tmp / "yaml"),
+        }
+
+    def _expected_release_count(self, repo):
+        return sum(1 for name, _ in repo["tags"] if not name.startswith("ciflow/"))
+
+    def test_main_end_to_end_then_revalidates_from_cache(self):
+        repos = fake_gh_api.synthetic_repos(12, seed=1, max_tags=250)
+        server = self._start(repos)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmp = Path(tmpdir)
+            fake_gh_api.write_projects_yaml(repos, tmp / "projects.yaml")
+            cmd = [
+                sys.executable, str(self.SCRIPT),
+                "--projects-yaml", str(tmp / "projects.yaml"),
+                "--output", str(tmp / "projects.json"),
+                "--cache-dir", str(tmp / "cache"),
+                "--workers", "4",
+            ]
+            env = self._env(server, tmp)
+            subprocess.run(cmd, env=env, check=True, capture_output=True)
+            first_run = dict(server.request_counts)
+            remaining = server.rate_remaining
+
+            with (tmp / "projects.json").open() as f:
+                entries = {e["gh_url"]: e for e in json.load(f)["projects"]}
+            self.assertEqual(len(entries), len(repos))
+            for full_name, repo in repos.items():
+                entry = entries[f"https://github.com/{full_name}"]
+                self.assertEqual(entry["star_count"], repo["stars"])
+                self.assertEqual(entry["release_count"], self._expected_release_count(repo))
+                self.assertIn("first_release_date", entry)
+            self.assertGreater(first_run["tags"], len(repos))  # some needed paging
+
+            with (tmp / "projects.report.json").open() as f:
+                report = json.load(f)
+            for kind in ("repo", "tags", "commit"):
+                self.assertEqual(report["requests"][kind], first_run[kind])
+            self.assertEqual(sorted(report["projects"]), sorted(e["name"] for e in entries.values()))
+            self.assertEqual(
+                sum(p["requests"] for p in report["projects"].values()), first_run["total"]
+            )
+
+            with (tmp / "projects.meta.json").open() as f:
+                self.assertEqual(sorted(json.load(f)["fetched_at"]), sorted(e["name"] for e in entries.values()))
+            written = (tmp / "projects.json").read_bytes()
+
+            # everything is stale with a zero TTL, but nothing changed upstream
+            subprocess.run(cmd + ["--ttl", "0"], env=env, check=True, capture_output=True)
+            self.assertEqual((tmp / "projects.json").read_bytes(), written)
+            self.assertEqual(server.rate_remaining, remaining)
+            self.assertEqual(server.request_counts["commit"], first_run["commit"])
+            with (tmp / "projects.report.json").open() as f:
+                report = json.load(f)
+            self.assertEqual(report["cache_hits"]["http"], report["requests"]["total"])
+            self.assertEqual(report["cache_hits"]["commit"], first_run["commit"])
+
+    def test_sharded_runs_merge_to_full_run(self):
+        repos = fake_gh_api.synthetic_repos(15, seed=3, max_tags=150)
+        server = self._start(repos)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmp = Path(tmpdir)
+            env = self._env(server, tmp)
+            fake_gh_api.write_projects_yaml(repos, tmp / "projects.yaml")
+            base = [sys.executable, str(self.SCRIPT), "--projects-yaml", str(tmp / "projects.yaml")]
+            subprocess.run(
+                base + ["--output", str(tmp / "full.json"), "--disable-caching"],
+                env=env, check=True, capture_output=True,
+            )
+            shard_procs = [
+                subprocess.Popen(
+                    base + ["--output", str(tmp / "projects.json"), "--cache-dir",
+                            str(tmp / "cache"), "--shard", f"{i}/3"],
+                    env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                )
+                for i in (1, 2, 3)
+            ]
+            self.assertEqual([proc.wait() for proc in shard_procs], [0, 0, 0])
+            shards = sorted(tmp.glob("projects.shard-*-of-3.json"))
+            self.assertEqual(len(shards), 3)
+            subprocess.run(
+                base + ["merge", *map(str, shards), "--output", str(tmp / "projects.json")],
+                env=env, check=True, capture_output=True,
+            )
+
+            def load(name):
+                with (tmp / name).open() as f:
+                    data = json.load(f)
+                self.assertNotIn("shard", data)
+                return [
+                    {k: v for k, v in e.items() if k != "fetched_at"}
+                    for e in data["projects"]
+                ]
+
+            self.assertEqual(load("projects.json"), load("full.json"))
+            # shards share the commit cache file without losing entries
+            with (tmp / "cache" / "commits.json").open() as f:
+                self.assertEqual(len(json.load(f)), server.request_counts["commit"] // 2)
+
+    def test_replay_reproduces_recorded_run_offline(self):
+        repos = fake_gh_api.synthetic_repos(10, seed=4, max_tags=150)
+        server = self._start(repos)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmp = Path(tmpdir)
+            fake_gh_api.write_projects_yaml(repos, tmp / "projects.yaml")
+            base = [sys.executable, str(self.SCRIPT), "--projects-yaml", str(tmp / "projects.yaml")]
+            # a warm cache must not keep responses out of the recording
+            env = self._env(server, tmp)
+            cache_args = ["--cache-dir", str(tmp / "cache")]
+            subprocess.run(
+                base + cache_args + ["--output", str(tmp / "warm.json")],
+                env=env, check=True, capture_output=True,
+            )
+            subprocess.run(
+                base + cache_args + ["--output", str(tmp / "recorded.json"), "--record", str(tmp / "rec")],
+                env=env, check=True, capture_output=True,
+            )
+            server.stop()  # nothing listening from here on
+            requests_before = server.request_counts["total"]
+
+            subprocess.run(
+                base + ["--output", str(tmp / "replayed.json"), "--replay", str(tmp / "rec")],
+                env=env, check=True, capture_output=True,
+            )
+            self.assertEqual(server.request_counts["total"], requests_before)
+
+            def load(name):
+                with (tmp / name).open() as f:
+                    return [
+                        {k: v for k, v in e.items() if k != "fetched_at"}
+                        for e in json.load(f)["projects"]
+                    ]
+
+            self.assertEqual(load("replayed.json"), load("recorded.json"))
+            self.assertFalse((tmp / "replayed.meta.json").exists())
+
+            proc = subprocess.run(
+                base + ["--replay", str(tmp / "rec")], env=env, capture_output=True, text=True
+            )
+            self.assertEqual(proc.returncode, 2)
+            self.assertIn("--replay requires --output", proc.stderr)
+
+    def test_replay_of_unrecorded_request_fails(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            recorder = gen_projects_json.ResponseRecorder(Path(tmpdir), replay=True)
+            with mock.patch.object(gen_projects_json, "_recorder", recorder):
+                with self.assertRaises(gen_projects_json.ReplayMissing):
+                    gen_projects_json._gh_fetch("https://api.github.com/repos/o/missing")
+
+    def test_small_rate_limit_runs_without_stalling(self):
+        repos = fake_gh_api.synthetic_repos(5, seed=5, max_tags=60)
+        server = self._start(repos, rate_limit=300)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmp = Path(tmpdir)
+            fake_gh_api.write_projects_yaml(repos, tmp / "projects.yaml")
+            cmd = [
+                sys.executable, str(self.SCRIPT),
+                "--projects-yaml", str(tmp / "projects.yaml"),
+                "--output", str(tmp / "projects.json"),
+                "--cache-dir", str(tmp / "cache"),
+                "--workers", "2",
+            ]
+            env = self._env(server, tmp)
+            for extra_args in ([], ["--ttl", "0"]):
+                # the warm run is all 304s, which mustn't use up the budget
+                start = time.perf_counter()
+                subprocess.run(cmd + extra_args, env=env, check=True, capture_output=True, timeout=60)
+                self.assertLess(time.perf_counter() - start, 15)
+                with (tmp / "projects.json").open() as f:
+                    self.assertEqual(len(json.load(f)["projects"]), len(repos))
+                with (tmp / "projects.report.json").open() as f:
+                    self.assertLess(json.load(f)["rate_limit_waits"]["wall_seconds"], 1)
+            self.assertEqual(server.request_counts["rate_limited"], 0)
+
+    def test_runs_that_fit_the_budget_never_wait(self):
+        repos = fake_gh_api.synthetic_repos(40, seed=6, max_tags=60)
+        # the cold run takes about 160 requests, and the warm run's 304s
+        # are free, but a flat per-project estimate doesn't fit what's left
+        server = self._start(repos, rate_limit=400)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmp = Path(tmpdir)
+            fake_gh_api.write_projects_yaml(repos, tmp / "projects.yaml")
+            cmd = [
+                sys.executable, str(self.SCRIPT),
+                "--projects-yaml", str(tmp / "projects.yaml"),
+                "--output", str(tmp / "projects.json"),
+                "--cache-dir", str(tmp / "cache"),
+                "--workers", "8",
+            ]
+            env = self._env(server, tmp)
+            for extra_args in ([], ["--ttl", "0"]):
+                subprocess.run(cmd + extra_args, env=env, check=True, capture_output=True, timeout=60)
+                with (tmp / "projects.json").open() as f:
+                    self.assertEqual(len(json.load(f)["projects"]), len(repos))
+                with (tmp / "projects.report.json").open() as f:
+                    self.assertEqual(json.load(f)["rate_limit_waits"]["count"], 0)
+
+    def test_retries_injected_errors_over_pooled_connections(self):
+        repos = fake_gh_api.synthetic_repos(3, seed=2, max_tags=120)
+        server = self._start(repos, error_every=4)
+        pool = http_pool.ConnectionPool(timeout=5)
+        self.addCleanup(pool.close)
+        page_executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(page_executor.shutdown)
+        with mock.patch.multiple(
+            gen_projects_json,
+            GH_API_URL=server.url,
+            PER_PAGE=25,
+            _http_pool=pool,
+            _page_executor=page_executor,
+        ), mock.patch.object(gen_projects_json.time, "sleep"):
+            entries = gen_projects_json.fetch_entries(
+                [{"name": n, "gh_url": f"https://github.com/{n}"} for n in repos]
+            )
+        self.assertGreater(server.request_counts["injected_errors"], 0)
+        for entry, repo in zip(entries, repos.values()):
+            self.assertEqual(entry["release_count"], self._expected_release_count(repo))
+        # the calling thread plus the two page fetch threads
+        self.assertLessEqual(pool.connections_opened, 3)
+
+
+class TestShards(unittest.TestCase):
+    def test_shards_partition_projects(self):
+        names = [f"project-{i}" for i in range(500)]
+        slices = [
+            [n for n in names if gen_projects_json.in_shard(n, (i, 4))] for i in range(1, 5)
+        ]
+        self.assertEqual(sorted(sum(slices, [])), sorted(names))
+        for names_in_shard in slices:
+            self.assertGreater(len(names_in_shard), 75)
+
+    def _write_shard(self, tmp, index, count, names):
+        path = tmp / f"projects.shard-{index}-of-{count}.json"
+        with path.open("w") as f:
+            json.dump(
+                {
+                    "projects": [{"name": n} for n in names],
+                    "gen_date": "2024-01-01T00:00:00+00:00",
+                    "gen_duration": float(index),
+                    "shard": [index, count],
+                },
+                f,
+            )
+        return path
+
+    def test_merge_sorts_entries(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmp = Path(tmpdir)
+            paths = [
+                self._write_shard(tmp, 2, 2, ["d", "a"]),
+                self._write_shard(tmp, 1, 2, ["c", "b"]),
+            ]
+            entries, duration = gen_projects_json.merge_shards(paths)
+        self.assertEqual([e["name"] for e in entries], ["a", "b", "c", "d"])
+        self.assertEqual(duration, 2.0)
+
+    def test_merge_rejects_incomplete_or_mixed_shards(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmp = Path(tmpdir)
+            one_of_three = self._write_shard(tmp, 1, 3, ["a"])
+            two_of_three = self._write_shard(tmp, 2, 3, ["b"])
+            two_of_two = self._write_shard(tmp, 2, 2, ["c"])
+            for paths, message in [
+                ([one_of_three, two_of_three], "missing shard"),
+                ([one_of_three, two_of_two], "different splits"),
+                ([one_of_three, one_of_three], "more than once"),
+            ]:
+                with self.assertRaisesRegex(ValueError, message):
+                    gen_projects_json.merge_shards(paths)
+
+    def test_parse_shard(self):
+        self.assertEqual(gen_projects_json._parse_shard("2/4"), (2, 4))
+        for bad in ("0/4", "5/4", "2", "a/b"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                gen_projects_json._parse_shard(bad)
+
+    def test_merge_options_before_shard_files(self):
+        for argv in (
+            ["merge", "--output", "out.json", "a.json", "b.json"],
+            ["merge", "a.json", "--output", "out.json", "b.json"],
+            ["merge", "a.json", "b.json", "--output", "out.json"],
+        ):
+            with mock.patch.object(sys, "argv", ["prog", *argv]):
+                args = gen_projects_json.parse_args()
+            self.assertEqual(args.command, "merge")
+            self.assertEqual(args.shards, [Path("a.json"), Path("b.json")])
+            self.assertEqual(args.output, Path("out.json"))
+
+
+class TestSaveProjects(unittest.TestCase):
+    ENTRIES = [
+        {"name": "a", "star_count": 1, "fetched_at": "2024-01-01T00:00:00+00:00"},
+        {"name": "b", "star_count": 2, "fetched_at": "2024-01-02T00:00:00+00:00"},
+    ]
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = Path(tmpdir.name) / "projects.json"
+
+    def _load(self, path):
+        with path.open() as f:
+            return json.load(f)
+
+    def test_metadata_only_changes_skip_write(self):
+        self.assertTrue(gen_projects_json.save_projects(self.path, self.ENTRIES, 1.0))
+        data = self._load(self.path)
+        self.assertEqual(data["projects"], [{"name": "a", "star_count": 1}, {"name": "b", "star_count": 2}])
+
+        refetched = [{**e, "fetched_at": "2024-02-01T00:00:00+00:00"} for e in self.ENTRIES]
+        self.assertFalse(gen_projects_json.save_projects(self.path, refetched, 2.0))
+        self.assertEqual(self._load(self.path), data)
+        meta = self._load(self.path.with_name("projects.meta.json"))
+        self.assertEqual(meta["fetched_at"], {"a": "2024-02-01T00:00:00+00:00", "b": "2024-02-01T00:00:00+00:00"})
+        self.assertEqual((meta["gen_duration"], meta["changed"]), (2.0, False))
+
+        updated = [{**refetched[0], "star_count": 3}, refetched[1]]
+        self.assertTrue(gen_projects_json.save_projects(self.path, updated, 3.0))
+        self.assertEqual(self._load(self.path)["projects"][0]["star_count"], 3)
+
+    def test_compact_copy(self):
+        compact_path = self.path.with_name("projects.min.json")
+        gen_projects_json.save_projects(self.path, self.ENTRIES, 1.0)
+        # added to an unchanged file, the compact copy is still written
+        self.assertFalse(gen_projects_json.save_projects(self.path, self.ENTRIES, 1.0, compact_path))
+        self.assertEqual(self._load(compact_path), self._load(self.path))
+        self.assertNotIn(b"\n", compact_path.read_bytes())
+        self.assertLess(compact_path.stat().st_size, self.path.stat().st_size)
+
+
+class TestRunStats(unittest.TestCase):
+    def test_page_fetch_requests_attributed_to_project(self):
+        stats = gen_projects_json.RunStats()
+        page_executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(page_executor.shutdown)
+
+        def fetch_page(url):
+            stats.record_request(url)
+            stats.record_bytes(url, 10)
+            return url
+
+        urls = [f"https://api.github.com/repos/o/a/tags?page={n}" for n in range(5)]
+        with mock.patch.object(gen_projects_json, "_page_executor", page_executor):
+            with stats.project("a"):
+                list(gen_projects_json._ordered_map(fetch_page, urls, 2))
+                stats.record_request("https://api.github.com/repos/o/a/commits/abc")
+                stats.record_cache_hit("commit")
+        stats.record_request("https://api.github.com/graphql")
+
+        report = stats.report()
+        self.assertEqual(report["requests"], {"total": 7, "tags": 5, "commit": 1, "graphql": 1})
+        self.assertEqual(report["bytes"], {"total": 50, "tags": 50})
+        self.assertEqual(report["projects"]["a"]["requests"], 6)
+        self.assertEqual(report["projects"]["a"]["cache_hits"], 1)
+        self.assertEqual([p["name"] for p in report["slowest_projects"]], ["a"])
+
+    def test_retries_and_waits_counted(self):
+        stats = gen_projects_json.RunStats()
+        calls = []
+
+        def fake_urlopen(req):
+            calls.append(req)
+            if len(calls) == 1:
+                raise urllib.error.HTTPError(
+                    req.full_url, 502, "Bad Gateway", _http_message({}), None
+                )
+            return _FakeResponse(b"{}", {})
+
+        with mock.patch.multiple(
+            gen_projects_json, _run_stats=stats, _rate_limiter=None, _http_pool=None
+        ), mock.patch.object(gen_projects_json.urllib.request, "urlopen", fake_urlopen), \
+                mock.patch.object(gen_projects_json.time, "sleep"):
+            with stats.project("b"):
+                gen_projects_json._gh_fetch("https://api.github.com/repos/o/b")
+        report = stats.report()
+        self.assertEqual(report["requests"], {"total": 2, "repo": 2})
+        self.assertEqual(report["retries"], {"total": 1, "repo": 1})
+        waits = report["rate_limit_waits"]
+        self.assertEqual((waits["count"], waits["worker_seconds"]), (1, 4))
+        self.assertAlmostEqual(waits["wall_seconds"], 4)
+        self.assertEqual(report["projects"]["b"]["retries"], 1)
+
+    def test_concurrent_waits_counted_once_in_wall_time(self):
+        stats = gen_projects_json.RunStats()
+        with mock.patch.object(gen_projects_json.time, "perf_counter", side_effect=[10, 11, 20]):
+            # two workers waiting over 6-10 and 8-11, then one over 18-20
+            stats.record_wait(4)
+            stats.record_wait(3)
+            stats.record_wait(2)
+        waits = stats.report()["rate_limit_waits"]
+        self.assertEqual(waits, {"count": 3, "wall_seconds": 7, "worker_seconds": 9})
+
+
 class TestVersionKey(unittest.TestCase):
     def test_numeric_ordering_across_prefix_styles(self):
         self.assertGreater(
@@ -149,6 +1212,29 @@ class TestVersionKey(unittest.TestCase):
         )
 
 
+class TestParseTag(unittest.TestCase):
+    def test_fields_match_helpers(self):
+        for name, version, key, prefix in [
+            ("v0.4.10", "0.4.10", (0, 4, 10), ""),
+            ("release-1.2.3", "1.2.3", (1, 2, 3), "release-"),
+            ("mc1.20.1-0.5.8", "0.5.8", (0, 5, 8), ""),
+            ("pkg/v2.0.0b1", "2.0.0b1", (2, 0, 0, 1), ""),
+            ("ciflow/trunk/123", "123", (123,), None),
+            ("nightly-2024.01.01", "2024.01.01", (2024, 1, 1), None),
+            ("latest", "latest", (), None),
+        ]:
+            parsed = gen_projects_json.parse_tag(name)
+            self.assertEqual(parsed.version, gen_projects_json.strip_prefix(name))
+            self.assertEqual((parsed.version, parsed.key, parsed.pattern_prefix), (version, key, prefix), name)
+
+    def test_repeated_names_hit_cache(self):
+        gen_projects_json.parse_tag.cache_clear()
+        for _ in range(3):
+            gen_projects_json.version_key("v9.9.9")
+            gen_projects_json.match_vtag("v9.9.9")
+        self.assertEqual(gen_projects_json.parse_tag.cache_info().misses, 1)
+
+
 class TestParseArgsToken(unittest.TestCase):
     """Contract: after parsing, -k/--token is replaced by file contents only
     when it names a readable file; literal tokens pass through unchanged,
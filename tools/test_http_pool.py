@@ -0,0 +1,120 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import http_pool
+
+import gzip
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        self.server.requests.append((self.command, self.path, dict(self.headers)))
+        if self.path == "/json":
+            body = b'{"hello": "world"}' * 100
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                self._send(200, gzip.compress(body), {"Content-Encoding": "gzip"})
+            else:
+                self._send(200, body)
+        elif self.path == "/hangup":
+            # close without "Connection: close", like an idle keep-alive timeout
+            self._send(200, b"{}")
+            self.close_connection = True
+        elif self.path == "/moved":
+            self._send(301, headers={"Location": "/json"})
+        elif self.path == "/etag":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self._send(304, headers={"ETag": '"v1"'})
+            else:
+                self._send(200, b"{}", {"ETag": '"v1"'})
+        else:
+            self._send(404, b"not found")
+
+
+class TestConnectionPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        cls.server.requests = []
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.pool = http_pool.ConnectionPool(timeout=5)
+        self.addCleanup(self.pool.close)
+        self.server.requests.clear()
+
+    def _get(self, path, headers=None):
+        req = urllib.request.Request(self.base_url + path, headers=headers or {})
+        return self.pool.urlopen(req)
+
+    def test_connection_reused_across_requests(self):
+        for _ in range(5):
+            self._get("/json")
+        self.assertEqual(self.pool.connections_opened, 1)
+        self.assertEqual(len(self.server.requests), 5)
+
+    def test_connection_reused_after_head(self):
+        for _ in range(3):
+            req = urllib.request.Request(self.base_url + "/json", method="HEAD")
+            self.assertEqual(self.pool.urlopen(req).read(), b"")
+        self.assertEqual(self._get("/json").status, 200)
+        self.assertEqual(self.pool.connections_opened, 1)
+
+    def test_gzip_response_decompressed(self):
+        resp = self._get("/json")
+        self.assertEqual(resp.read(), b'{"hello": "world"}' * 100)
+        self.assertEqual(self.server.requests[0][2]["Accept-Encoding"], "gzip")
+        self.assertEqual(resp.wire_bytes, len(gzip.compress(b'{"hello": "world"}' * 100)))
+
+    def test_redirect_followed(self):
+        resp = self._get("/moved")
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(resp.url, self.base_url + "/json")
+
+    def test_error_statuses_raise_http_error(self):
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            self._get("/missing")
+        self.assertEqual(ctx.exception.code, 404)
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            self._get("/etag", {"If-None-Match": '"v1"'})
+        self.assertEqual(ctx.exception.code, 304)
+        self.assertEqual(ctx.exception.headers["ETag"], '"v1"')
+
+    def test_closed_connection_is_reopened(self):
+        self._get("/hangup")
+        self.assertEqual(self._get("/json").status, 200)
+        self.assertEqual(self.pool.connections_opened, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
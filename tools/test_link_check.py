@@ -0,0 +1,227 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import check_projects_yaml
+import link_check
+
+import contextlib
+import email.utils
+import http.client
+import io
+import json
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, headers=None):
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_HEAD(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.command, self.path))
+            server.starts.append(time.monotonic())
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            if server.latency:
+                time.sleep(server.latency)
+            if self.path.startswith("/ok"):
+                self._send(200)
+            elif self.path == "/redirect":
+                self._send(301, {"Location": "/ok"})
+            elif self.path == "/no-head" and self.command == "HEAD":
+                self._send(405)
+            elif self.path == "/no-head":
+                self._send(200)
+            elif self.path.startswith("/limited"):
+                with server.lock:
+                    hits = server.hits[self.path] = server.hits.get(self.path, 0) + 1
+                if self.path == "/limited-once" and hits > 1:
+                    self._send(200)
+                else:
+                    self._send(429, {"Retry-After": "0"})
+            else:
+                self._send(404)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def do_GET(self):
+        self.do_HEAD()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency=0.0):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.requests = []
+        self.starts = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.hits = {}
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:%s" % self.server_address[1]
+
+
+class TestLinkChecker(unittest.TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.cache_path = Path(tmpdir.name) / "links.json"
+
+    def _start(self, **kw):
+        server = _Server(**kw)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def _checker(self, **kw):
+        kw.setdefault("throttle", link_check.HostThrottle(concurrency=4, delay=0))
+        return link_check.LinkChecker(self.cache_path, **kw)
+
+    def test_results(self):
+        server = self._start()
+        urls = [server.url + path for path in ("/ok", "/redirect", "/no-head", "/missing")]
+        results = self._checker().check(urls + ["http://127.0.0.1:1/"])
+        self.assertEqual(
+            [(r.ok, r.status, r.error) for r in map(results.get, urls)],
+            [
+                (True, 200, None),
+                (True, 200, None),
+                (True, 200, None),
+                (False, 404, "404 Not Found"),
+            ],
+        )
+        self.assertFalse(results["http://127.0.0.1:1/"].ok)
+        self.assertIsNone(results["http://127.0.0.1:1/"].status)
+        self.assertIn(("GET", "/no-head"), server.requests)
+        self.assertEqual([m for m, p in server.requests if p != "/no-head"], ["HEAD"] * 4)
+
+    def test_working_links_cached_until_stale(self):
+        server = self._start()
+        urls = [server.url + "/ok", server.url + "/missing"]
+        self._checker().check(urls)
+        with self.cache_path.open() as f:
+            self.assertEqual(list(json.load(f)), [server.url + "/ok"])
+
+        del server.requests[:]
+        results = self._checker().check(urls)
+        self.assertTrue(results[server.url + "/ok"].cached)
+        # broken links are always probed again
+        self.assertEqual(server.requests, [("HEAD", "/missing")])
+
+        del server.requests[:]
+        self._checker(ttl=0).check(urls)
+        self.assertEqual(len(server.requests), 2)
+
+    def test_rate_limited_links_retried_not_broken(self):
+        server = self._start()
+        urls = [server.url + "/limited-once", server.url + "/limited"]
+        results = self._checker().check(urls)
+        self.assertEqual(
+            [(r.ok, r.status, r.rate_limited) for r in map(results.get, urls)],
+            [(True, 200, False), (True, 429, True)],
+        )
+        self.assertEqual(server.hits["/limited"], link_check.RATE_LIMIT_RETRIES + 1)
+        # only the link that was actually checked is cached
+        with self.cache_path.open() as f:
+            self.assertEqual(list(json.load(f)), [server.url + "/limited-once"])
+
+    def test_retry_after(self):
+        def retry_after(value=None):
+            headers = http.client.HTTPMessage()
+            if value is not None:
+                headers["Retry-After"] = value
+            return link_check._retry_after(headers)
+
+        self.assertEqual(retry_after("3"), 3)
+        self.assertEqual(retry_after(), link_check.RATE_LIMIT_WAIT)
+        self.assertEqual(retry_after("86400"), link_check.MAX_RETRY_AFTER)
+        self.assertAlmostEqual(
+            retry_after(email.utils.formatdate(time.time() + 30, usegmt=True)), 30, delta=2
+        )
+
+    def test_interleave_by_host(self):
+        urls = [
+            "https://a.com/1",
+            "https://a.com/2",
+            "https://A.com/3",
+            "https://b.com/1",
+            "http://c.com/1",
+        ]
+        self.assertEqual(
+            link_check.interleave_by_host(urls),
+            [
+                "https://a.com/1",
+                "https://b.com/1",
+                "http://c.com/1",
+                "https://a.com/2",
+                "https://A.com/3",
+            ],
+        )
+
+    def test_politeness_per_host(self):
+        server = self._start(latency=0.1)
+        urls = [server.url + "/ok/%s" % i for i in range(12)]
+        throttle = link_check.HostThrottle(concurrency=2, delay=0.03)
+        checker = self._checker(workers=8, throttle=throttle)
+        results = checker.check(urls)
+        self.assertTrue(all(result.ok for result in results.values()))
+        self.assertEqual(server.max_in_flight, 2)
+        # requests were spread out, allowing for when the server sees them
+        self.assertGreater(server.starts[-1] - server.starts[0], 0.03 * 11 * 0.8)
+        # connections were kept alive and reused
+        self.assertLessEqual(checker.pool.connections_opened, 8)
+
+
+class TestCheckLinks(unittest.TestCase):
+    def test_broken_links_are_project_errors(self):
+        server = _Server()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        data = {"projects": [
+            {"name": "a", "gh_url": server.url + "/ok", "wp_url": server.url + "/gone"},
+            {"name": "b", "url": server.url + "/gone", "repo_url": "not a url"},
+        ]}
+        checker = link_check.LinkChecker(None, throttle=link_check.HostThrottle(delay=0))
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            errors = check_projects_yaml.check_links(data, checker)
+        self.assertEqual(out.getvalue(), "Checked 2 link(s), skipping 0 that worked recently\n")
+        self.assertEqual(
+            [(e.index, e.field, e.message) for e in errors],
+            [
+                (0, "wp_url", "broken link %s/gone: 404 Not Found" % server.url),
+                (1, "url", "broken link %s/gone: 404 Not Found" % server.url),
+            ],
+        )
+        self.assertEqual(len(server.requests), 2)
+        with contextlib.redirect_stdout(io.StringIO()):
+            errors = check_projects_yaml.check_links(data, checker, changed={0})
+        self.assertEqual([(e.index, e.field) for e in errors], [(0, "wp_url")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import projects_yaml
+
+import datetime
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import yaml
+
+PROJECTS_YAML = """\
+projects:
+  - name: foo
+    gh_url: https://github.com/foo/foo
+  - name: bar
+    url: https://bar.example.com
+    first_release_date: 2015-06-01
+    release_count: 12
+"""
+
+
+class TestLoad(unittest.TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmp = Path(tmpdir.name)
+        self.path = self.tmp / "projects.yaml"
+        self.path.write_text(PROJECTS_YAML)
+        self.cache_dir = self.tmp / "cache"
+
+    def _load(self):
+        return projects_yaml.load(self.path, self.cache_dir)
+
+    def test_parse_matches_safe_load(self):
+        data = projects_yaml.parse(PROJECTS_YAML)
+        self.assertEqual(data, yaml.safe_load(PROJECTS_YAML))
+        self.assertEqual(data["projects"][1]["first_release_date"], datetime.date(2015, 6, 1))
+
+    def test_cached_until_changed(self):
+        data = self._load()
+        with mock.patch.object(projects_yaml, "parse") as parse:
+            self.assertEqual(self._load(), data)
+            parse.assert_not_called()
+
+        self.path.write_text(PROJECTS_YAML.replace("foo", "baz"))
+        self.assertEqual(self._load()["projects"][0]["name"], "baz")
+
+    def test_touched_file_not_reparsed(self):
+        data = self._load()
+        stat = self.path.stat()
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        with mock.patch.object(projects_yaml, "parse") as parse:
+            self.assertEqual(self._load(), data)
+            with mock.patch.object(Path, "read_bytes") as read_bytes:
+                # the new modification time was saved
+                self.assertEqual(self._load(), data)
+                read_bytes.assert_not_called()
+        parse.assert_not_called()
+
+    def test_unreadable_or_outdated_cache_reparsed(self):
+        data = self._load()
+        [cache_file] = self.cache_dir.iterdir()
+        cache_file.write_bytes(b"not a pickle")
+        self.assertEqual(self._load(), data)
+
+        with mock.patch.object(projects_yaml, "CACHE_VERSION", projects_yaml.CACHE_VERSION + 1):
+            with mock.patch.object(projects_yaml, "parse", return_value={}) as parse:
+                self.assertEqual(self._load(), {})
+                parse.assert_called_once()
+
+    def test_without_cache_dir(self):
+        self.assertEqual(projects_yaml.load(self.path, None), yaml.safe_load(PROJECTS_YAML))
+        self.assertFalse(self.cache_dir.exists())
+
+    def test_one_cache_file_per_path(self):
+        other = self.tmp / "other.yaml"
+        other.write_text("projects: []\n")
+        self._load()
+        self.assertEqual(projects_yaml.load(other, self.cache_dir), {"projects": []})
+        self.assertEqual(self._load()["projects"][0]["name"], "foo")
+        self.assertEqual(len(list(self.cache_dir.iterdir())), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()